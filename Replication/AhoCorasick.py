@@ -0,0 +1,182 @@
+# AhoCorasick.py
+from collections import deque
+
+# Complements used when the reverse complement of each pattern is searched as well
+_COMPLEMENT = str.maketrans('ACGTNacgtn', 'TGCANtgcan')
+
+
+class AhoCorasick:
+    """
+    Searches for many patterns at once with the Aho-Corasick automaton.
+
+    The Aho-Corasick algorithm generalizes Knuth-Morris-Pratt from one pattern to a set of patterns. The patterns
+    are stored in a trie, and every trie node gets a failure link: the longest proper suffix of the node's string
+    that is also a path in the trie. This is exactly the prefix table of KMP (see compute_prefix in
+    KMP_PatternSearch.py), computed over a trie instead of a single string. The failure links are then folded
+    into a complete transition table, so that the text is scanned once, one table lookup per character, and every
+    occurrence of every pattern is reported in that single pass.
+    """
+
+    def __init__(self, patterns, ignore_case=False, reverse_complement=False):
+        """
+        Builds the automaton for a set of patterns.
+
+        Args:
+            patterns (list): The patterns to search for (strings). Their order defines the pattern ids.
+            ignore_case (bool): Whether to match regardless of case.
+            reverse_complement (bool): Whether to also report occurrences of each pattern's reverse complement,
+                under the same pattern id (i.e. occurrences on the opposite strand of a DNA text).
+
+        Raises:
+            ValueError: If there are no patterns or a pattern is empty.
+        """
+        self.patterns = list(patterns)
+        if not self.patterns:
+            raise ValueError("At least one pattern is required")
+        if any(not pattern for pattern in self.patterns):
+            raise ValueError("Pattern cannot be empty")
+        self.ignore_case = ignore_case
+
+        # Collect the strings to insert: each pattern, and optionally its reverse complement, with its pattern id
+        keys = []
+        for pattern_id, pattern in enumerate(self.patterns):
+            key = pattern.upper() if ignore_case else pattern
+            keys.append((key, pattern_id))
+            if reverse_complement:
+                keys.append((key.translate(_COMPLEMENT)[::-1], pattern_id))
+
+        # Map every character used by the patterns to a column; the extra last column stands for any other one
+        self._alphabet = {}
+        for key, _ in keys:
+            for character in key:
+                self._alphabet.setdefault(character, len(self._alphabet))
+        self._width = len(self._alphabet) + 1
+
+        # Build the trie: children[state] maps a column to the next state, outputs[state] lists the matches
+        children = [{}]
+        outputs = [set()]
+        for key, pattern_id in keys:
+            state = 0
+            for character in key:
+                column = self._alphabet[character]
+                if column not in children[state]:
+                    children[state][column] = len(children)
+                    children.append({})
+                    outputs.append(set())
+                state = children[state][column]
+            outputs[state].add((pattern_id, len(key)))
+
+        # Breadth-first search computes the failure links and the full transition table level by level
+        delta = [0] * (len(children) * self._width)
+        failure = [0] * len(children)
+        queue = deque()
+        for column, child in children[0].items():
+            delta[column] = child
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            # A state also reports everything its failure state reports (shorter patterns ending here)
+            outputs[state] |= outputs[failure[state]]
+            for column in range(self._width):
+                child = children[state].get(column)
+                if child is None:
+                    # Missing edges follow the failure link, just like KMP falls back through its prefix table
+                    delta[state * self._width + column] = delta[failure[state] * self._width + column]
+                else:
+                    delta[state * self._width + column] = child
+                    failure[child] = delta[failure[state] * self._width + column]
+                    queue.append(child)
+
+        self._delta = delta
+        self._outputs = [tuple(sorted(matches)) for matches in outputs]
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def iter_matches(self, text):
+        """
+        Scans a text once and yields every occurrence of every pattern as it is found.
+
+        Args:
+            text (str): The text to be searched.
+
+        Yields:
+            tuple: (pattern_id, position) pairs, ordered by the position at which each occurrence ends.
+        """
+        delta = self._delta
+        width = self._width
+        outputs = self._outputs
+        state = 0
+        for end, column in enumerate(self._columns(text)):
+            state = delta[state * width + column]
+            if outputs[state]:
+                for pattern_id, length in outputs[state]:
+                    yield pattern_id, end - length + 1
+
+    def search(self, text):
+        """
+        Finds the positions of every pattern in a text in a single pass.
+
+        Args:
+            text (str): The text to be searched.
+
+        Returns:
+            list: One sorted list of start positions per pattern, in the order the patterns were given.
+        """
+        positions = [[] for _ in self.patterns]
+        for pattern_id, position in self.iter_matches(text):
+            positions[pattern_id].append(position)
+        for found in positions:
+            # Occurrences of a pattern and its reverse complement may be reported out of start order
+            found.sort()
+        return positions
+
+    def count(self, text):
+        """
+        Counts the occurrences of every pattern in a text in a single pass.
+
+        Args:
+            text (str): The text to be searched.
+
+        Returns:
+            list: The number of occurrences of each pattern, in the order the patterns were given.
+        """
+        counts = [0] * len(self.patterns)
+        for pattern_id, _ in self.iter_matches(text):
+            counts[pattern_id] += 1
+        return counts
+
+    def _columns(self, text):
+        """Translates a text into the automaton's column numbers."""
+        if self.ignore_case:
+            text = text.upper()
+        other = self._width - 1
+        if all(ord(character) < 256 for character in self._alphabet) and self._width <= 256:
+            try:
+                # One C-level translate maps every byte of the text to its column
+                table = bytes(self._alphabet.get(chr(byte), other) for byte in range(256))
+                return text.encode('latin-1').translate(table)
+            except UnicodeEncodeError:
+                pass
+        return [self._alphabet.get(character, other) for character in text]
+
+
+def aho_corasick_search(text, patterns):
+    """
+    Searches for occurrences of several patterns in a text using the Aho-Corasick algorithm.
+
+    This is the multi-pattern counterpart of kmp_pattern_search: instead of one pass over the text per pattern,
+    the automaton finds all occurrences of all patterns in one linear scan.
+
+    Args:
+        text (str): The text to be searched.
+        patterns (list): The patterns sought.
+
+    Returns:
+        tuple: A tuple containing a list with the positions of each pattern in the text and a list with the
+               number of occurrences of each pattern.
+    """
+    if not text:
+        raise ValueError("Text cannot be empty")
+    positions = AhoCorasick(patterns).search(text)
+    return positions, [len(found) for found in positions]
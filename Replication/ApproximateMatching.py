@@ -0,0 +1,151 @@
+# ApproximateMatching.py
+import numpy as np
+
+from FMIndex import FMIndex
+from PackedSequence import PackedSequence, encode, encode_kmer, kmer_codes, mismatch_counts, MAX_CODE_K
+
+# Shortest seed worth looking up in an exact-match index; shorter seeds hit too many random positions
+MIN_SEED_LENGTH = 10
+
+# Smallest batch of seedable patterns for which building an index (when none is given) beats scanning
+INDEX_MIN_PATTERNS = 200
+
+
+def ApproximateSearch(patterns, Genome, d, index=None):
+    """
+    Finds every position where each pattern occurs with at most d mismatches.
+
+    Two strategies are used, chosen per pattern:
+
+    - Bit-parallel scan: the genome is turned into 2-bit k-mer codes once per pattern length, and the Hamming
+      distance of every window is the popcount of (window XOR pattern), folded per base. Patterns longer than a
+      64-bit code are compared column by column instead. Either way the cost is a few vector operations per
+      genome position.
+    - Pigeonhole seed-and-verify: a pattern with at most d mismatches has at least one of its d+1 disjoint pieces
+      occurring exactly. Each piece is located with an FM-index, and only the candidate positions are verified.
+      This is used when the pieces are at least MIN_SEED_LENGTH long and an index is available; an index is
+      built on the fly only for batches of at least INDEX_MIN_PATTERNS such patterns.
+
+    Args:
+        patterns (list): The patterns to search for (strings of A, C, G and T, in any case).
+        Genome (str or PackedSequence): The genome; a string may contain A, C, G, T and N in any case.
+        d (int): The maximum number of mismatches.
+        index (FMIndex, optional): An index of the same genome, used for seed lookups.
+
+    Returns:
+        list: One sorted array of start positions per pattern. An N in the genome counts as a mismatch.
+
+    Raises:
+        ValueError: If d is negative, a pattern is empty or not made of A, C, G and T, or the genome contains
+            characters other than A, C, G, T and N.
+    """
+    if d < 0:
+        raise ValueError("d must be a non-negative integer")
+    # Symbols keep N as 4, so that it mismatches every base; codes hold N as A for the 2-bit window codes
+    if isinstance(Genome, PackedSequence):
+        symbols = Genome.codes()
+        for start, end in Genome.n_runs:
+            symbols[start:end] = 4
+    else:
+        symbols = encode(Genome, ignore_whitespace=False)
+    mask = symbols == 4
+    codes = np.where(mask, 0, symbols).astype(np.uint8) if mask.any() else symbols
+    # Running count of N positions, so that windows containing an N can be singled out
+    masked = np.concatenate(([0], np.cumsum(mask, dtype=np.int64))) if mask.any() else None
+
+    encoded = []
+    for pattern in patterns:
+        if not pattern:
+            raise ValueError("Pattern must not be empty")
+        pattern_codes = encode(pattern, ignore_whitespace=False)
+        if pattern_codes.max() > 3:
+            raise ValueError("Pattern must only contain A, C, G and T")
+        encoded.append(pattern_codes)
+
+    seedable = [len(pattern) // (d + 1) >= MIN_SEED_LENGTH for pattern in encoded]
+    if index is None and sum(seedable) >= INDEX_MIN_PATTERNS:
+        index = FMIndex.build(Genome)
+
+    window_codes = {}
+    results = []
+    for pattern_codes, seed in zip(encoded, seedable):
+        if len(pattern_codes) > len(codes):
+            results.append(np.empty(0, dtype=np.int64))
+        elif seed and index is not None:
+            results.append(_SeedAndVerify(index, symbols, pattern_codes, d))
+        else:
+            results.append(_Scan(codes, symbols, masked, pattern_codes, d, window_codes))
+    return results
+
+
+def _Scan(codes, symbols, masked, pattern_codes, d, window_codes):
+    """
+    Computes the mismatch count of every window of the genome against one pattern.
+
+    Args:
+        codes (numpy.ndarray): The base codes of the genome, with N read as A.
+        symbols (numpy.ndarray): The symbols of the genome, with N as 4.
+        masked (numpy.ndarray or None): The running count of N positions.
+        pattern_codes (numpy.ndarray): The base codes of the pattern.
+        d (int): The maximum number of mismatches.
+        window_codes (dict): Cache of window codes by pattern length, shared across a batch.
+
+    Returns:
+        numpy.ndarray: The start positions with at most d mismatches.
+    """
+    m = len(pattern_codes)
+    count = len(codes) - m + 1
+    if m <= MAX_CODE_K:
+        if m not in window_codes:
+            window_codes[m] = kmer_codes(codes, m)[0]
+        mismatches = mismatch_counts(window_codes[m], encode_kmer(_Letters(pattern_codes))).astype(np.int64)
+    else:
+        # Too long for one code: accumulate the mismatches one pattern column at a time
+        mismatches = _Mismatches(symbols, np.arange(count), pattern_codes)
+    if masked is not None:
+        # The codes read N as A, so windows containing an N are recounted from the symbols
+        with_n = np.flatnonzero(masked[m:] != masked[:count])
+        mismatches[with_n] = _Mismatches(symbols, with_n, pattern_codes)
+    return np.flatnonzero(mismatches <= d)
+
+
+def _SeedAndVerify(index, symbols, pattern_codes, d):
+    """
+    Finds approximate occurrences by exact seed lookups followed by verification.
+
+    Args:
+        index (FMIndex): The index of the genome.
+        symbols (numpy.ndarray): The symbols of the genome, with N as 4.
+        pattern_codes (numpy.ndarray): The base codes of the pattern.
+        d (int): The maximum number of mismatches.
+
+    Returns:
+        numpy.ndarray: The start positions with at most d mismatches.
+    """
+    m = len(pattern_codes)
+    last = len(symbols) - m
+    pattern = _Letters(pattern_codes)
+    # Split the pattern into d + 1 disjoint seeds; at least one must occur without mismatches
+    bounds = [round(i * m / (d + 1)) for i in range(d + 2)]
+    candidates = []
+    for start, end in zip(bounds, bounds[1:]):
+        found = index.locate(pattern[start:end]) - start
+        candidates.append(found[(found >= 0) & (found <= last)])
+    candidates = np.unique(np.concatenate(candidates))
+    if candidates.size == 0:
+        return candidates
+    # Verify only the candidates
+    return candidates[_Mismatches(symbols, candidates, pattern_codes) <= d]
+
+
+def _Mismatches(symbols, positions, pattern_codes):
+    """Counts the mismatches of the windows starting at the given positions, one pattern column at a time."""
+    mismatches = np.zeros(len(positions), dtype=np.int64)
+    for offset, base in enumerate(pattern_codes.tolist()):
+        mismatches += symbols[positions + offset] != base
+    return mismatches
+
+
+def _Letters(pattern_codes):
+    """Turns base codes back into an upper-case string."""
+    return ''.join('ACGT'[code] for code in pattern_codes.tolist())
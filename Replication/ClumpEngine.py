@@ -0,0 +1,133 @@
+# ClumpEngine.py
+from collections import namedtuple
+
+import numpy as np
+
+import KmerCache
+from KmerCounter import DENSE_MAX_K
+from PackedSequence import PackedSequence, decode_kmers, encode, kmer_codes, MAX_CODE_K
+
+# A k-mer forming a clump, with the window [start, end) in which it first reached the threshold
+Clump = namedtuple('Clump', ['kmer', 'start', 'end'])
+
+
+def FindClumps(Genome, params):
+    """
+    Finds the k-mers forming (L, t)-clumps for several (k, L, t) combinations in one call.
+
+    The genome is encoded once. For each distinct k its k-mer codes are sorted once (stably, so the
+    occurrences of every k-mer stay in position order), and each (L, t) pair is then answered with a few
+    array operations: a k-mer forms a clump exactly when some run of t consecutive occurrences spans at most
+    L bases. This gives the same k-mers as the sliding window of ClumpFinder without walking the windows.
+
+    A k-mer occurring fewer than t times in the whole genome cannot form a clump, so for k large enough that
+    most k-mers are rare, their occurrences are dropped before sorting using the genome's k-mer counts. The
+    counts come from the on-disk k-mer cache when it is enabled, and are otherwise tabulated directly. K-mers
+    longer than DENSE_MAX_K are not filtered: looking up sparse counts costs about as much as the sort saves.
+
+    Args:
+        Genome (str or PackedSequence): The DNA sequence to analyze. A string may contain A, C, G, T and N in
+            either case; k-mers overlapping an N are never counted.
+        params (iterable): The (k, L, t) combinations to evaluate.
+
+    Returns:
+        dict: Maps each (k, L, t) tuple to a list of Clump(kmer, start, end) records, ordered by the window
+              [start, end) in which each k-mer first reached t occurrences. When the genome is shorter than L,
+              the whole genome is the only window, as in ClumpFinder.
+
+    Raises:
+        ValueError: If Genome is empty, a parameter is non-positive, or k exceeds MAX_CODE_K.
+    """
+    if not Genome:
+        raise ValueError("Genome must not be empty")
+    params = [tuple(combination) for combination in params]
+    for k, L, t in params:
+        if k <= 0 or L <= 0 or t <= 0:
+            raise ValueError("k, L, and t must be positive integers")
+        if k > MAX_CODE_K:
+            raise ValueError(f"k must be at most {MAX_CODE_K}")
+
+    # Encode the genome once for every combination
+    if isinstance(Genome, PackedSequence):
+        codes, mask = Genome.codes(), Genome.mask()
+    else:
+        symbols = encode(Genome, ignore_whitespace=False)
+        mask = symbols == 4
+        codes = np.where(mask, 0, symbols).astype(np.uint8)
+        if not mask.any():
+            mask = None
+    n = len(codes)
+    cache = KmerCache.default()
+    digest = None if cache is None else KmerCache.CodesDigest(codes, mask)
+
+    results = {}
+    for k in sorted({combination[0] for combination in params}):
+        kmers, valid = kmer_codes(codes, k, mask)
+        positions = np.arange(len(kmers)) if valid is None else np.flatnonzero(valid)
+        threshold = min(t for kk, _, t in params if kk == k)
+        # Worth it once most k-mers are rare, i.e. when there are more possible k-mers than windows
+        if threshold > 1 and k <= DENSE_MAX_K and 4 ** k >= positions.size > 0:
+            present = kmers[positions]
+            if cache is not None:
+                totals = cache.count(Genome, k, digest=digest).lookup(present)
+            else:
+                totals = np.bincount(present.astype(np.intp), minlength=4 ** k)[present.astype(np.intp)]
+            positions = positions[totals >= threshold]
+        # Group the occurrences of each k-mer together, keeping them in position order within the group
+        order = np.argsort(kmers[positions], kind='stable')
+        sorted_codes = kmers[positions][order]
+        sorted_positions = positions[order]
+        for combination in params:
+            if combination[0] == k and combination not in results:
+                _, L, t = combination
+                results[combination] = _WindowClumps(sorted_codes, sorted_positions, k, min(L, n), t)
+    return results
+
+
+def _WindowClumps(sorted_codes, sorted_positions, k, L, t):
+    """
+    Finds the clumps for one (L, t) pair from k-mer occurrences grouped by code.
+
+    Args:
+        sorted_codes (numpy.ndarray): The k-mer codes, sorted.
+        sorted_positions (numpy.ndarray): The start position of each occurrence, ascending within each code.
+        k (int): The length of the k-mers.
+        L (int): The effective window length (never longer than the genome).
+        t (int): The minimum number of occurrences in a window.
+
+    Returns:
+        list: The Clump records, ordered by the window in which the threshold was first crossed.
+    """
+    hits = clump_runs(sorted_codes, sorted_positions, k, L, t)
+    if hits.size == 0:
+        return []
+    # The first hit of each k-mer is the run that completes earliest, i.e. the first crossing
+    clump_codes, first = np.unique(sorted_codes[hits], return_index=True)
+    ends = sorted_positions[hits[first] + t - 1] + k
+    starts = np.maximum(ends - L, 0)
+    order = np.lexsort((clump_codes, starts))
+    kmers = decode_kmers(clump_codes[order], k)
+    return [Clump(kmer, start, start + L) for kmer, start in zip(kmers, starts[order].tolist())]
+
+
+def clump_runs(sorted_codes, sorted_positions, k, L, t):
+    """
+    Finds the runs of t consecutive occurrences of one k-mer that fit in a window of L bases.
+
+    Args:
+        sorted_codes (numpy.ndarray): The k-mer codes, sorted.
+        sorted_positions (numpy.ndarray): The start position of each occurrence, ascending within each code.
+        k (int): The length of the k-mers.
+        L (int): The window length.
+        t (int): The number of occurrences in a run.
+
+    Returns:
+        numpy.ndarray: The index (into the sorted arrays) of the first occurrence of every such run.
+    """
+    m = len(sorted_codes) - t + 1
+    if m <= 0:
+        return np.empty(0, dtype=np.intp)
+    # Occurrence j starts a clump when occurrence j + t - 1 is the same k-mer and ends within L bases
+    same = sorted_codes[t - 1:] == sorted_codes[:m]
+    close = sorted_positions[t - 1:] + k - sorted_positions[:m] <= L
+    return np.flatnonzero(same & close)
@@ -0,0 +1,187 @@
+# ExactSearch.py
+import numpy as np
+
+import Instrumentation
+import KMP_PatternSearch
+
+# Texts shorter than this are always searched with str.find / bytes.find
+COLUMN_MIN_LENGTH = 1024
+
+# Patterns up to this length are matched column by column: on DNA their occurrences are dense enough that a
+# str.find loop, which pays Python overhead per occurrence, is slower (on a random 4 Mb genome, 9.8 ms against
+# 11.2 ms at 8 bases, but 13.8 ms against 12.3 ms at 12)
+COLUMN_MAX_LENGTH = 8
+
+# Longer patterns are matched column by column only when their period (length minus longest border) is at most
+# half their length and at most this, i.e. when they are truly repetitive
+MAX_COLUMNS = 32
+
+'''
+One exact-search engine behind PatternCount and PatternMatching.
+
+Every query reports all occurrences, overlapping ones included, and SearchStrategy picks how to find them:
+
+- 'columns': for an ASCII text of at least COLUMN_MIN_LENGTH characters and either a pattern of at most
+  COLUMN_MAX_LENGTH characters or a repetitive one of short period p, such as ATATAT...AT of any length. On
+  random text a repetitive pattern is rare and the find loop would be faster (1.8 ms against 8.8 ms for (AT)^20
+  on 4 Mb), but in a tandem repeat it occurs at almost every position (2 s against 26 ms in a 4 Mb AT repeat).
+  The text is viewed as a NumPy byte array and the boolean mask of the starts matching the first p characters
+  is built one column at a time.
+  Longer prefixes follow by shift-and: since pattern[j] == pattern[j - p], the mask of a prefix of length 2L
+  (L a multiple of p) is mask_L[i] & mask_L[i + L], so a pattern of length m costs p + log2(m / p) passes.
+  Counting takes count_nonzero of the mask and never materializes the positions.
+- 'find': for other str and bytes queries, a loop of str.find / bytes.find calls, restarting one character
+  after each occurrence. CPython's find is a Horspool-style skip search (two-way for long needles) in C, so
+  long non-repetitive patterns, whose occurrences are rare, are found at C speed.
+- 'kmp': for any other sequence (e.g. a list of characters), and for case-insensitive queries on non-ASCII
+  text, which are compared character by character, with kmp_scan from KMP_PatternSearch.py. Knuth-Morris-Pratt
+  never re-reads the text, whatever the pattern.
+'''
+
+
+def SearchStrategy(text, pattern, ignore_case=False):
+    """
+    Chooses how a query is searched; see the module notes.
+
+    Args:
+        text (str, bytes or sequence): The text.
+        pattern (str, bytes or sequence): The pattern, non-empty.
+        ignore_case (bool): Whether the query ignores case.
+
+    Returns:
+        str: 'columns', 'find' or 'kmp'.
+    """
+    return _Plan(text, pattern, ignore_case)[0]
+
+
+@Instrumentation.timed()
+def CountOccurrences(text, pattern, ignore_case=False):
+    """
+    Counts the (overlapping) occurrences of a pattern in a text, without building a list of positions.
+
+    Args:
+        text (str, bytes or sequence): The text.
+        pattern (str, bytes or sequence): The pattern, non-empty and of the same kind as the text.
+        ignore_case (bool): Whether to match regardless of case.
+
+    Returns:
+        int: The number of occurrences.
+
+    Raises:
+        ValueError: If the pattern is empty.
+    """
+    strategy, text, pattern, period = _Plan(text, pattern, ignore_case)
+    if Instrumentation._enabled:
+        Instrumentation.count('ExactSearch.CountOccurrences', **{f'strategy_{strategy}': 1})
+    if len(pattern) > len(text):
+        return 0
+    if strategy == 'columns':
+        return int(np.count_nonzero(_ColumnMask(text, pattern, period)))
+    if strategy == 'find':
+        count = 0
+        position = text.find(pattern)
+        while position >= 0:
+            count += 1
+            position = text.find(pattern, position + 1)
+        return count
+    return KMP_PatternSearch.kmp_scan(text, pattern)
+
+
+@Instrumentation.timed()
+def FindOccurrences(text, pattern, ignore_case=False):
+    """
+    Finds the (overlapping) occurrences of a pattern in a text.
+
+    Args:
+        text (str, bytes or sequence): The text.
+        pattern (str, bytes or sequence): The pattern, non-empty and of the same kind as the text.
+        ignore_case (bool): Whether to match regardless of case.
+
+    Returns:
+        list: The start positions of the occurrences, in increasing order.
+
+    Raises:
+        ValueError: If the pattern is empty.
+    """
+    strategy, text, pattern, period = _Plan(text, pattern, ignore_case)
+    if Instrumentation._enabled:
+        Instrumentation.count('ExactSearch.FindOccurrences', **{f'strategy_{strategy}': 1})
+    if len(pattern) > len(text):
+        return []
+    if strategy == 'columns':
+        return np.flatnonzero(_ColumnMask(text, pattern, period)).tolist()
+    positions = []
+    if strategy == 'find':
+        position = text.find(pattern)
+        while position >= 0:
+            positions.append(position)
+            position = text.find(pattern, position + 1)
+        return positions
+    KMP_PatternSearch.kmp_scan(text, pattern, positions)
+    return positions
+
+
+def _Plan(text, pattern, ignore_case):
+    """Normalizes a query and picks its strategy; returns (strategy, text, pattern, period)."""
+    if not len(pattern):
+        raise ValueError("Pattern cannot be empty")
+    strings = isinstance(text, str) and isinstance(pattern, str)
+    if not strings and isinstance(text, (bytes, bytearray)) and isinstance(pattern, (bytes, bytearray)):
+        text, pattern = bytes(text), bytes(pattern)
+        ascii_text = True
+    else:
+        ascii_text = strings and text.isascii() and pattern.isascii()
+    if ignore_case:
+        if strings and not ascii_text:
+            # Lower-casing a whole non-ASCII string can change its length, so compare character by character
+            return 'kmp', [c.lower() for c in text], [c.lower() for c in pattern], None
+        if strings or isinstance(text, bytes):
+            text, pattern = text.lower(), pattern.lower()
+        else:
+            text, pattern = [c.lower() for c in text], [c.lower() for c in pattern]
+    if not (strings or isinstance(text, bytes)):
+        return 'kmp', text, pattern, None
+    if ascii_text and len(text) >= COLUMN_MIN_LENGTH and len(pattern) <= len(text):
+        # The last entry of the prefix table is the longest border of the whole pattern
+        period = len(pattern) - KMP_PatternSearch.compute_prefix(pattern)[len(pattern)]
+        if len(pattern) <= COLUMN_MAX_LENGTH or period <= min(len(pattern) // 2, MAX_COLUMNS):
+            return 'columns', text, pattern, period
+    return 'find', text, pattern, None
+
+
+def _ColumnMask(text, pattern, period):
+    """Builds the boolean mask of the starts at which a pattern with the given period occurs in an ASCII text."""
+    data = np.frombuffer(text if isinstance(text, bytes) else text.encode('ascii'), dtype=np.uint8)
+    wanted = np.frombuffer(pattern if isinstance(pattern, bytes) else pattern.encode('ascii'), dtype=np.uint8)
+    m = len(wanted)
+    # masks[L][i]: the pattern's first L characters occur at i, for every i <= len(text) - L
+    masks = {period: _Columns(data, wanted, period)}
+    length = period
+    while 2 * length <= m:
+        masks[2 * length] = _Shifted(masks[length], masks[length], length)
+        length *= 2
+    # Assemble m = c * period + r from the powers of two, largest first, then the first r characters again
+    result, covered = None, 0
+    for size in sorted(masks, reverse=True):
+        if covered + size <= m:
+            result = masks[size] if result is None else _Shifted(result, masks[size], covered)
+            covered += size
+    if covered < m:
+        result = _Shifted(result, _Columns(data, wanted, m - covered), covered)
+    return result
+
+
+def _Columns(data, wanted, length):
+    """Builds the mask of the starts matching the first `length` characters, one vectorized column at a time."""
+    size = len(data) - length + 1
+    mask = data[:size] == wanted[0]
+    for column in range(1, length):
+        mask &= data[column:column + size] == wanted[column]
+    return mask
+
+
+def _Shifted(first, second, shift):
+    """Combines two masks: first[i] & second[i + shift], over the starts both cover."""
+    size = min(len(first), len(second) - shift)
+    return first[:size] & second[shift:shift + size]
+
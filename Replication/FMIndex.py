@@ -0,0 +1,280 @@
+# FMIndex.py
+import json
+import math
+import os
+
+import numpy as np
+
+from PackedSequence import PackedSequence, encode
+
+# Distance between stored occurrence checkpoints; counts in between are finished with a short scan of the BWT
+DEFAULT_CHECKPOINT_STEP = 128
+
+# Number of leading symbols used to rank the suffixes before prefix doubling starts (6^24 fits in 64 bits)
+_INITIAL_DEPTH = 24
+
+# Longest symbol array whose pairs of ranks fit in one int64 sort key, rank * (n + 1) + following < 2^63;
+# longer ones (n of about 3e9 and up) sort the pairs with lexsort instead
+_PAIR_KEY_LIMIT = math.isqrt(2 ** 63)
+
+# _SLOT_COUNTS[slots][code][byte]: how many of the first `slots` bases packed in a byte have the code. A scan of
+# the BWT counts whole bytes with slots = 4 and the last, partial byte with fewer; plain lists, because a scan
+# covers a few dozen bytes, which Python indexes faster than a NumPy gather and sum
+_SLOT_COUNTS = [[[sum((byte >> (6 - 2 * slot)) & 3 == code for slot in range(slots)) for byte in range(256)]
+                 for code in range(4)] for slots in range(5)]
+
+# Arrays making up a saved index, one .npy file each
+_FILES = ('suffix_array', 'bwt', 'bwt_runs', 'occ')
+
+
+class FMIndex:
+    """
+    A suffix array and FM-index (Burrows-Wheeler transform with occurrence checkpoints) over a genome.
+
+    The index is built once and can be saved to a directory of .npy files and loaded back through memory maps,
+    so thousands of queries can share one copy of it. A count query is a backward search over the pattern,
+    O(|P|); a locate query adds one suffix array slice, O(|P| + occ).
+
+    The genome is indexed in upper case and N is kept as its own symbol, so patterns never match across an N.
+    Patterns containing anything other than A, C, G and T never match. PatternCount and PatternMatching in
+    replication.py accept an FMIndex in place of the genome.
+
+    The BWT is held as a PackedSequence, 2 bits per base like the genome it indexes. Its masked runs mark the
+    sentinel row and the rows of N, which are stored as A in the packed bases; the checkpoints count only real
+    bases, and a scan from a checkpoint discounts the masked rows it passes.
+    """
+
+    def __init__(self, suffix_array, bwt, occ, length, checkpoint_step):
+        """
+        Wraps the index arrays; use FMIndex.build or FMIndex.load to create an index.
+
+        Args:
+            suffix_array (numpy.ndarray): The suffix array of the genome followed by a sentinel.
+            bwt (PackedSequence): The Burrows-Wheeler transform, with the sentinel and every N masked.
+            occ (numpy.ndarray): Counts of A, C, G and T in each checkpoint-sized prefix of the BWT.
+            length (int): The length of the genome.
+            checkpoint_step (int): The number of BWT positions between checkpoints.
+        """
+        self.suffix_array = suffix_array
+        self.bwt = bwt
+        self.occ = occ
+        self.length = length
+        self.checkpoint_step = checkpoint_step
+        # The packed bytes, read without copying even when they are memory-mapped
+        self._bytes = memoryview(np.ascontiguousarray(bwt.packed))
+        # Masked rows before the end of each masked run, and whether each checkpoint block holds any, to
+        # discount them from the scans that count A
+        runs = bwt.n_runs
+        self._masked_before = np.cumsum(runs[:, 1] - runs[:, 0])
+        blocks = np.zeros(len(occ) + 1, dtype=np.int64)
+        np.add.at(blocks, runs[:, 0] // checkpoint_step, 1)
+        np.add.at(blocks, (runs[:, 1] - 1) // checkpoint_step + 1, -1)
+        self._masked_blocks = (np.cumsum(blocks) > 0).tolist()
+        # first[c] is the row of the first suffix starting with symbol c (the C array of the FM-index); the
+        # sentinel sorts first, so the suffixes starting with A begin at row 1
+        totals = [self._occurrences(symbol, len(bwt)) for symbol in range(1, 5)]
+        self._first = [0] + np.cumsum([1] + totals).tolist()
+
+    @classmethod
+    def build(cls, sequence, checkpoint_step=DEFAULT_CHECKPOINT_STEP):
+        """
+        Builds the index of a genome.
+
+        Args:
+            sequence (str or PackedSequence): The genome; a string may contain A, C, G, T and N in either case.
+            checkpoint_step (int): The number of BWT positions between occurrence checkpoints, a multiple of 4
+                (one packed byte).
+
+        Returns:
+            FMIndex: The index.
+
+        Raises:
+            ValueError: If the genome contains any other character, or checkpoint_step is not a positive
+                multiple of 4.
+        """
+        if checkpoint_step <= 0 or checkpoint_step % 4:
+            raise ValueError("checkpoint_step must be a positive multiple of 4")
+        if isinstance(sequence, PackedSequence):
+            symbols = sequence.codes() + 1
+            for start, end in sequence.n_runs:
+                symbols[start:end] = 5
+        else:
+            symbols = encode(sequence, ignore_whitespace=False) + 1
+        length = len(symbols)
+        # Append the sentinel, which sorts before every base
+        symbols = np.concatenate((symbols, [0])).astype(np.uint8)
+
+        suffix_array = _SuffixArray(symbols)
+        bwt = symbols[suffix_array - 1]
+        occ = np.stack([np.concatenate(([0], np.cumsum(bwt == symbol)))[::checkpoint_step]
+                        for symbol in range(1, 5)], axis=1)
+        index_type = np.int32 if len(symbols) < 2 ** 31 else np.int64
+        # Pack the BWT like the genome: the sentinel (0) and N (5) become masked runs
+        masked = (bwt == 0) | (bwt == 5)
+        edges = np.diff(np.concatenate(([0], masked.astype(np.int8), [0])))
+        runs = np.stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)), axis=1)
+        packed_bwt = PackedSequence.from_codes(np.where(masked, 0, bwt - 1), runs)
+        return cls(suffix_array.astype(index_type), packed_bwt, occ.astype(index_type), length, checkpoint_step)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Loads an index saved with save().
+
+        Args:
+            directory (str): The directory holding the index.
+            mmap (bool): Whether to memory-map the arrays instead of reading them into memory.
+
+        Returns:
+            FMIndex: The index.
+        """
+        with open(os.path.join(directory, 'index.json')) as handle:
+            meta = json.load(handle)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode) for name in _FILES}
+        bwt = PackedSequence.from_packed(arrays['bwt'], meta['length'] + 1, np.asarray(arrays['bwt_runs']))
+        return cls(arrays['suffix_array'], bwt, arrays['occ'], meta['length'], meta['checkpoint_step'])
+
+    def save(self, directory):
+        """
+        Saves the index as .npy files (which load() can memory-map) plus a small JSON description.
+
+        Args:
+            directory (str): The directory to write; it is created if needed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self._Arrays().items():
+            np.save(os.path.join(directory, f'{name}.npy'), np.asarray(array))
+        with open(os.path.join(directory, 'index.json'), 'w') as handle:
+            json.dump({'length': self.length, 'checkpoint_step': self.checkpoint_step}, handle)
+
+    def __reduce__(self):
+        # Pickled as its arrays; the memoryview over the packed BWT is made again on the other side
+        return type(self), (self.suffix_array, self.bwt, self.occ, self.length, self.checkpoint_step)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def nbytes(self):
+        """int: The number of bytes held by the index arrays."""
+        return sum(np.asarray(array).nbytes for array in self._Arrays().values())
+
+    def count(self, pattern):
+        """
+        Counts the (overlapping, case-insensitive) occurrences of a pattern.
+
+        Args:
+            pattern (str): The pattern to count.
+
+        Returns:
+            int: The number of occurrences.
+        """
+        low, high = self._range(pattern)
+        return high - low
+
+    def locate(self, pattern):
+        """
+        Finds the start positions of every (overlapping, case-insensitive) occurrence of a pattern.
+
+        Args:
+            pattern (str): The pattern to find.
+
+        Returns:
+            numpy.ndarray: The sorted start positions.
+        """
+        low, high = self._range(pattern)
+        return np.sort(np.asarray(self.suffix_array[low:high], dtype=np.int64))
+
+    def _range(self, pattern):
+        """Runs the backward search and returns the suffix array rows [low, high) starting with the pattern."""
+        low, high = 0, self.length + 1
+        if not pattern:
+            return low, low
+        for base in reversed(pattern.upper()):
+            symbol = 'ACGT'.find(base) + 1
+            if symbol == 0:
+                return 0, 0
+            low = self._first[symbol] + self._occurrences(symbol, low)
+            high = self._first[symbol] + self._occurrences(symbol, high)
+            if low >= high:
+                return 0, 0
+        return low, high
+
+    def _occurrences(self, symbol, row):
+        """Counts the occurrences of a base symbol in the BWT before a row."""
+        checkpoint = row // self.checkpoint_step
+        start = checkpoint * self.checkpoint_step
+        # Checkpoints fall on byte boundaries, so the scan reads whole packed bytes and then part of one
+        last = row // 4
+        scanned = sum(map(_SLOT_COUNTS[4][symbol - 1].__getitem__, self._bytes[start // 4:last]))
+        if row % 4:
+            scanned += _SLOT_COUNTS[row % 4][symbol - 1][self._bytes[last]]
+        if symbol == 1 and self._masked_blocks[checkpoint]:
+            # Masked rows are stored as A
+            scanned -= self._Masked(row) - self._Masked(start)
+        return int(self.occ[checkpoint, symbol - 1]) + scanned
+
+    def _Masked(self, row):
+        """Counts the masked rows (the sentinel and N) of the BWT before a row."""
+        runs = self.bwt.n_runs
+        # The runs ending at or before the row are wholly before it; the next one may be cut by it
+        whole = int(np.searchsorted(runs[:, 1], row, side='right'))
+        masked = int(self._masked_before[whole - 1]) if whole else 0
+        if whole < len(runs) and runs[whole, 0] < row:
+            masked += row - int(runs[whole, 0])
+        return masked
+
+    def _Arrays(self):
+        """Returns the arrays of the index by file name."""
+        return {'suffix_array': self.suffix_array, 'bwt': self.bwt.packed, 'bwt_runs': self.bwt.n_runs,
+                'occ': self.occ}
+
+
+def _SuffixArray(symbols):
+    """
+    Sorts the suffixes of a symbol array that ends with a unique, smallest sentinel.
+
+    The suffixes are first ranked by their leading _INITIAL_DEPTH symbols, packed into one integer, and the
+    ranks are then refined by prefix doubling (rank of the suffix, rank of the suffix h positions later) until
+    every rank is unique. Each round is one vectorized sort, and the number of rounds only depends on the
+    length of the longest repeat.
+
+    Args:
+        symbols (numpy.ndarray): The symbols (0-5), with the sentinel 0 at the end.
+
+    Returns:
+        numpy.ndarray: The suffix array.
+    """
+    n = len(symbols)
+    # Rank every suffix by its first symbols, padding past the end with the sentinel value
+    padded = np.concatenate((symbols.astype(np.int64), np.zeros(_INITIAL_DEPTH, dtype=np.int64)))
+    keys = np.zeros(n, dtype=np.int64)
+    for offset in range(_INITIAL_DEPTH):
+        keys = keys * 6 + padded[offset:offset + n]
+    _, rank = np.unique(keys, return_inverse=True)
+    rank = rank.astype(np.int64)
+
+    depth = _INITIAL_DEPTH
+    while rank.max() < n - 1:
+        # Sort by the pair (rank of the suffix, rank of the suffix `depth` positions later)
+        following = np.zeros(n, dtype=np.int64)
+        if depth < n:
+            following[:n - depth] = rank[depth:] + 1
+        if n < _PAIR_KEY_LIMIT:
+            keys = rank * (n + 1) + following
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            changes = sorted_keys[1:] != sorted_keys[:-1]
+        else:
+            order = np.lexsort((following, rank))
+            sorted_rank, sorted_following = rank[order], following[order]
+            changes = (sorted_rank[1:] != sorted_rank[:-1]) | (sorted_following[1:] != sorted_following[:-1])
+        # Suffixes with equal pairs keep an equal rank; every new pair starts a new rank
+        new_rank = np.empty(n, dtype=np.int64)
+        new_rank[order] = np.concatenate(([0], np.cumsum(changes)))
+        rank = new_rank
+        depth *= 2
+    suffix_array = np.empty(n, dtype=np.int64)
+    suffix_array[rank] = np.arange(n)
+    return suffix_array
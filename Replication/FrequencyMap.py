@@ -1,3 +1,7 @@
+from KmerCounter import CountKmers
+from PackedSequence import MAX_CODE_K
+
+
 def FrequencyMap(Text, k):
     """
     Generates a frequency map of k-mers in the given text using a sliding window approach.
@@ -7,7 +11,9 @@ def FrequencyMap(Text, k):
         k (int): The length of k-mers.
 
     Returns:
-        dict: A dictionary where keys are k-mers and values are their frequencies.
+        dict or KmerCounts: A dictionary (or dict-compatible KmerCounts view) where keys are k-mers and values
+            are their frequencies. A KmerCounts lists its k-mers in lexicographic order rather than in the
+            order they first occur.
         
     Raises:
         ValueError: If Text is empty or k is non-positive.
@@ -20,6 +26,14 @@ def FrequencyMap(Text, k):
      # Remove whitespace from the text
     Text = ''.join(Text.split())
 
+    # Nucleotide text is counted by rolling integer k-mer codes instead of one slice per window
+    if k <= MAX_CODE_K:
+        try:
+            return CountKmers(Text, k)
+        except ValueError:
+            # Text with characters other than ACGTN is counted by the string windows below
+            pass
+
     # Initialize a dictionary to store the frequencies of k-mers
     freq = {}
     n = len(Text)
@@ -42,7 +56,8 @@ def MaxMap(freqMap):
     - freqMap (dict): A map (dictionary) with keys as strings and values as integers.
 
     Returns:
-    - tuple: A tuple containing the maximum value, kmers with that value, and their length.
+    - tuple: A tuple containing the maximum value, kmers with that value, and their length. The kmers of a
+      KmerCounts are in lexicographic order; those of a dictionary, in its insertion order.
     """
     max_value = max(
         freqMap.values())  # Find the maximum value in the dictionary
@@ -0,0 +1,223 @@
+# GenomeReader.py
+import mmap
+
+from ClumpEngine import FindClumps
+from KmerCounter import CountAccumulator, CountKmers, DENSE_MAX_K
+from PackedSequence import MAX_CODE_K
+
+# Number of bases handed to the counting functions at a time
+DEFAULT_CHUNK_SIZE = 1 << 22
+
+# Whitespace bytes skipped while reading
+_WHITESPACE = b' \t\r\n\v\f'
+
+
+class GenomeReader:
+    """
+    Reads a genome from a plain-text or FASTA file through a read-only memory map.
+
+    Whitespace and FASTA header lines are skipped on the fly, and the bases are handed out as fixed-size chunks
+    that overlap by a caller-chosen number of bases. Only one chunk is held in memory at a time, so memory use
+    does not grow with the size of the genome. Each FASTA record is treated as a separate sequence: chunks never
+    span two records. A plain-text file is a single record.
+
+    Use it as a context manager, or call close() when done.
+    """
+
+    def __init__(self, path):
+        """
+        Opens and memory-maps a genome file.
+
+        Args:
+            path (str): The path to a plain-text or FASTA file.
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped; it simply has no bases
+            self._data = b''
+        # Headers are numbered from 0; a plain-text file counts as record 0 without a header
+        self._fasta = self._data[:1024].lstrip()[:1] == b'>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Releases the memory map and the file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE, overlap=0):
+        """
+        Yields the bases of the genome as overlapping chunks.
+
+        Every chunk after the first one of a record starts with the last `overlap` bases of the previous chunk,
+        so with an overlap of k-1 every k-mer of a record lies in exactly one chunk.
+
+        Args:
+            chunk_size (int): The maximum number of bases in a chunk.
+            overlap (int): The number of bases shared by consecutive chunks of a record.
+
+        Yields:
+            tuple: (record, offset, bases) where record is the index of the record, offset is the position of the
+                   chunk's first base within the record, and bases is the chunk as a string (case unchanged).
+
+        Raises:
+            ValueError: If chunk_size is not larger than overlap, or overlap is negative.
+        """
+        if overlap < 0 or chunk_size <= overlap:
+            raise ValueError("chunk_size must be larger than a non-negative overlap")
+        current = None
+        buffer = bytearray()
+        offset = 0
+        pending = 0  # Bases in the buffer that have not been handed out yet
+        for record, piece in self._pieces(chunk_size):
+            if record != current:
+                if pending:
+                    yield current, offset, buffer.decode('latin-1')
+                current, buffer, offset, pending = record, bytearray(), 0, 0
+            buffer += piece
+            pending += len(piece)
+            while len(buffer) >= chunk_size:
+                yield record, offset, buffer[:chunk_size].decode('latin-1')
+                # Keep the overlap at the front of the buffer for the next chunk
+                step = chunk_size - overlap
+                del buffer[:step]
+                offset += step
+                pending = len(buffer) - overlap
+        if pending:
+            yield current, offset, buffer.decode('latin-1')
+
+    def _pieces(self, block_size):
+        """Yields (record, bases) pieces of the file with whitespace and header lines removed."""
+        data = self._data
+        size = len(data)
+        record = -1 if self._fasta else 0
+        position = 0
+        while position < size:
+            end = min(position + block_size, size)
+            header = data.find(b'>', position, end)
+            if header >= 0:
+                end = header
+            piece = data[position:end].translate(None, _WHITESPACE)
+            if piece:
+                yield record, piece
+            position = end
+            if header >= 0:
+                # Skip the header line and start a new record
+                line_end = data.find(b'\n', header)
+                position = size if line_end < 0 else line_end + 1
+                record += 1
+
+
+def _open(source):
+    """Returns a GenomeReader for a path, or the reader itself, and whether the caller must close it."""
+    if isinstance(source, GenomeReader):
+        return source, False
+    return GenomeReader(source), True
+
+
+def StreamFrequencyMap(source, k, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Counts the k-mers of a genome file chunk by chunk.
+
+    Args:
+        source (str or GenomeReader): The genome file, or an open reader.
+        k (int): The length of k-mers.
+        chunk_size (int): The number of bases counted at a time.
+
+    Returns:
+        KmerCounts: The same counts FrequencyMap gives on the whitespace- and header-free sequence (summed over
+                    the records of a FASTA file).
+
+    Raises:
+        ValueError: If k is out of range or the file contains characters other than A, C, G, T and N.
+    """
+    if k <= 0 or k > MAX_CODE_K:
+        raise ValueError(f"k must be between 1 and {MAX_CODE_K}")
+    reader, owned = _open(source)
+    # Use one table layout for every chunk so that dense tables can simply be added; sparse ones are merged in
+    # growing groups, so the running total is not re-sorted for every chunk
+    dense = k <= DENSE_MAX_K and 4 ** k <= 16 * chunk_size
+    total = CountAccumulator(k, dense)
+    try:
+        for _, _, bases in reader.chunks(chunk_size, k - 1):
+            total.add(CountKmers(bases, k, dense=dense))
+    finally:
+        if owned:
+            reader.close()
+    return total.result()
+
+
+def StreamPatternCount(source, Pattern, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Counts the (overlapping, case-insensitive) occurrences of a pattern in a genome file chunk by chunk.
+
+    Args:
+        source (str or GenomeReader): The genome file, or an open reader.
+        Pattern (str): The pattern to count.
+        chunk_size (int): The number of bases searched at a time.
+
+    Returns:
+        int: The same count PatternCount gives on the whitespace- and header-free sequence (summed over the
+             records of a FASTA file).
+
+    Raises:
+        ValueError: If Pattern is empty.
+    """
+    if not Pattern:
+        raise ValueError("Pattern must not be empty")
+    pattern = Pattern.upper()
+    reader, owned = _open(source)
+    count = 0
+    try:
+        for _, _, bases in reader.chunks(max(chunk_size, len(pattern)), len(pattern) - 1):
+            bases = bases.upper()
+            # Let str.find skip ahead to each occurrence, stepping one base past it to allow overlaps
+            position = bases.find(pattern)
+            while position >= 0:
+                count += 1
+                position = bases.find(pattern, position + 1)
+    finally:
+        if owned:
+            reader.close()
+    return count
+
+
+def StreamClumpFinder(source, k, L, t, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Finds the k-mers forming (L, t)-clumps in a genome file chunk by chunk.
+
+    Consecutive chunks overlap by L-1 bases, so every window of length L lies entirely within some chunk.
+
+    Args:
+        source (str or GenomeReader): The genome file, or an open reader.
+        k (int): The length of the k-mers to search for.
+        L (int): The length of the sliding window.
+        t (int): The minimum number of occurrences required for a k-mer to form a clump.
+        chunk_size (int): The number of bases searched at a time; raised to 2L if smaller.
+
+    Returns:
+        set: The same k-mers ClumpFinder gives on the upper-cased, whitespace- and header-free sequence (the
+             union over the records of a FASTA file).
+
+    Raises:
+        ValueError: If k, L, or t are non-positive.
+    """
+    if k <= 0 or L <= 0 or t <= 0:
+        raise ValueError("k, L, and t must be positive integers")
+    reader, owned = _open(source)
+    clumps = set()
+    try:
+        for _, _, bases in reader.chunks(max(chunk_size, 2 * L), L - 1):
+            clumps.update(clump.kmer for clump in FindClumps(bases, [(k, L, t)])[(k, L, t)])
+    finally:
+        if owned:
+            reader.close()
+    return clumps
@@ -0,0 +1,248 @@
+# GenomeSession.py
+import sys
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from FMIndex import FMIndex
+from GenomeReader import GenomeReader
+from KmerCache import CachedCountKmers, SequenceDigest
+from PackedSequence import PackedSequence
+
+# Default byte budget of the derived structures a Genome keeps
+DEFAULT_CACHE_BYTES = 256 * 2 ** 20
+
+# Cache statistics of a Genome: lookups answered from the cache (hits) or computed (misses), entries evicted to
+# stay within the budget, and the entries and bytes currently held
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'entries', 'bytes', 'max_bytes'])
+
+
+class Genome:
+    """
+    A genome together with the structures derived from it, computed on first use and kept for later calls.
+
+    The sequence is normalized once (whitespace removed, upper case). The packed encoding, the k-mer count
+    tables and the FM-index, along with the reverse complement and skew array that ReverseComplement and
+    Skew store through cached(), are each built the first time they are asked for and then served from a
+    least-recently-used cache with a byte budget. When a new entry would go over the budget, the entries used
+    longest ago are evicted; an entry larger than the whole budget is returned without being kept.
+
+    The functions in replication.py accept a Genome wherever they accept a string and reuse its cache, so a
+    pipeline calling FrequencyMap, ClumpFinder, PatternMatching and ReverseComplement on the same genome
+    encodes it once. Each answer is the one the sequence would give as a string, whitespace removed. Where the
+    packed encoding or the index would differ (k-mers and patterns containing an N, or a case-sensitive search
+    on a genome that had lower case), the query goes to the text instead, which is kept in its original case
+    as well when that had lower case.
+    """
+
+    def __init__(self, sequence, max_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Wraps a sequence.
+
+        Args:
+            sequence (str, bytes or PackedSequence): The genome; whitespace is ignored and case is normalized.
+            max_bytes (int): The byte budget of the cached structures.
+
+        Raises:
+            ValueError: If max_bytes is negative.
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be a non-negative integer")
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()  # key -> (value, size), least recently used first
+        self._bytes = 0
+        self._hits = self._misses = self._evictions = 0
+        if isinstance(sequence, PackedSequence):
+            # The text is only decoded, into the cache, by the queries that need it, so a genome wrapped around
+            # packed bases (such as a shared-memory copy) does not hold a second copy at one byte per base
+            self._source = sequence
+            self._text = self._original = None
+            self._nucleotide = True
+            self._Store(('packed',), sequence)
+        else:
+            if isinstance(sequence, (bytes, bytearray)):
+                sequence = sequence.decode('latin-1')
+            sequence = ''.join(sequence.split())
+            self._source = None
+            self._text = sequence.upper()
+            # Case-sensitive searches need the original case, so a copy is only kept if upper-casing changed it
+            self._original = sequence if self._text != sequence else None
+            # Whether the text holds only A, C, G, T and N; unknown until it is first encoded
+            self._nucleotide = None
+        self._length = len(sequence)
+
+    @classmethod
+    def from_file(cls, path, max_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Reads a genome from a plain-text or FASTA file; the records of a FASTA file are joined in file order.
+
+        Args:
+            path (str): The path to the file.
+            max_bytes (int): The byte budget of the cached structures.
+
+        Returns:
+            Genome: The genome.
+        """
+        with GenomeReader(path) as reader:
+            return cls(''.join(bases for _, _, bases in reader.chunks()), max_bytes)
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        preview = str(self._source[:20]) if self._text is None else self._text[:20]
+        preview += '...' if self._length > 20 else ''
+        return f"Genome('{preview}', length={self._length})"
+
+    @property
+    def nucleotide(self):
+        """bool: Whether the genome holds only A, C, G, T and N, so that it can be packed."""
+        if self._nucleotide is None:
+            try:
+                self.packed()
+            except ValueError:
+                self._nucleotide = False
+        return self._nucleotide
+
+    @property
+    def text(self):
+        """str: The normalized text; decoded on first use, and cached, for a genome wrapped around a PackedSequence."""
+        if self._text is None:
+            return self.cached(('text',), lambda: str(self._source))
+        return self._text
+
+    @property
+    def original(self):
+        """str: The sequence with whitespace removed, in its original case; the text itself if it was upper-case."""
+        return self.text if self._original is None else self._original
+
+    @property
+    def lower_case(self):
+        """bool: Whether the sequence had lower case, which case-sensitive searches must see in original."""
+        return self._original is not None
+
+    @property
+    def masked(self):
+        """bool: Whether the genome contains an N, which its packed encoding masks out of k-mers and matches."""
+        return self.nucleotide and len(self.packed().n_runs) > 0
+
+    @property
+    def sequence(self):
+        """PackedSequence or str: The packed encoding, or the normalized text if the genome cannot be packed."""
+        return self.packed() if self.nucleotide else self.text
+
+    def packed(self):
+        """
+        Returns the 2-bit packed encoding of the genome.
+
+        Raises:
+            ValueError: If the genome contains characters other than A, C, G, T and N.
+        """
+        if self._nucleotide is False:
+            raise ValueError("Invalid nucleotide in the input sequence")
+        # A genome wrapped around a PackedSequence keeps it, so that it never has to be packed again
+        packed = self.cached(('packed',), lambda: PackedSequence(self.text) if self._source is None else self._source)
+        self._nucleotide = True
+        return packed
+
+    def frequency_map(self, k, canonical=False):
+        """
+        Returns the k-mer counts of the genome.
+
+        Args:
+            k (int): The length of the k-mers, at most MAX_CODE_K.
+            canonical (bool): Whether to count each k-mer together with its reverse complement.
+
+        Returns:
+            KmerCounts: The counts, the same as those of the text; k-mers containing an N are counted too.
+
+        Raises:
+            ValueError: If k is out of range or the genome cannot be packed.
+        """
+        # The packed encoding drops the k-mers overlapping an N, which a string keeps, so such genomes count their text
+        source = self.text if self.masked else self.packed()
+        return self.cached(('frequency_map', k, canonical),
+                           lambda: CachedCountKmers(source, k, canonical=canonical, digest=self.digest()))
+
+    def digest(self):
+        """
+        Returns the content digest of the genome, which keys its tables in the on-disk k-mer cache.
+
+        Raises:
+            ValueError: If the genome cannot be packed.
+        """
+        return self.cached(('digest',), lambda: SequenceDigest(self.packed()))
+
+    def index(self):
+        """
+        Returns the FM-index of the genome, building it on first use.
+
+        Raises:
+            ValueError: If the genome cannot be packed.
+        """
+        return self.cached(('index',), lambda: FMIndex.build(self.packed()))
+
+    def peek(self, key):
+        """
+        Returns a cached entry without computing it, counting a hit, or None if it is not cached.
+
+        Args:
+            key (tuple): The cache key, e.g. ('index',) or ('frequency_map', k, canonical).
+        """
+        if key not in self._cache:
+            return None
+        self._hits += 1
+        self._cache.move_to_end(key)
+        return self._cache[key][0]
+
+    def cached(self, key, build):
+        """
+        Looks up a derived structure, building and caching it on a miss.
+
+        Args:
+            key (tuple): The cache key.
+            build (callable): Computes the structure from the genome.
+
+        Returns:
+            object: The structure. NumPy arrays are made read-only so that callers cannot alter the cache.
+        """
+        if key in self._cache:
+            self._hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key][0]
+        self._misses += 1
+        value = build()
+        self._Store(key, value)
+        return value
+
+    def stats(self):
+        """Returns the CacheStats of the genome."""
+        return CacheStats(self._hits, self._misses, self._evictions, len(self._cache), self._bytes, self.max_bytes)
+
+    def clear(self):
+        """Drops every cached structure; the statistics are kept."""
+        self._cache.clear()
+        self._bytes = 0
+
+    def _Store(self, key, value):
+        """Caches a value, evicting the least recently used entries to stay within the budget."""
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        size = _SizeOf(value)
+        if size > self.max_bytes:
+            return
+        while self._bytes + size > self.max_bytes:
+            _, (_, evicted) = self._cache.popitem(last=False)
+            self._bytes -= evicted
+            self._evictions += 1
+        self._cache[key] = (value, size)
+        self._bytes += size
+
+
+def _SizeOf(value):
+    """Estimates the bytes held by a cached structure."""
+    nbytes = getattr(value, 'nbytes', None)
+    return nbytes if isinstance(nbytes, int) else sys.getsizeof(value)
@@ -0,0 +1,183 @@
+# HeavyHitters.py
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from GenomeReader import DEFAULT_CHUNK_SIZE, GenomeReader
+from KmerCounter import CountKmers
+from PackedSequence import decode_kmers, MAX_CODE_K
+
+# Default sketch size: 4 rows of 2^20 counters (32 MiB), i.e. an overestimate of at most e / 2^20 of all k-mers,
+# except with probability e^-4 (under 2%)
+DEFAULT_WIDTH = 1 << 20
+DEFAULT_DEPTH = 4
+
+# Smallest number of candidate k-mers tracked next to the sketch, however few are asked for
+MIN_CANDIDATES = 1024
+
+# The most frequent k-mers found by TopKmers, with their counts and the error bound of the estimates: an
+# estimated count exceeds the true count by at most error_bound with probability at least confidence. When
+# exact is True the counts were verified by a second pass and carry no error.
+HeavyHitters = namedtuple('HeavyHitters', ['kmers', 'counts', 'exact', 'error_bound', 'confidence'])
+
+
+class CountMinSketch:
+    """
+    A Count-Min sketch of k-mer codes: a fixed depth x width table of counters, one hash function per row.
+
+    Adding a code increments one counter per row, and the estimate of a code is the smallest of its counters.
+    Estimates never undercount; with width w and depth d they overcount by at most e/w times the total added,
+    except with probability e^-d. Memory is fixed by the configuration, however many distinct codes are added.
+    """
+
+    def __init__(self, width=DEFAULT_WIDTH, depth=DEFAULT_DEPTH, seed=0):
+        """
+        Creates an empty sketch.
+
+        Args:
+            width (int): The number of counters per row, rounded up to a power of two.
+            depth (int): The number of rows (hash functions).
+            seed (int): The seed of the hash functions.
+
+        Raises:
+            ValueError: If width or depth is not positive.
+        """
+        if width <= 0 or depth <= 0:
+            raise ValueError("width and depth must be positive integers")
+        bits = max((width - 1).bit_length(), 1)
+        self.width = 1 << bits
+        self.depth = depth
+        self.total = 0
+        self.table = np.zeros((depth, self.width), dtype=np.int64)
+        # Multiply-shift hashing: the top bits of (a * code + b) mod 2^64, with a random odd multiplier per row
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(0, 1 << 63, depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._offsets = rng.integers(0, 1 << 63, depth, dtype=np.uint64)
+        self._shift = np.uint64(64 - bits)
+
+    @property
+    def nbytes(self):
+        """int: The memory held by the counters."""
+        return self.table.nbytes
+
+    @property
+    def error_bound(self):
+        """float: The largest overestimate of any count, e/width times the total, at the given confidence."""
+        return math.e / self.width * self.total
+
+    @property
+    def confidence(self):
+        """float: The probability that an estimate is within error_bound of the true count."""
+        return 1 - math.exp(-self.depth)
+
+    def add(self, codes, counts=None):
+        """
+        Adds k-mer codes to the sketch.
+
+        Args:
+            codes (numpy.ndarray): The uint64 codes.
+            counts (numpy.ndarray, optional): How many times each code occurred; once each by default.
+        """
+        codes = np.asarray(codes, dtype=np.uint64)
+        if counts is None:
+            counts = np.ones(len(codes), dtype=np.int64)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(self._Buckets(codes, row), weights=counts,
+                                           minlength=self.width).astype(np.int64)
+        self.total += int(np.sum(counts))
+
+    def estimate(self, codes):
+        """
+        Estimates how many times each code was added.
+
+        Args:
+            codes (numpy.ndarray): The uint64 codes.
+
+        Returns:
+            numpy.ndarray: The estimates, never below the true counts.
+        """
+        codes = np.asarray(codes, dtype=np.uint64)
+        estimates = self.table[0][self._Buckets(codes, 0)]
+        for row in range(1, self.depth):
+            estimates = np.minimum(estimates, self.table[row][self._Buckets(codes, row)])
+        return estimates
+
+    def _Buckets(self, codes, row):
+        """Hashes codes to the counters of one row."""
+        return ((codes * self._multipliers[row] + self._offsets[row]) >> self._shift).astype(np.intp)
+
+
+def TopKmers(source, k, n=1, width=DEFAULT_WIDTH, depth=DEFAULT_DEPTH, candidates=None, verify=False,
+             canonical=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Finds the n most frequent k-mers in bounded memory, with a Count-Min sketch and a set of candidates.
+
+    The input is read in chunks. The k-mers of each chunk are added to the sketch, and the candidates (the
+    k-mers with the highest estimates so far) are re-ranked together with the chunk's k-mers by their current
+    estimates. A k-mer dropped from the candidates keeps its counts in the sketch, so it comes back with its
+    full estimate as soon as it ranks high again. Memory is the sketch, the candidates and one chunk, whatever
+    the number of distinct k-mers.
+
+    With verify, the input is read a second time and only the candidates are counted exactly.
+
+    Args:
+        source (str, PackedSequence or GenomeReader): The sequence; a string may contain A, C, G, T and N.
+        k (int): The length of the k-mers, at most MAX_CODE_K.
+        n (int): The number of k-mers to report.
+        width (int): The number of counters per sketch row.
+        depth (int): The number of sketch rows.
+        candidates (int, optional): The number of candidates tracked; defaults to max(4n, MIN_CANDIDATES).
+        verify (bool): Whether to replace the estimates of the candidates with exact counts.
+        canonical (bool): Whether to count k-mers together with their reverse complements.
+        chunk_size (int): The number of bases read at a time.
+
+    Returns:
+        HeavyHitters: The k-mers, most frequent first (ties in lexicographic order), with their counts and the
+                      error bound. Windows containing an N are not counted.
+
+    Raises:
+        ValueError: If k is out of range, n is not positive, or the sequence contains characters other than
+            A, C, G, T and N.
+    """
+    if k <= 0 or k > MAX_CODE_K:
+        raise ValueError(f"k must be between 1 and {MAX_CODE_K}")
+    if n <= 0:
+        raise ValueError("n must be a positive integer")
+    capacity = max(candidates or max(4 * n, MIN_CANDIDATES), n)
+    sketch = CountMinSketch(width, depth)
+    tracked = np.empty(0, dtype=np.uint64)
+    for counts in _ChunkCounts(source, k, canonical, chunk_size):
+        sketch.add(counts.codes(), counts.counts())
+        pool = np.union1d(tracked, counts.codes())
+        estimates = sketch.estimate(pool)
+        if len(pool) > capacity:
+            pool = pool[np.argpartition(-estimates, capacity - 1)[:capacity]]
+        tracked = np.sort(pool)
+
+    if verify:
+        totals = np.zeros(len(tracked), dtype=np.int64)
+        for counts in _ChunkCounts(source, k, canonical, chunk_size):
+            # Only the codes that are candidates are looked at
+            codes = counts.codes()
+            index = np.minimum(np.searchsorted(tracked, codes), max(len(tracked) - 1, 0))
+            hits = tracked[index] == codes if len(tracked) else np.zeros(len(codes), dtype=bool)
+            totals += np.bincount(index[hits], weights=counts.counts()[hits], minlength=len(tracked)).astype(np.int64)
+    else:
+        totals = sketch.estimate(tracked)
+    # Most frequent first; the tracked codes are sorted, so a stable sort keeps ties in lexicographic order
+    order = np.argsort(-totals, kind='stable')[:n]
+    order = order[totals[order] > 0]
+    return HeavyHitters(decode_kmers(tracked[order], k), totals[order].tolist(), verify, sketch.error_bound,
+                        sketch.confidence)
+
+
+def _ChunkCounts(source, k, canonical, chunk_size):
+    """Yields the sparse k-mer counts of consecutive chunks overlapping by k-1 bases."""
+    if isinstance(source, GenomeReader):
+        chunks = (bases for _, _, bases in source.chunks(max(chunk_size, k), k - 1))
+    else:
+        chunks = (source[start:start + chunk_size + k - 1] for start in range(0, len(source), chunk_size))
+    for chunk in chunks:
+        if len(chunk) >= k:
+            yield CountKmers(chunk, k, dense=False, canonical=canonical)
@@ -0,0 +1,300 @@
+# IncrementalKmers.py
+import numpy as np
+
+from ClumpEngine import clump_runs
+from KmerCounter import DENSE_MAX_K, KmerCounts
+from PackedSequence import PackedSequence, decode_kmers, encode, encode_kmer, kmer_codes, MAX_CODE_K
+from PackedSequence import canonical as canonical_codes
+
+# Letters of the symbols 0-4 held by an editable sequence
+_LETTERS = bytes.maketrans(bytes(range(5)), b'ACGTN')
+
+'''
+K-mer counts and clumps that follow a sequence through edits instead of being recomputed from scratch.
+
+KmerTable and ClumpTracker own a mutable copy of the sequence and accept append, insert, substitute and
+delete. An edit only changes the windows that overlap it, so each one is applied as a local recount: the
+windows of a small region around the edit are removed from the state, the sequence is changed, and the windows
+of the same region in the new sequence are added back. This is the add/remove step of ClumpFinder's sliding
+window, run once per edit rather than once per position.
+
+- KmerTable counts every k-mer. The region of an edit of m bases spans m + 2(k - 1) bases, so a substitution
+  costs O(k) and appending a contig costs the length of the contig.
+- ClumpTracker keeps, for every k-mer, the number of runs of t consecutive occurrences that fit in L bases
+  (the runs FindClumps looks for); a k-mer forms a clump while it has at least one. A run of at most L bases
+  that is changed by an edit lies within L bases of it, so the region spans m + 2L bases and an edit costs O(L).
+  While the sequence is shorter than L, the whole sequence is the only window, as in ClumpFinder, and every
+  edit recounts it, which costs less than L bases.
+
+The queries always give what a full recount of the current sequence would, with the semantics of a
+PackedSequence: k-mers overlapping an N are never counted. So counts() equals CountKmers of the
+PackedSequence (a plain string with N would also count k-mers such as CCNA), and clumps() equals FindClumps,
+which is ClumpFinder for sequences without N.
+The sequence itself is a bytearray, so inserting or deleting still moves the bases after the edit, but as a
+single memmove rather than a recount.
+'''
+
+
+class _EditableSequence:
+    """
+    A mutable nucleotide sequence whose edits are applied to a subclass's state as local recounts.
+
+    Subclasses implement _Tally(start, end, sign), which adds (sign 1) or removes (sign -1) the contribution of
+    the region [start, end), and _Margin(), how far an edit reaches on either side.
+    """
+
+    def __init__(self, k):
+        if k <= 0 or k > MAX_CODE_K:
+            raise ValueError(f"k must be between 1 and {MAX_CODE_K}")
+        self.k = k
+        self._symbols = bytearray()
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __str__(self):
+        return self._symbols.translate(_LETTERS).decode('ascii')
+
+    def append(self, sequence):
+        """
+        Appends bases to the end of the sequence.
+
+        Args:
+            sequence (str, bytes or PackedSequence): The bases to append (A, C, G, T and N in either case).
+
+        Raises:
+            ValueError: If the bases contain any other character.
+        """
+        self._Replace(len(self._symbols), len(self._symbols), sequence)
+
+    def insert(self, position, sequence):
+        """
+        Inserts bases before a position.
+
+        Args:
+            position (int): Where the bases go, from 0 (the start) to len(self) (the end).
+            sequence (str, bytes or PackedSequence): The bases to insert.
+
+        Raises:
+            IndexError: If the position is out of range.
+            ValueError: If the bases contain characters other than A, C, G, T and N.
+        """
+        if not 0 <= position <= len(self._symbols):
+            raise IndexError("position out of range")
+        self._Replace(position, position, sequence)
+
+    def substitute(self, position, base):
+        """
+        Replaces the base at a position, e.g. to apply a SNP.
+
+        Args:
+            position (int): The position of the base.
+            base (str): The new base.
+
+        Raises:
+            IndexError: If the position is out of range.
+            ValueError: If base is not a single A, C, G, T or N.
+        """
+        if not 0 <= position < len(self._symbols):
+            raise IndexError("position out of range")
+        if len(base) != 1:
+            raise ValueError("base must be a single nucleotide")
+        self._Replace(position, position + 1, base)
+
+    def delete(self, position, length=1):
+        """
+        Deletes bases.
+
+        Args:
+            position (int): The position of the first base to delete.
+            length (int): The number of bases to delete.
+
+        Raises:
+            IndexError: If the bases are out of range.
+        """
+        if length < 0 or position < 0 or position + length > len(self._symbols):
+            raise IndexError("deletion out of range")
+        self._Replace(position, position + length, '')
+
+    def _Replace(self, start, end, sequence):
+        """Replaces the bases [start, end) with a sequence."""
+        self._Edit(start, end, _Symbols(sequence))
+
+    def _Edit(self, start, end, symbols):
+        """Replaces the bases [start, end) with encoded symbols, recounting only the region the edit reaches."""
+        margin = self._Margin()
+        low = max(start - margin, 0)
+        self._Tally(low, min(end + margin, len(self._symbols)), -1)
+        self._symbols[start:end] = symbols
+        self._Tally(low, min(start + len(symbols) + margin, len(self._symbols)), 1)
+
+    def _Windows(self, start, end):
+        """Returns the codes and start positions of the k-mers of [start, end) that avoid every N."""
+        symbols = np.frombuffer(self._symbols[start:end], dtype=np.uint8)
+        mask = symbols == 4
+        kmers, valid = kmer_codes(np.where(mask, 0, symbols), self.k, mask if mask.any() else None)
+        positions = np.arange(start, start + len(kmers))
+        if valid is not None:
+            kmers, positions = kmers[valid], positions[valid]
+        return kmers, positions
+
+
+class KmerTable(_EditableSequence):
+    """
+    The k-mer counts of a sequence, kept up to date as the sequence is edited.
+    """
+
+    def __init__(self, k, Text='', canonical=False, dense=None):
+        """
+        Counts the k-mers of an initial sequence.
+
+        Args:
+            k (int): The length of the k-mers, at most MAX_CODE_K.
+            Text (str, bytes or PackedSequence): The initial sequence; may be empty and grown with append.
+            canonical (bool): Whether to count every k-mer together with its reverse complement.
+            dense (bool, optional): Force (True) or forbid (False) a dense table of 4^k counts; by default it is
+                used as in CountKmers, judged on the initial sequence.
+
+        Raises:
+            ValueError: If k is out of range or the sequence contains characters other than A, C, G, T and N.
+        """
+        super().__init__(k)
+        self.canonical = canonical
+        if dense is None:
+            dense = k <= DENSE_MAX_K and 4 ** k <= 16 * max(len(Text) - k + 1, 1)
+        self.dense = dense
+        self._counts = np.zeros(4 ** k, dtype=np.int64) if dense else {}
+        self.append(Text)
+
+    def count(self, kmer):
+        """
+        Returns the count of one k-mer (in canonical mode, of it and its reverse complement).
+
+        Args:
+            kmer (str): The k-mer.
+
+        Returns:
+            int: Its count, 0 if it does not occur or is not a k-long nucleotide string.
+        """
+        code = encode_kmer(kmer) if len(kmer) == self.k else None
+        if code is None:
+            return 0
+        if self.canonical:
+            code = int(canonical_codes(np.array([code], dtype=np.uint64), self.k)[0])
+        if self.dense:
+            return int(self._counts[code])
+        return self._counts.get(code, 0)
+
+    def counts(self):
+        """
+        Returns a snapshot of the counts, equal to CountKmers of the current sequence as a PackedSequence.
+
+        Returns:
+            KmerCounts: The dict-compatible table; later edits do not change it.
+        """
+        if self.dense:
+            return KmerCounts(self.k, None, self._counts.copy(), dense=True)
+        codes = np.array(sorted(self._counts), dtype=np.uint64)
+        counts = np.array([self._counts[code] for code in codes.tolist()], dtype=np.int64)
+        return KmerCounts(self.k, codes, counts)
+
+    def most_frequent(self):
+        """
+        Finds the k-mers with the highest count.
+
+        Returns:
+            list: The most frequent k-mers, in lexicographic order.
+        """
+        if self.dense:
+            return KmerCounts(self.k, None, self._counts, dense=True).most_frequent()
+        return self.counts().most_frequent()
+
+    def _Margin(self):
+        return self.k - 1
+
+    def _Tally(self, start, end, sign):
+        kmers, _ = self._Windows(start, end)
+        if self.canonical:
+            kmers = canonical_codes(kmers, self.k)
+        if self.dense:
+            np.add.at(self._counts, kmers.astype(np.intp), sign)
+            return
+        codes, counts = np.unique(kmers, return_counts=True)
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            total = self._counts.get(code, 0) + sign * count
+            if total:
+                self._counts[code] = total
+            else:
+                del self._counts[code]
+
+
+class ClumpTracker(_EditableSequence):
+    """
+    The k-mers forming (L, t)-clumps in a sequence, kept up to date as the sequence is edited.
+    """
+
+    def __init__(self, k, L, t, Text=''):
+        """
+        Finds the clumps of an initial sequence.
+
+        Args:
+            k (int): The length of the k-mers, at most MAX_CODE_K.
+            L (int): The length of the window.
+            t (int): The minimum number of occurrences in a window.
+            Text (str, bytes or PackedSequence): The initial sequence; may be empty and grown with append.
+
+        Raises:
+            ValueError: If k, L or t is non-positive, k is too large, or the sequence contains characters other
+                than A, C, G, T and N.
+        """
+        if k <= 0 or L <= 0 or t <= 0:
+            raise ValueError("k, L, and t must be positive integers")
+        super().__init__(k)
+        self.L = L
+        self.t = t
+        self._runs = {}  # k-mer code -> number of runs of t occurrences within L bases, when positive
+        self.append(Text)
+
+    def clumps(self):
+        """
+        Returns the k-mers forming (L, t)-clumps, as FindClumps on the current sequence would (ClumpFinder when
+        the sequence has no N).
+
+        Returns:
+            set: The k-mers.
+        """
+        return set(decode_kmers(np.array(list(self._runs), dtype=np.uint64), self.k))
+
+    def _Edit(self, start, end, symbols):
+        if min(len(self._symbols), len(self._symbols) + len(symbols) - (end - start)) >= self.L:
+            super()._Edit(start, end, symbols)
+            return
+        # The window shrinks to the whole sequence, so every run may change: recount it all (fewer than L bases)
+        self._symbols[start:end] = symbols
+        self._runs = {}
+        self._Tally(0, len(self._symbols), 1)
+
+    def _Margin(self):
+        return self.L
+
+    def _Tally(self, start, end, sign):
+        kmers, positions = self._Windows(start, end)
+        order = np.argsort(kmers, kind='stable')
+        sorted_codes = kmers[order]
+        hits = clump_runs(sorted_codes, positions[order], self.k, min(self.L, len(self._symbols)), self.t)
+        codes, counts = np.unique(sorted_codes[hits], return_counts=True)
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            total = self._runs.get(code, 0) + sign * count
+            if total:
+                self._runs[code] = total
+            else:
+                del self._runs[code]
+
+
+def _Symbols(sequence):
+    """Encodes bases as bytes of symbols 0-4 (N as 4)."""
+    if isinstance(sequence, PackedSequence):
+        mask = sequence.mask()
+        codes = sequence.codes()
+        return (codes if mask is None else np.where(mask, 4, codes)).astype(np.uint8).tobytes()
+    return encode(sequence, ignore_whitespace=False).tobytes()
@@ -0,0 +1,220 @@
+# Instrumentation.py
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Setting this environment variable to anything but '' or '0' turns instrumentation on when the module loads
+ENV_VAR = 'REPLICATION_INSTRUMENT'
+
+# If set as well, the registry is written to this file when the process exits (Prometheus text for a .prom
+# file, JSON otherwise)
+OUTPUT_ENV_VAR = 'REPLICATION_INSTRUMENT_OUTPUT'
+
+# Whether calls are being recorded; read on every instrumented call, so it is a plain module global
+_enabled = False
+
+# The process-wide registry: name -> {'calls', 'seconds', 'max_seconds', 'counters', 'gauges'}
+_registry = {}
+_lock = threading.Lock()
+
+'''
+Opt-in instrumentation for the hot paths of replication.py, KMP_PatternSearch.py and the FrequentPatterns
+FrequentWords.py module.
+
+Functions decorated with timed() record their number of calls and their wall-clock time; inside them, count()
+adds up work counters (positions scanned, per-window strings made or avoided) and observe() keeps the largest
+value of a gauge (table sizes). Everything goes into one process-wide registry, which snapshot(), to_json() and
+to_prometheus() export.
+
+Recording is off by default. When it is off, a timed function costs one extra call and a global flag test,
+well under a microsecond, so only functions that do more work than that are timed. Every count() and
+observe() call sits under `if Instrumentation._enabled:`, so its arguments (a table size can mean walking the
+table) are not even computed. Turn it on for the whole process with the REPLICATION_INSTRUMENT environment
+variable, or for a block of code with the instrumented() context manager.
+'''
+
+
+def enabled():
+    """Tells whether calls are being recorded."""
+    return _enabled
+
+
+def enable():
+    """Starts recording calls."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stops recording calls; what was recorded so far is kept."""
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """Clears the registry."""
+    with _lock:
+        _registry.clear()
+
+
+@contextmanager
+def instrumented(clear=True):
+    """
+    Records the calls made inside a with block.
+
+    Args:
+        clear (bool): Whether to clear the registry first.
+
+    Yields:
+        module: This module, so that the block can end with e.g. `stats.to_json()`.
+    """
+    global _enabled
+    previous = _enabled
+    if clear:
+        reset()
+    _enabled = True
+    try:
+        yield sys.modules[__name__]
+    finally:
+        _enabled = previous
+
+
+def timed(name=None):
+    """
+    Decorates a function so that its calls are timed while instrumentation is on.
+
+    Args:
+        name (str, optional): The registry name; defaults to module.function.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with _lock:
+                    entry = _Entry(label)
+                    entry['calls'] += 1
+                    entry['seconds'] += elapsed
+                    entry['max_seconds'] = max(entry['max_seconds'], elapsed)
+        return wrapper
+    return decorate
+
+
+def count(name, **increments):
+    """
+    Adds to the work counters of a registry entry, e.g. count('replication.PatternCount', positions=n).
+
+    Args:
+        name (str): The registry name.
+        **increments: The amount to add to each counter.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        counters = _Entry(name)['counters']
+        for key, value in increments.items():
+            counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, **values):
+    """
+    Records gauge values of a registry entry, keeping the largest value seen for each, e.g. table sizes.
+
+    Args:
+        name (str): The registry name.
+        **values: The observed value of each gauge.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        gauges = _Entry(name)['gauges']
+        for key, value in values.items():
+            gauges[key] = max(gauges.get(key, value), value)
+
+
+def snapshot():
+    """
+    Copies the registry.
+
+    Returns:
+        dict: name -> {'calls', 'seconds', 'max_seconds', 'counters', 'gauges'}, sorted by name.
+    """
+    with _lock:
+        return {name: dict(entry, counters=dict(entry['counters']), gauges=dict(entry['gauges']))
+                for name, entry in sorted(_registry.items())}
+
+
+def to_json(indent=None):
+    """
+    Exports the registry as JSON.
+
+    Args:
+        indent (int, optional): The indentation passed to json.dumps.
+
+    Returns:
+        str: The JSON text of snapshot().
+    """
+    return json.dumps(snapshot(), indent=indent)
+
+
+def to_prometheus(prefix='replication'):
+    """
+    Exports the registry in the Prometheus text exposition format.
+
+    Calls, seconds and counters become counters, and max_seconds and gauges become gauges, each labelled with
+    the function name.
+
+    Args:
+        prefix (str): The prefix of every metric name.
+
+    Returns:
+        str: The metrics, one family after another.
+    """
+    families = {}
+    for name, entry in snapshot().items():
+        samples = [('calls_total', 'counter', entry['calls']), ('seconds_total', 'counter', entry['seconds']),
+                   ('max_seconds', 'gauge', entry['max_seconds'])]
+        samples += [(f'{key}_total', 'counter', value) for key, value in entry['counters'].items()]
+        samples += [(key, 'gauge', value) for key, value in entry['gauges'].items()]
+        for metric, kind, value in samples:
+            families.setdefault((f'{prefix}_{metric}', kind), []).append((name, value))
+    lines = []
+    for (metric, kind), samples in sorted(families.items()):
+        lines.append(f'# TYPE {metric} {kind}')
+        lines += [f'{metric}{{function="{name}"}} {value}' for name, value in samples]
+    return ''.join(line + '\n' for line in lines)
+
+
+def _Entry(name):
+    """Returns the registry entry of a name, creating it; the caller holds the lock."""
+    entry = _registry.get(name)
+    if entry is None:
+        entry = _registry[name] = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'counters': {}, 'gauges': {}}
+    return entry
+
+
+def _WriteOutput(path):
+    """Writes the registry to a file at exit, as Prometheus text for a .prom file and JSON otherwise."""
+    with open(path, 'w') as handle:
+        handle.write(to_prometheus() if path.endswith('.prom') else to_json(indent=2))
+
+
+if os.environ.get(ENV_VAR, '') not in ('', '0'):
+    _enabled = True
+    if os.environ.get(OUTPUT_ENV_VAR):
+        atexit.register(_WriteOutput, os.environ[OUTPUT_ENV_VAR])
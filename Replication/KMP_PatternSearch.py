@@ -1,3 +1,8 @@
+# KMP_PatternSearch.py
+import Instrumentation
+
+
+@Instrumentation.timed()
 def compute_prefix(pattern):
     """
     Computes the prefix table for the Knuth-Morris-Pratt algorithm.
@@ -38,9 +43,12 @@ def compute_prefix(pattern):
     # Only needed when all occurrences are searched
     prefix_table[position] = candidate
 
+    if Instrumentation._enabled:
+        Instrumentation.observe('KMP_PatternSearch.compute_prefix', table_size=len(prefix_table))
     return prefix_table
 
 
+@Instrumentation.timed()
 def kmp_pattern_search(text, pattern):
     """
     Searches for occurrences of a pattern in a text using the Knuth-Morris-Pratt algorithm.
@@ -50,8 +58,8 @@ def kmp_pattern_search(text, pattern):
     comparisons during the search process. This improves the overall performance of the pattern matching operation.
 
     Args:
-        text (list): The text to be searched (an array of characters).
-        pattern (list): The pattern sought (an array of characters).
+        text (list, str or bytes): The text to be searched (an array of characters).
+        pattern (list, str or bytes): The pattern sought (an array of characters).
 
     Returns:
         tuple: A tuple containing an array of integers positions (positions in the text at which the pattern is found) and
@@ -64,12 +72,35 @@ def kmp_pattern_search(text, pattern):
     if len(pattern) > len(text):
         return [], 0
 
+    positions = []  # Positions in the text at which the pattern is found
+    count = kmp_scan(text, pattern, positions)
+
+    # Counted once the scan is over, so the inner loop itself is untouched
+    if Instrumentation._enabled:
+        Instrumentation.count('KMP_PatternSearch.kmp_pattern_search', positions=len(text), matches=count)
+    return positions, count
+
+
+def kmp_scan(text, pattern, positions=None):
+    """
+    Runs the Knuth-Morris-Pratt scan over any indexable sequence.
+
+    This is the loop behind kmp_pattern_search; ExactSearch.py also uses it for the queries it cannot hand to
+    str.find or NumPy (lists, and case-insensitive non-ASCII text).
+
+    Args:
+        text (list, str or bytes): The text to be searched.
+        pattern (list, str or bytes): The non-empty pattern sought.
+        positions (list, optional): A list to which the start of every occurrence is appended.
+
+    Returns:
+        int: The number of (overlapping) occurrences.
+    """
     prefix_table = compute_prefix(pattern)  # Generate the prefix table
 
     text_index = 0  # Position of the current character in the text
     pattern_index = 0  # Position of the current character in the pattern
     count = 0  # Number of occurrences
-    positions = []  # Positions in the text at which the pattern is found
 
     # Iterate over the text
     while text_index < len(text):
@@ -79,7 +110,8 @@ def kmp_pattern_search(text, pattern):
             pattern_index += 1
             if pattern_index == len(pattern):
                 # If the whole pattern is matched, add the position to the list
-                positions.append(text_index - pattern_index)
+                if positions is not None:
+                    positions.append(text_index - pattern_index)
                 count += 1
                 pattern_index = prefix_table[pattern_index]
         else:
@@ -89,5 +121,4 @@ def kmp_pattern_search(text, pattern):
                 # If pattern index is negative, move to the next character in the text
                 text_index += 1
                 pattern_index += 1
-
-    return positions, count
+    return count
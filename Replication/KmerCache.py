@@ -0,0 +1,308 @@
+# KmerCache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import namedtuple
+
+import numpy as np
+
+from KmerCounter import CountKmers, KmerCounts
+from PackedSequence import PackedSequence, encode
+
+# Setting this environment variable to a directory turns the process-wide cache on when the module loads
+ENV_VAR = 'REPLICATION_KMER_CACHE'
+
+# If set as well, the byte budget of that cache
+MAX_BYTES_ENV_VAR = 'REPLICATION_KMER_CACHE_BYTES'
+
+# Default byte budget of a cache directory
+DEFAULT_MAX_BYTES = 1 << 30
+
+# Statistics of a KmerCache in this process: lookups answered from disk (hits) or counted (misses), tables
+# written, entries evicted, and the entries and bytes currently on disk
+KmerCacheStats = namedtuple('KmerCacheStats', ['hits', 'misses', 'writes', 'evictions', 'entries', 'bytes',
+                                               'max_bytes'])
+
+# The process-wide cache used by CachedCountKmers, or None when caching is off
+_default = None
+
+'''
+A persistent on-disk cache of k-mer count tables.
+
+Each table is stored in its own directory, named after a key made of a BLAKE2 digest of the normalized
+sequence (its base codes), k, the canonical and case options, and whether the k-mers overlapping an N are
+masked. A PackedSequence masks them while a string counts them, so the two only share entries when the
+sequence has no N. The counts (and, for the sparse layout, the sorted codes) are .npy files that are
+memory-mapped on a hit, so a warm lookup costs the digest of the sequence and a few file opens; the side
+dictionary of k-mers without a code goes into the entry's meta.json.
+
+An entry is written into a private temporary directory and then renamed into place, which is atomic: workers
+racing to store the same table never see a partial entry, and the loser of the race simply drops its copy.
+When the directory outgrows its byte budget, the entries used longest ago (by modification time, refreshed
+on every hit) are renamed away and deleted. A reader that loses an entry to eviction treats it as a miss.
+
+FrequencyMap, Genome.frequency_map, FindClumps (for its count prefilter) and the FrequentPatterns
+FrequencyTable go through CachedCountKmers, which uses the process-wide cache when one is enabled, with
+enable() or the REPLICATION_KMER_CACHE environment variable, and counts directly otherwise.
+ParallelFrequencyMap caches the merged table of the whole genome, never the tables of its shards.
+'''
+
+
+class KmerCache:
+    """
+    A directory of k-mer count tables with a byte budget.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Opens (creating if needed) a cache directory.
+
+        Args:
+            directory (str): The directory holding the entries.
+            max_bytes (int): The byte budget of the entries.
+
+        Raises:
+            ValueError: If max_bytes is negative.
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be a non-negative integer")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._writes = self._evictions = 0
+
+    def count(self, Text, k, canonical=False, case_sensitive=False, digest=None, counter=None):
+        """
+        Returns the k-mer counts of a sequence, from the cache or by counting and storing them.
+
+        Args:
+            Text (str or PackedSequence): The sequence, as for CountKmers.
+            k (int): The length of the k-mers.
+            canonical (bool): Whether to count canonical k-mers.
+            case_sensitive (bool): Whether a string must already be upper-case.
+            digest (str, optional): The digest of the sequence from SequenceDigest, if already known.
+            counter (callable, optional): Counts the table on a miss, e.g. over several processes; it must
+                return what CountKmers would. Defaults to CountKmers.
+
+        Returns:
+            KmerCounts: The counts; a hit holds read-only memory-mapped arrays.
+
+        Raises:
+            ValueError: As CountKmers does.
+        """
+        digest = digest or SequenceDigest(Text, case_sensitive)
+        # The digest reads N the same either way, but a packed sequence drops the k-mers overlapping one
+        masked = isinstance(Text, PackedSequence) and len(Text.n_runs) > 0
+        key = (f"{digest}-k{k}-{'canonical' if canonical else 'forward'}-{'cased' if case_sensitive else 'uncased'}"
+               f"-{'masked' if masked else 'unmasked'}")
+        table = self.get(key)
+        if table is not None:
+            return table
+        if counter is None:
+            table = CountKmers(Text, k, canonical=canonical, case_sensitive=case_sensitive)
+        else:
+            table = counter()
+        self.put(key, table)
+        return table
+
+    def get(self, key):
+        """
+        Loads an entry, or returns None (counting a miss) if it is not cached.
+
+        Args:
+            key (str): The entry key.
+
+        Returns:
+            KmerCounts or None: The cached table.
+        """
+        path = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(path, 'meta.json')) as handle:
+                meta = json.load(handle)
+            counts = _Load(os.path.join(path, 'counts.npy'))
+            codes = None if meta['dense'] else _Load(os.path.join(path, 'codes.npy'))
+            # Mark the entry as recently used
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return KmerCounts(meta['k'], codes, counts, dense=meta['dense'], extra=meta['extra'])
+
+    def put(self, key, table):
+        """
+        Stores a table under a key, atomically, then evicts old entries if over budget.
+
+        Args:
+            key (str): The entry key.
+            table (KmerCounts): The table to store.
+        """
+        size = table.nbytes
+        if size > self.max_bytes:
+            return
+        staging = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(staging)
+        try:
+            np.save(os.path.join(staging, 'counts.npy'), table._counts)
+            if not table.dense:
+                np.save(os.path.join(staging, 'codes.npy'), table._codes)
+            with open(os.path.join(staging, 'meta.json'), 'w') as handle:
+                json.dump({'k': table.k, 'dense': table.dense, 'extra': table._extra, 'nbytes': size}, handle)
+            # The rename publishes the whole entry at once; it fails if another writer got there first
+            os.rename(staging, os.path.join(self.directory, key))
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        with self._lock:
+            self._writes += 1
+        self._Evict()
+
+    def stats(self):
+        """Returns the KmerCacheStats of this cache."""
+        entries = self._Entries()
+        return KmerCacheStats(self._hits, self._misses, self._writes, self._evictions, len(entries),
+                              sum(size for _, size, _ in entries), self.max_bytes)
+
+    def clear(self):
+        """Deletes every entry; the statistics are kept."""
+        for path, _, _ in self._Entries():
+            self._Remove(path)
+
+    def _Entries(self):
+        """Lists the published entries as (path, bytes, last use) tuples."""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.startswith('.') or not entry.is_dir():
+                    continue
+                try:
+                    with open(os.path.join(entry.path, 'meta.json')) as handle:
+                        size = json.load(handle)['nbytes']
+                    entries.append((entry.path, size, entry.stat().st_mtime))
+                except (OSError, ValueError, KeyError):
+                    continue
+        return entries
+
+    def _Evict(self):
+        """Removes the least recently used entries until the cache fits its budget."""
+        entries = self._Entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            if self._Remove(path):
+                with self._lock:
+                    self._evictions += 1
+            total -= size
+
+    def _Remove(self, path):
+        """Unpublishes an entry with a rename and deletes it; returns whether this process removed it."""
+        doomed = os.path.join(self.directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.del")
+        try:
+            os.rename(path, doomed)
+        except OSError:
+            # Already evicted by another process
+            return False
+        shutil.rmtree(doomed, ignore_errors=True)
+        return True
+
+
+def SequenceDigest(Text, case_sensitive=False):
+    """
+    Computes the content digest of a sequence, over its base codes.
+
+    Args:
+        Text (str or PackedSequence): The sequence.
+        case_sensitive (bool): Whether a string must already be upper-case.
+
+    Returns:
+        str: The hexadecimal BLAKE2b digest.
+
+    Raises:
+        ValueError: If the sequence contains characters other than A, C, G, T and N.
+    """
+    if isinstance(Text, PackedSequence):
+        return CodesDigest(Text.codes(), Text.mask())
+    return CodesDigest(encode(Text, ignore_whitespace=False, case_sensitive=case_sensitive))
+
+
+def CodesDigest(codes, mask=None):
+    """
+    Computes the content digest of a sequence from its base codes, as SequenceDigest does.
+
+    Args:
+        codes (numpy.ndarray): The base codes (0-3, or 4 for N).
+        mask (numpy.ndarray, optional): Marks the N positions, for codes where N reads as 0.
+
+    Returns:
+        str: The hexadecimal BLAKE2b digest.
+    """
+    symbols = codes if mask is None else np.where(mask, 4, codes)
+    return hashlib.blake2b(np.ascontiguousarray(symbols, dtype=np.uint8).data, digest_size=20).hexdigest()
+
+
+def _Load(path):
+    """Memory-maps a stored array; an empty array cannot be mapped, so it is read instead."""
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        return np.load(path)
+
+
+def CachedCountKmers(Text, k, canonical=False, case_sensitive=False, digest=None, counter=None):
+    """
+    Counts k-mers through the process-wide cache if one is enabled, and with CountKmers otherwise.
+
+    Args:
+        Text (str or PackedSequence): The sequence.
+        k (int): The length of the k-mers.
+        canonical (bool): Whether to count canonical k-mers.
+        case_sensitive (bool): Whether a string must already be upper-case.
+        digest (str, optional): The digest of the sequence, if already known.
+        counter (callable, optional): Counts the table instead of CountKmers, as for KmerCache.count.
+
+    Returns:
+        KmerCounts: The counts.
+    """
+    if _default is None:
+        if counter is None:
+            return CountKmers(Text, k, canonical=canonical, case_sensitive=case_sensitive)
+        return counter()
+    return _default.count(Text, k, canonical, case_sensitive, digest, counter)
+
+
+def enable(directory, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Turns on the process-wide cache.
+
+    Args:
+        directory (str): The cache directory; several processes may share it.
+        max_bytes (int): Its byte budget.
+
+    Returns:
+        KmerCache: The cache.
+    """
+    global _default
+    _default = KmerCache(directory, max_bytes)
+    return _default
+
+
+def disable():
+    """Turns off the process-wide cache; its entries stay on disk."""
+    global _default
+    _default = None
+
+
+def default():
+    """Returns the process-wide cache, or None when caching is off."""
+    return _default
+
+
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR], int(os.environ.get(MAX_BYTES_ENV_VAR, DEFAULT_MAX_BYTES)))
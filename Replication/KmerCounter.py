@@ -0,0 +1,391 @@
+# KmerCounter.py
+from collections import namedtuple
+from collections.abc import ItemsView, KeysView, Mapping, ValuesView
+
+import numpy as np
+
+from PackedSequence import (PackedSequence, decode_kmers, encode, encode_kmer, kmer_codes, reverse_complement_codes,
+                            MAX_CODE_K)
+
+# Largest k counted into a dense table of 4^k slots; longer k-mers use sorted code/count pairs
+DENSE_MAX_K = 12
+
+# Complements of the letters that can appear in a k-mer without a code
+_COMPLEMENT = str.maketrans('ACGTN', 'TGCAN')
+
+# Canonical counts split by strand: total = forward + reverse, all keyed by canonical k-mer. A window counts as
+# forward when it reads as the canonical k-mer itself (so palindromes are always forward), and as reverse when it
+# reads as the canonical k-mer's reverse complement.
+StrandCounts = namedtuple('StrandCounts', ['total', 'forward', 'reverse'])
+
+
+class KmerCounts(Mapping):
+    """
+    A read-only, dict-compatible view of k-mer counts held in integer arrays.
+
+    Keys are upper-case k-mer strings and values are their counts, so the table can be passed anywhere a
+    frequency map dictionary is expected (MaxMap, BetterFrequentWords, ==, ...). For small k the counts live in
+    a dense array indexed by the 2-bit k-mer code; for larger k they are kept as sorted code/count pairs.
+    K-mers that cannot be coded (those containing an N in a plain string) are kept in a small side dictionary.
+    Iteration visits the coded k-mers in lexicographic order, followed by any side-dictionary k-mers.
+    """
+
+    def __init__(self, k, codes, counts, dense=False, extra=None):
+        """
+        Wraps count arrays produced by CountKmers.
+
+        Args:
+            k (int): The length of the k-mers.
+            codes (numpy.ndarray or None): The sorted k-mer codes (sparse layout only).
+            counts (numpy.ndarray): The counts, indexed by code (dense) or parallel to codes (sparse).
+            dense (bool): Whether counts is a dense table of 4^k slots.
+            extra (dict, optional): Counts of k-mers that have no integer code.
+        """
+        self.k = k
+        self.dense = dense
+        self._codes = codes
+        self._counts = counts
+        self._extra = extra or {}
+        self._present = None
+
+    def __getitem__(self, kmer):
+        count = 0
+        if isinstance(kmer, str) and len(kmer) == self.k and kmer.isupper():
+            code = encode_kmer(kmer)
+            if code is None:
+                count = self._extra.get(kmer, 0)
+            elif self.dense:
+                count = int(self._counts[code])
+            else:
+                index = np.searchsorted(self._codes, np.uint64(code))
+                if index < len(self._codes) and self._codes[index] == code:
+                    count = int(self._counts[index])
+        if count == 0:
+            raise KeyError(kmer)
+        return count
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.codes()) + len(self._extra)
+
+    def __bool__(self):
+        # Cheaper than __len__, which lists the k-mers of a dense table
+        return bool(self._counts.any()) or bool(self._extra)
+
+    def __repr__(self):
+        return f"KmerCounts(k={self.k}, distinct={len(self)}, total={self.total})"
+
+    def keys(self):
+        return _KmerKeys(self)
+
+    def values(self):
+        return _KmerValues(self)
+
+    def items(self):
+        return _KmerItems(self)
+
+    @property
+    def total(self):
+        """int: The number of k-mer occurrences counted."""
+        return int(self._counts.sum()) + sum(self._extra.values())
+
+    def codes(self):
+        """
+        Returns the integer codes of the k-mers present in the table.
+
+        Returns:
+            numpy.ndarray: The sorted uint64 codes of every k-mer with a non-zero count.
+        """
+        if not self.dense:
+            return self._codes
+        if self._present is None:
+            self._present = np.flatnonzero(self._counts).astype(np.uint64)
+        return self._present
+
+    def counts(self):
+        """
+        Returns the counts of the k-mers present in the table.
+
+        Returns:
+            numpy.ndarray: The counts, parallel to codes().
+        """
+        if not self.dense:
+            return self._counts
+        return self._counts[self.codes().astype(np.intp)]
+
+    def lookup(self, codes):
+        """
+        Looks up the counts of many k-mer codes at once.
+
+        Args:
+            codes (numpy.ndarray): The uint64 k-mer codes.
+
+        Returns:
+            numpy.ndarray: The count of each code, 0 for k-mers not in the table.
+        """
+        if self.dense:
+            return self._counts[codes.astype(np.intp)]
+        if self._codes.size == 0:
+            return np.zeros(len(codes), dtype=np.int64)
+        index = np.minimum(np.searchsorted(self._codes, codes), len(self._codes) - 1)
+        return np.where(self._codes[index] == codes, self._counts[index], 0)
+
+    @property
+    def nbytes(self):
+        """int: The number of bytes held by the count arrays."""
+        return self._counts.nbytes + (self._codes.nbytes if self._codes is not None else 0)
+
+    def to_sparse(self):
+        """
+        Returns the table in the sparse layout, which is compact to pickle or store.
+
+        Returns:
+            KmerCounts: The same counts as sorted code/count pairs.
+        """
+        if not self.dense:
+            return self
+        return KmerCounts(self.k, self.codes(), self.counts(), extra=dict(self._extra))
+
+    def max_count(self):
+        """
+        Finds the highest count in the table without iterating over it in Python.
+
+        Returns:
+            int: The maximum count, or 0 if the table is empty.
+        """
+        best = int(self._counts.max()) if self._counts.size else 0
+        return max([best] + list(self._extra.values()))
+
+    def most_frequent(self):
+        """
+        Finds the k-mers with the highest count.
+
+        Returns:
+            list: The most frequent k-mers, in iteration order.
+        """
+        best = self.max_count()
+        if best == 0:
+            return []
+        if self.dense:
+            # Scan the dense table directly rather than listing every present k-mer first
+            kmers = decode_kmers(np.flatnonzero(self._counts == best).astype(np.uint64), self.k)
+        else:
+            kmers = decode_kmers(self._codes[self._counts == best], self.k)
+        return kmers + [kmer for kmer, count in self._extra.items() if count == best]
+
+
+class _KmerKeys(KeysView):
+
+    def __iter__(self):
+        table = self._mapping
+        yield from decode_kmers(table.codes(), table.k)
+        yield from table._extra
+
+
+class _KmerValues(ValuesView):
+
+    def __iter__(self):
+        table = self._mapping
+        yield from table.counts().tolist()
+        yield from table._extra.values()
+
+
+class _KmerItems(ItemsView):
+
+    def __iter__(self):
+        table = self._mapping
+        yield from zip(decode_kmers(table.codes(), table.k), table.counts().tolist())
+        yield from table._extra.items()
+
+
+def CountKmers(Text, k, dense=None, case_sensitive=False, canonical=False, strands=False):
+    """
+    Counts every k-mer of a sequence using rolling 2-bit integer codes.
+
+    The k-mer codes of the whole text are computed with vectorized shifts; small k are then counted with a
+    single bincount into a dense 4^k table and larger k by sorting the codes, so no substring is ever sliced.
+
+    In canonical mode the reverse-complement code of every window is derived from its forward code in the
+    same pass, and each window is counted under the smaller of the two, so both strands are counted without
+    building or scanning the reverse complement of the text.
+
+    Args:
+        Text (str, PackedSequence or numpy.ndarray): The sequence to count. A string may only contain A, C, G, T
+            and N; an array holds the symbols from encode, 0-3 for A, C, G, T and 4 for a masked base.
+        k (int): The length of the k-mers, at most MAX_CODE_K.
+        dense (bool, optional): Force (True) or forbid (False) the dense table; by default it is used when k is
+            at most DENSE_MAX_K and the table is not much larger than the text.
+        case_sensitive (bool): Whether a string must already be upper-case, as for a case-sensitive count.
+        canonical (bool): Whether to count every k-mer together with its reverse complement, under whichever
+            of the two comes first lexicographically.
+        strands (bool): In canonical mode, whether to also return the counts of each strand.
+
+    Returns:
+        KmerCounts or StrandCounts: The dict-compatible table of counts, or with strands, a StrandCounts of
+                                    three tables. On a string, k-mers containing N are counted under their
+                                    string key; on a PackedSequence or an array they are masked out.
+
+    Raises:
+        ValueError: If k is out of range, strands is set without canonical, or the string contains characters
+            other than A, C, G, T and N.
+    """
+    if k <= 0 or k > MAX_CODE_K:
+        raise ValueError(f"k must be between 1 and {MAX_CODE_K}")
+    if strands and not canonical:
+        raise ValueError("Per-strand counts require canonical counting")
+    extra = {}
+    if isinstance(Text, PackedSequence):
+        kmers, valid = kmer_codes(Text.codes(), k, Text.mask())
+    elif isinstance(Text, np.ndarray):
+        mask = Text == 4
+        kmers, valid = kmer_codes(np.where(mask, 0, Text), k, mask if mask.any() else None)
+    else:
+        symbols = encode(Text, ignore_whitespace=False, case_sensitive=case_sensitive)
+        mask = symbols == 4
+        if not mask.any():
+            mask = None
+        kmers, valid = kmer_codes(np.where(symbols == 4, 0, symbols), k, mask)
+        if valid is not None:
+            # K-mers containing N have no 2-bit code, so they are few enough to count as strings
+            text = Text.upper()
+            for i in np.flatnonzero(~valid).tolist():
+                kmer = text[i:i + k]
+                extra[kmer] = extra.get(kmer, 0) + 1
+    if valid is not None:
+        kmers = kmers[valid]
+
+    if dense is None:
+        dense = k <= DENSE_MAX_K and 4 ** k <= 16 * max(len(kmers), 1)
+    if not canonical:
+        return _Tabulate(kmers, k, dense, extra)
+
+    # Fold every window onto the smaller of its own code and its reverse complement's code
+    reverse = reverse_complement_codes(kmers, k)
+    on_reverse = reverse < kmers
+    kmers = np.where(on_reverse, reverse, kmers)
+    forward_extra, reverse_extra = {}, {}
+    for kmer, count in extra.items():
+        complement = kmer.translate(_COMPLEMENT)[::-1]
+        if complement < kmer:
+            reverse_extra[complement] = reverse_extra.get(complement, 0) + count
+        else:
+            forward_extra[kmer] = forward_extra.get(kmer, 0) + count
+    if not strands:
+        for kmer, count in reverse_extra.items():
+            forward_extra[kmer] = forward_extra.get(kmer, 0) + count
+        return _Tabulate(kmers, k, dense, forward_extra)
+    forward = _Tabulate(kmers[~on_reverse], k, dense, forward_extra)
+    reverse = _Tabulate(kmers[on_reverse], k, dense, reverse_extra)
+    return StrandCounts(MergeCounts([forward, reverse]), forward, reverse)
+
+
+def _Tabulate(kmers, k, dense, extra):
+    """Counts an array of k-mer codes into a dense or sparse table."""
+    if dense:
+        counts = np.bincount(kmers.astype(np.intp), minlength=4 ** k)
+        return KmerCounts(k, None, counts, dense=True, extra=extra)
+    codes, counts = np.unique(kmers, return_counts=True)
+    return KmerCounts(k, codes, counts, extra=extra)
+
+
+def MergeCounts(tables):
+    """
+    Adds up several count tables of the same k, e.g. the per-chunk tables of a streamed genome.
+
+    Args:
+        tables (iterable): The KmerCounts tables to add.
+
+    Returns:
+        KmerCounts: The summed table; it is dense only if every input table is dense.
+
+    Raises:
+        ValueError: If no tables are given or they do not share the same k.
+    """
+    tables = list(tables)
+    if not tables:
+        raise ValueError("At least one table is required")
+    k = tables[0].k
+    if any(table.k != k for table in tables):
+        raise ValueError("All tables must count the same k")
+    extra = {}
+    for table in tables:
+        for kmer, count in table._extra.items():
+            extra[kmer] = extra.get(kmer, 0) + count
+    if all(table.dense for table in tables):
+        return KmerCounts(k, None, sum(table._counts for table in tables), dense=True, extra=extra)
+    # Concatenate the code/count pairs and add up the counts of equal codes
+    codes = np.concatenate([table.codes() for table in tables])
+    counts = np.concatenate([table.counts() for table in tables])
+    if codes.size == 0:
+        return KmerCounts(k, codes, counts, extra=extra)
+    order = np.argsort(codes, kind='stable')
+    codes, counts = codes[order], counts[order]
+    unique, starts = np.unique(codes, return_index=True)
+    return KmerCounts(k, unique, np.add.reduceat(counts, starts), extra=extra)
+
+
+class CountAccumulator:
+    """
+    Adds up a stream of count tables of the same k, such as the per-chunk tables of a long genome.
+
+    In the dense layout every table is added into one array of 4^k counts. In the sparse layout the tables wait
+    until together they are as large as the running total and are then merged into it at once, so the total is
+    re-sorted O(log n) times over the stream rather than once per table.
+    """
+
+    def __init__(self, k, dense):
+        """
+        Starts an empty total.
+
+        Args:
+            k (int): The length of the k-mers.
+            dense (bool): Whether to sum into a dense table of 4^k counts.
+        """
+        self.k = k
+        self.dense = dense
+        self._counts = np.zeros(4 ** k, dtype=np.int64) if dense else None
+        self._extra = {}
+        self._merged = KmerCounts(k, np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64))
+        self._pending = []
+        self._pending_size = 0
+
+    def add(self, table):
+        """
+        Adds a table to the total.
+
+        Args:
+            table (KmerCounts): The counts to add, in either layout.
+        """
+        if not self.dense:
+            self._pending.append(table)
+            self._pending_size += len(table.codes())
+            if self._pending_size >= len(self._merged.codes()):
+                self._Flush()
+            return
+        if table.dense:
+            self._counts += table._counts
+        else:
+            # The codes of one table are distinct, so a fancy-indexed add is safe
+            self._counts[table.codes().astype(np.intp)] += table.counts()
+        for kmer, count in table._extra.items():
+            self._extra[kmer] = self._extra.get(kmer, 0) + count
+
+    def result(self):
+        """
+        Returns the total so far.
+
+        Returns:
+            KmerCounts: The summed counts, in the accumulator's layout.
+        """
+        if self.dense:
+            return KmerCounts(self.k, None, self._counts, dense=True, extra=dict(self._extra))
+        self._Flush()
+        return self._merged
+
+    def _Flush(self):
+        """Merges the waiting tables into the running total."""
+        if self._pending:
+            self._merged = MergeCounts([self._merged] + self._pending)
+            self._pending, self._pending_size = [], 0
@@ -0,0 +1,427 @@
+# MotifEngine.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from PackedSequence import NUCLEOTIDES, encode
+
+# Symbol padding the shorter strings of a batch; it has probability 0 under every profile
+_PADDING = 4
+
+# Largest number of (seed, window) scores held at once by a greedy search batch
+GREEDY_BATCH_CELLS = 1 << 22
+
+# Greedy searches with fewer seeds than this run in this process unless workers are asked for explicitly
+MIN_PARALLEL_SEEDS = 4096
+
+# Two windows whose log-probabilities are this close are compared again by their exact probability products
+_TIE_TOLERANCE = 1e-9
+
+# Stand-in for log(0) in matrix products: far below the log-probability of any window with no zero in it
+_ZERO_LOG = -1e6
+
+'''
+The NumPy core of the motif-finding algorithms.
+
+Motifs are held as a (t x k) array of base codes (A=0, C=1, G=2, T=3) and profiles as (4 x k) arrays of
+probabilities, so count and profile matrices are built in one shot and every window of many strings is scored
+against a profile at once. Profiles may also be given in the textbook form, a dict mapping each of 'A', 'C',
+'G' and 'T' to a list of k probabilities.
+'''
+
+
+def encode_motifs(Motifs):
+    """
+    Encodes a collection of motifs into a (t x k) array of base codes.
+
+    Args:
+        Motifs (list or numpy.ndarray): Strings of equal length over A, C, G and T (either case), or an array
+            that is already encoded.
+
+    Returns:
+        numpy.ndarray: The uint8 codes, one row per motif.
+
+    Raises:
+        ValueError: If there are no motifs, their lengths differ, or they contain other characters.
+    """
+    if isinstance(Motifs, np.ndarray):
+        return Motifs
+    if not len(Motifs):
+        raise ValueError("Motifs must not be empty")
+    k = len(Motifs[0])
+    if any(len(motif) != k for motif in Motifs):
+        raise ValueError("Motifs must all have the same length")
+    codes = encode(''.join(Motifs), ignore_whitespace=False).reshape(len(Motifs), k)
+    if codes.size and codes.max() > 3:
+        raise ValueError("Motifs may only contain A, C, G and T")
+    return codes
+
+
+def encode_texts(Texts):
+    """
+    Encodes DNA strings of any lengths into one array, padding the shorter ones.
+
+    Args:
+        Texts (list): The strings, over A, C, G and T (either case).
+
+    Returns:
+        tuple: A (len(Texts) x longest length) uint8 array of base codes, padded with a symbol that no
+               profile matches, and the array of string lengths.
+
+    Raises:
+        ValueError: If a string contains other characters.
+    """
+    lengths = np.array([len(text) for text in Texts], dtype=np.int64)
+    codes = np.full((len(Texts), int(lengths.max(initial=0))), _PADDING, dtype=np.uint8)
+    for row, text in enumerate(Texts):
+        symbols = encode(text, ignore_whitespace=False)
+        if symbols.size and symbols.max() > 3:
+            raise ValueError("Texts may only contain A, C, G and T")
+        codes[row, :len(symbols)] = symbols
+    return codes, lengths
+
+
+def profile_array(Profile):
+    """
+    Converts a profile to a (4 x k) float array.
+
+    Args:
+        Profile (dict or numpy.ndarray): A textbook profile ({'A': [...], 'C': [...], ...}) or an array.
+
+    Returns:
+        numpy.ndarray: The probabilities, one row per base in ACGT order.
+    """
+    if isinstance(Profile, dict):
+        return np.array([Profile[symbol] for symbol in NUCLEOTIDES], dtype=np.float64)
+    return np.asarray(Profile, dtype=np.float64)
+
+
+def CountMatrix(Motifs, pseudocount=0):
+    """
+    Counts each base in each column of a collection of motifs.
+
+    Args:
+        Motifs (list or numpy.ndarray): The motifs, as strings or as a (t x k) code array.
+        pseudocount (int): The count added to every cell.
+
+    Returns:
+        numpy.ndarray: A (4 x k) int64 array; row i counts base NUCLEOTIDES[i].
+    """
+    codes = encode_motifs(Motifs)
+    # Compare every motif base with each of the four codes at once and sum down the columns
+    counts = (codes[None, :, :] == np.arange(4, dtype=np.uint8)[:, None, None]).sum(axis=1, dtype=np.int64)
+    return counts + pseudocount
+
+
+def ProfileMatrix(Motifs, pseudocount=0):
+    """
+    Forms the profile matrix of a collection of motifs.
+
+    Args:
+        Motifs (list or numpy.ndarray): The motifs, as strings or as a (t x k) code array.
+        pseudocount (int): The count added to every cell before normalizing (1 for Laplace's rule).
+
+    Returns:
+        numpy.ndarray: A (4 x k) float array whose columns sum to 1.
+    """
+    codes = encode_motifs(Motifs)
+    return CountMatrix(codes, pseudocount) / (len(codes) + 4 * pseudocount)
+
+
+def Consensus(Motifs):
+    """
+    Forms the consensus string of a collection of motifs, the most common base of each column.
+
+    Ties go to the base that comes first in ACGT order.
+
+    Args:
+        Motifs (list or numpy.ndarray): The motifs, as strings or as a (t x k) code array.
+
+    Returns:
+        str: The consensus string.
+    """
+    return ''.join(NUCLEOTIDES[i] for i in CountMatrix(Motifs).argmax(axis=0))
+
+
+def Score(Motifs):
+    """
+    Scores a collection of motifs: the number of bases that differ from the consensus base of their column.
+
+    Args:
+        Motifs (list or numpy.ndarray): The motifs, as strings or as a (t x k) code array.
+
+    Returns:
+        int: The score; lower is better.
+    """
+    codes = encode_motifs(Motifs)
+    return int(codes.size - CountMatrix(codes).max(axis=0).sum())
+
+
+def Entropy(Motifs):
+    """
+    Computes the entropy of a collection of motifs: the sum over columns of -sum(p * log2(p)) of the profile.
+
+    Args:
+        Motifs (list or numpy.ndarray): The motifs, as strings or as a (t x k) code array.
+
+    Returns:
+        float: The entropy, in bits; lower means better conserved.
+    """
+    profile = ProfileMatrix(Motifs)
+    # 0 * log2(0) counts as 0
+    logs = np.log2(np.where(profile > 0, profile, 1))
+    return float(-(profile * logs).sum())
+
+
+def window_log_probabilities(codes, k, Profile):
+    """
+    Computes the log-probability of every window of every string under a profile.
+
+    The log-probabilities are accumulated as sliding sums, one profile column at a time over all the strings,
+    so there is no per-window loop and no underflow for long motifs.
+
+    Args:
+        codes (numpy.ndarray): The padded (t x n) code array from encode_texts.
+        k (int): The length of the windows; the profile has k columns.
+        Profile (dict or numpy.ndarray): The profile.
+
+    Returns:
+        numpy.ndarray: A (t x (n - k + 1)) float array; windows of probability 0 and windows running past the
+                       end of their string hold -inf.
+    """
+    logs = _PaddedProfile(Profile, k)
+    with np.errstate(divide='ignore'):
+        logs = np.log(logs)
+    windows = codes.shape[1] - k + 1
+    scores = np.zeros((codes.shape[0], max(windows, 0)))
+    for j in range(k):
+        scores += logs[j][codes[:, j:j + windows]]
+    return scores
+
+
+def most_probable_positions(codes, lengths, k, Profile):
+    """
+    Finds the start of the profile-most-probable window of each string.
+
+    Windows are ranked by their log-probabilities. Windows within a rounding error of the best one are then
+    compared by the product of their probabilities, multiplied left to right as the textbook Pr function does,
+    so ties go to the first window exactly as in a window-by-window scan.
+
+    Args:
+        codes (numpy.ndarray): The padded (t x n) code array from encode_texts.
+        lengths (numpy.ndarray): The length of each string.
+        k (int): The length of the windows.
+        Profile (dict or numpy.ndarray): The profile.
+
+    Returns:
+        numpy.ndarray: The start position of the chosen window in each string.
+
+    Raises:
+        ValueError: If a string is shorter than k.
+    """
+    if k <= 0 or (len(lengths) and lengths.min() < k):
+        raise ValueError("Every text must be at least k long, and k must be positive")
+    scores = window_log_probabilities(codes, k, Profile)
+    best = scores.max(axis=1)
+    rows, starts = np.nonzero(scores >= best[:, None] - _TIE_TOLERANCE)
+    # Windows running past the end of a shorter string are not candidates
+    inside = starts <= lengths[rows] - k
+    rows, starts = rows[inside], starts[inside]
+    probabilities = _PaddedProfile(Profile, k)
+    products = np.ones(len(rows))
+    for j in range(k):
+        products *= probabilities[j][codes[rows, starts + j]]
+    return _FirstBest(rows, starts, products)
+
+
+def most_probable_windows(text, k, profiles):
+    """
+    Finds the start of the most probable window of one string under each of many profiles.
+
+    This is most_probable_positions turned around: one string against a stack of profiles, as when many
+    partial motif collections each pick their next motif from the same string. The log-probabilities of all
+    (profile, window) pairs come from one matrix product between the stacked log-profiles and the one-hot
+    encoded windows. Ties are broken the same way.
+
+    Args:
+        text (numpy.ndarray): The base codes of the string.
+        k (int): The length of the windows.
+        profiles (numpy.ndarray): A (p x 4 x k) stack of profiles.
+
+    Returns:
+        numpy.ndarray: The start position of the chosen window under each profile.
+    """
+    probabilities = profiles.transpose(0, 2, 1)  # (p x k x 4)
+    # A zero probability gets a large finite log instead of -inf, which the matrix product would turn into nan
+    with np.errstate(divide='ignore'):
+        logs = np.where(probabilities > 0, np.log(probabilities), _ZERO_LOG)
+    windows = np.lib.stride_tricks.sliding_window_view(text, k)
+    one_hot = (windows[:, :, None] == np.arange(4, dtype=np.uint8)).reshape(len(windows), 4 * k)
+    scores = logs.reshape(len(profiles), 4 * k) @ one_hot.T.astype(np.float64)
+    best = scores.max(axis=1)
+    # When even the best window has probability 0, every window ties with it and the first one is taken
+    positions = np.zeros(len(profiles), dtype=np.int64)
+    possible = np.flatnonzero(best > _ZERO_LOG / 2)
+    rows, starts = np.nonzero(scores[possible] >= best[possible, None] - _TIE_TOLERANCE)
+    rows = possible[rows]
+    products = np.ones(len(rows))
+    for j in range(k):
+        products *= probabilities[rows, j, text[starts + j]]
+    positions[possible] = _FirstBest(rows, starts, products)
+    return positions
+
+
+def greedy_batch(codes, lengths, k, first, last, pseudocount=0):
+    """
+    Runs the greedy motif search from the seeds first to last - 1 of the first string, all at once.
+
+    Every seed starts its own motif collection with the k-mer at its position in the first string. For each
+    following string, the count matrices of all collections are turned into profiles together, each collection
+    takes the profile-most-probable k-mer of the string, and its counts are updated with that k-mer alone
+    rather than recounted from scratch.
+
+    Args:
+        codes (numpy.ndarray): The padded (t x n) code array from encode_texts.
+        lengths (numpy.ndarray): The length of each string.
+        k (int): The length of the motifs.
+        first (int): The first seed position.
+        last (int): The seed position after the last one.
+        pseudocount (int): The count added to every cell of the profiles.
+
+    Returns:
+        tuple: The score of each seed's motif collection, and a (seeds x t) array of the motif start positions.
+    """
+    t = len(codes)
+    columns = np.arange(k)
+    starts = np.zeros((last - first, t), dtype=np.int64)
+    starts[:, 0] = np.arange(first, last)
+    counts = np.zeros((last - first, 4, k), dtype=np.int64)
+    for j in range(t):
+        if j:
+            profiles = (counts + pseudocount) / (j + 4 * pseudocount)
+            starts[:, j] = most_probable_windows(codes[j, :lengths[j]], k, profiles)
+        # Add the chosen k-mer of string j to each collection's counts
+        symbols = codes[j][starts[:, j][:, None] + columns]
+        counts += symbols[:, None, :] == np.arange(4, dtype=np.uint8)[None, :, None]
+    scores = t * k - counts.max(axis=1).sum(axis=1)
+    return scores, starts
+
+
+def ProfileMostProbable(Texts, k, Profile):
+    """
+    Finds the profile-most-probable k-mer of each of several DNA strings.
+
+    This is the inner loop of the motif-finding algorithms: all windows of all the strings are scored against
+    the profile at once.
+
+    Args:
+        Texts (list): The DNA strings.
+        k (int): The length of the k-mers.
+        Profile (dict or numpy.ndarray): The profile, with k columns.
+
+    Returns:
+        list: One k-mer per string, the first of the most probable ones (as it appears in the string).
+
+    Raises:
+        ValueError: If a string is shorter than k or contains characters other than A, C, G and T.
+    """
+    if not Texts:
+        return []
+    codes, lengths = encode_texts(Texts)
+    positions = most_probable_positions(codes, lengths, k, Profile)
+    return [text[i:i + k] for text, i in zip(Texts, positions.tolist())]
+
+
+def ProfileMostProbableKmer(Text, k, Profile):
+    """
+    Finds the profile-most-probable k-mer of a DNA string.
+
+    Args:
+        Text (str): The DNA string.
+        k (int): The length of the k-mer.
+        Profile (dict or numpy.ndarray): The profile, with k columns.
+
+    Returns:
+        str: The first of the most probable k-mers.
+
+    Raises:
+        ValueError: If Text is shorter than k or contains characters other than A, C, G and T.
+    """
+    return ProfileMostProbable([Text], k, Profile)[0]
+
+
+def GreedySearch(Dna, k, t, pseudocount=0, workers=None, executor=None):
+    """
+    Runs the greedy motif search of the textbook, from every k-mer of the first string.
+
+    The seeds are processed in batches by greedy_batch, so each batch scores a string's windows against all of
+    its profiles at once. Batches can be spread over a process pool. The result is the one of the textbook
+    algorithm, ties included: the first seed reaching the lowest score wins, and only a score strictly lower
+    than that of the first k-mers of the strings replaces them.
+
+    Args:
+        Dna (list): The DNA strings, over A, C, G and T.
+        k (int): The length of the motifs.
+        t (int): The number of strings to use, from the start of Dna.
+        pseudocount (int): The count added to every cell of the profiles (1 for GreedyMotifSearchWithPseudocounts).
+        workers (int, optional): The number of worker processes. By default searches with at least
+            MIN_PARALLEL_SEEDS seeds use one per CPU and smaller ones run in this process; 1 never starts a pool.
+        executor (concurrent.futures.Executor, optional): A pool to run the batches on, e.g. one kept open
+            across many searches; it takes precedence over workers.
+
+    Returns:
+        list: The best motifs, one k-mer per string.
+
+    Raises:
+        ValueError: If t or k is out of range, or a string contains characters other than A, C, G and T.
+    """
+    if t <= 0 or t > len(Dna) or k <= 0 or min(len(text) for text in Dna[:t]) < k:
+        raise ValueError("t must be between 1 and len(Dna), and k between 1 and the shortest string length")
+    Dna = Dna[:t]
+    codes, lengths = encode_texts(Dna)
+    seeds = int(lengths[0]) - k + 1
+    parallel = executor is not None or (workers or 1) > 1 or (workers is None and seeds >= MIN_PARALLEL_SEEDS)
+    count = workers or os.cpu_count() or 1
+    # Keep each batch within GREEDY_BATCH_CELLS scores, and give every worker a few batches to even out
+    size = max(GREEDY_BATCH_CELLS // max(int(lengths.max()) - k + 1, 1), 1)
+    if parallel:
+        size = min(size, -(-seeds // (4 * count)))
+    batches = [(first, min(first + size, seeds)) for first in range(0, seeds, size)]
+
+    if not parallel:
+        results = [greedy_batch(codes, lengths, k, first, last, pseudocount) for first, last in batches]
+    elif executor is not None:
+        futures = [executor.submit(greedy_batch, codes, lengths, k, first, last, pseudocount)
+                   for first, last in batches]
+        results = [future.result() for future in futures]
+    else:
+        with ProcessPoolExecutor(max_workers=min(count, len(batches))) as pool:
+            futures = [pool.submit(greedy_batch, codes, lengths, k, first, last, pseudocount)
+                       for first, last in batches]
+            results = [future.result() for future in futures]
+    scores = np.concatenate([batch_scores for batch_scores, _ in results])
+    starts = np.concatenate([batch_starts for _, batch_starts in results])
+
+    best = np.zeros(t, dtype=np.int64)  # The first k-mer of every string
+    seed = int(scores.argmin())  # argmin takes the first seed among equal scores
+    if scores[seed] < Score(codes[:, :k]):
+        best = starts[seed]
+    return [text[i:i + k] for text, i in zip(Dna, best.tolist())]
+
+
+def _FirstBest(rows, starts, products):
+    """For each row, picks the start with the largest product, the earliest one among equal products."""
+    order = np.lexsort((starts, -products, rows))
+    rows = rows[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    return starts[order][first]
+
+
+def _PaddedProfile(Profile, k):
+    """Transposes a profile to (k x 5), with a column of zeros for the padding symbol."""
+    profile = profile_array(Profile)
+    if profile.shape != (4, k):
+        raise ValueError(f"Profile must have 4 rows and {k} columns")
+    return np.concatenate((profile.T, np.zeros((k, 1))), axis=1)
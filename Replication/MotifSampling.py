@@ -0,0 +1,227 @@
+# MotifSampling.py
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from MotifEngine import CountMatrix, encode_texts, most_probable_positions, window_log_probabilities
+
+# Searches with fewer restarts than this run in this process unless workers are asked for explicitly
+MIN_PARALLEL_RESTARTS = 64
+
+# The outcome of a randomized motif search: the best motifs found (one k-mer per string), their score, and for
+# each restart that ran, in restart order, the array of the scores its motif collection went through
+MotifSearch = namedtuple('MotifSearch', ['motifs', 'score', 'traces'])
+
+'''
+Randomized motif finders: RandomizedMotifSearch and the Gibbs sampler, built on profiles with pseudocounts.
+
+Restarts are independent, so they are spread over a process pool. Every restart draws from its own random
+generator, spawned from one master seed with numpy's SeedSequence, so a search gives the same result for the
+same seed whatever the number of workers. Searches can stop early when the best score has not improved for a
+number of restarts (patience) or when a time budget runs out.
+'''
+
+
+def RandomizedSearch(Dna, k, t, restarts=1000, seed=None, patience=None, time_budget=None, workers=None,
+                     executor=None):
+    """
+    Runs RandomizedMotifSearch from several random starts and keeps the best motifs.
+
+    Each restart picks a random k-mer in every string, then alternates between forming the profile of its
+    motifs (with pseudocounts) and taking the profile-most-probable k-mer of every string, for as long as the
+    score improves. All strings are scanned at once by the motif engine.
+
+    Args:
+        Dna (list): The DNA strings, over A, C, G and T.
+        k (int): The length of the motifs.
+        t (int): The number of strings to use, from the start of Dna.
+        restarts (int): The number of random starts.
+        seed (int, optional): The master seed; None draws a fresh one.
+        patience (int, optional): Stop once this many restarts in a row have not improved the best score.
+        time_budget (float, optional): Stop starting or continuing restarts after this many seconds.
+        workers (int, optional): The number of worker processes. By default searches with at least
+            MIN_PARALLEL_RESTARTS restarts use one per CPU; 1 never starts a pool.
+        executor (concurrent.futures.Executor, optional): A pool to run the restarts on; it takes precedence
+            over workers.
+
+    Returns:
+        MotifSearch: The best motifs (the earliest restart wins ties), their score and the per-restart traces.
+
+    Raises:
+        ValueError: If t, k or restarts is out of range, or a string contains characters other than A, C, G
+            and T.
+    """
+    return _RunRestarts(_RandomizedTask, (), Dna, k, t, restarts, seed, patience, time_budget, workers, executor)
+
+
+def GibbsSearch(Dna, k, t, N, restarts=20, seed=None, stall=None, patience=None, time_budget=None, workers=None,
+                executor=None):
+    """
+    Runs the Gibbs sampler from several random starts and keeps the best motifs.
+
+    Each restart picks a random k-mer in every string and then, N times, drops the motif of a random string,
+    forms the profile of the others (with pseudocounts) and draws a new k-mer for that string with probability
+    proportional to its profile probability. The draw is one cumulative sum over the window probabilities and
+    one binary search, and the count matrix is updated with the two changed k-mers only.
+
+    Args:
+        Dna (list): The DNA strings, over A, C, G and T.
+        k (int): The length of the motifs.
+        t (int): The number of strings to use, from the start of Dna.
+        N (int): The number of iterations of each restart.
+        restarts (int): The number of random starts.
+        seed (int, optional): The master seed; None draws a fresh one.
+        stall (int, optional): End a restart once this many iterations in a row have not improved its best score.
+        patience (int, optional): Stop once this many restarts in a row have not improved the best score.
+        time_budget (float, optional): Stop starting or continuing restarts after this many seconds.
+        workers (int, optional): The number of worker processes, as for RandomizedSearch.
+        executor (concurrent.futures.Executor, optional): A pool to run the restarts on.
+
+    Returns:
+        MotifSearch: The best motifs (the earliest restart wins ties), their score and the per-restart traces.
+
+    Raises:
+        ValueError: If t, k, N or restarts is out of range, or a string contains characters other than A, C, G
+            and T.
+    """
+    if N < 0:
+        raise ValueError("N must be a non-negative integer")
+    return _RunRestarts(_GibbsTask, (N, stall), Dna, k, t, restarts, seed, patience, time_budget, workers,
+                        executor)
+
+
+def _RunRestarts(task, args, Dna, k, t, restarts, seed, patience, time_budget, workers, executor):
+    """
+    Runs the restarts of a randomized search in batches, in this process or on a pool, and keeps the best.
+
+    Results are examined in restart order, so the best motifs and the patience cut-off do not depend on how the
+    batches were scheduled.
+    """
+    if t <= 0 or t > len(Dna) or k <= 0 or min(len(text) for text in Dna[:t]) < k:
+        raise ValueError("t must be between 1 and len(Dna), and k between 1 and the shortest string length")
+    if restarts <= 0:
+        raise ValueError("restarts must be a positive integer")
+    Dna = Dna[:t]
+    codes, lengths = encode_texts(Dna)
+    seeds = np.random.SeedSequence(seed).spawn(restarts)
+    deadline = None if time_budget is None else time.time() + time_budget
+    parallel = executor is not None or (workers or 1) > 1 or (workers is None and restarts >= MIN_PARALLEL_RESTARTS)
+    # With patience, small batches let the search stop soon after the last improvement
+    size = -(-restarts // (4 * (workers or os.cpu_count() or 1))) if parallel else 1
+    batches = [seeds[first:first + size] for first in range(0, restarts, size)]
+
+    if not parallel:
+        results = (task(codes, lengths, k, batch, deadline, *args) for batch in batches)
+        return _Collect(results, Dna, k, patience)
+    own = executor is None
+    pool = ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(batches))) if own else executor
+    futures = [pool.submit(task, codes, lengths, k, batch, deadline, *args) for batch in batches]
+    try:
+        return _Collect((future.result() for future in futures), Dna, k, patience)
+    finally:
+        # Batches past an early stop are not needed any more
+        for future in futures:
+            future.cancel()
+        if own:
+            pool.shutdown()
+
+
+def _Collect(results, Dna, k, patience):
+    """Goes through batch results in restart order, keeping the best motifs and stopping when patience runs out."""
+    best_score, best_starts, traces = None, None, []
+    since = 0  # Restarts since the best score last improved
+    for batch in results:
+        for score, starts, trace in batch:
+            traces.append(trace)
+            if best_score is None or score < best_score:
+                best_score, best_starts, since = score, starts, 0
+            else:
+                since += 1
+            if patience is not None and since >= patience:
+                break
+        else:
+            continue
+        break
+    if best_score is None:
+        # The time budget ran out before any restart finished its first step
+        return MotifSearch([], None, traces)
+    motifs = [text[i:i + k] for text, i in zip(Dna, best_starts.tolist())]
+    return MotifSearch(motifs, int(best_score), traces)
+
+
+def _RandomizedTask(codes, lengths, k, seeds, deadline):
+    """Runs RandomizedMotifSearch once per seed; returns (score, starts, trace) per restart that ran."""
+    t = len(codes)
+    results = []
+    for seed in seeds:
+        if deadline is not None and time.time() > deadline:
+            break
+        rng = np.random.default_rng(seed)
+        starts = rng.integers(0, lengths - k + 1)
+        counts = CountMatrix(_Windows(codes, starts, k))
+        best_starts, best_score = starts, _Score(counts, t, k)
+        trace = [best_score]
+        while deadline is None or time.time() <= deadline:
+            starts = most_probable_positions(codes, lengths, k, (counts + 1) / (t + 4))
+            counts = CountMatrix(_Windows(codes, starts, k))
+            score = _Score(counts, t, k)
+            trace.append(score)
+            if score >= best_score:
+                break
+            best_starts, best_score = starts, score
+        results.append((best_score, best_starts, np.array(trace)))
+    return results
+
+
+def _GibbsTask(codes, lengths, k, seeds, deadline, N, stall):
+    """Runs the Gibbs sampler once per seed; returns (score, starts, trace) per restart that ran."""
+    t = len(codes)
+    columns = np.arange(k)
+    results = []
+    for seed in seeds:
+        if deadline is not None and time.time() > deadline:
+            break
+        rng = np.random.default_rng(seed)
+        starts = rng.integers(0, lengths - k + 1)
+        counts = CountMatrix(_Windows(codes, starts, k))
+        best_starts, best_score = starts.copy(), _Score(counts, t, k)
+        trace = [best_score]
+        since = 0
+        for _ in range(N):
+            if (stall is not None and since >= stall) or (deadline is not None and time.time() > deadline):
+                break
+            i = int(rng.integers(t))
+            # Take motif i out of the counts, draw its replacement, and put the new one in
+            counts[codes[i, starts[i] + columns], columns] -= 1
+            profile = (counts + 1) / (t - 1 + 4)
+            starts[i] = _ProfileRandomWindow(codes[i:i + 1, :lengths[i]], k, profile, rng)
+            counts[codes[i, starts[i] + columns], columns] += 1
+            score = _Score(counts, t, k)
+            trace.append(score)
+            if score < best_score:
+                best_starts, best_score, since = starts.copy(), score, 0
+            else:
+                since += 1
+        results.append((best_score, best_starts, np.array(trace)))
+    return results
+
+
+def _ProfileRandomWindow(codes, k, profile, rng):
+    """Draws the start of a window of one string with probability proportional to its profile probability."""
+    scores = window_log_probabilities(codes, k, profile)[0]
+    # Scale by the largest probability before leaving log space, so that long motifs cannot underflow
+    weights = np.cumsum(np.exp(scores - scores.max()))
+    return int(np.searchsorted(weights, rng.random() * weights[-1], side='right'))
+
+
+def _Windows(codes, starts, k):
+    """Gathers the k-mer starting at starts[i] in string i, as a (t x k) code array."""
+    return codes[np.arange(len(codes))[:, None], starts[:, None] + np.arange(k)]
+
+
+def _Score(counts, t, k):
+    """Scores a motif collection from its count matrix: the bases that differ from the consensus."""
+    return int(t * k - counts.max(axis=0).sum())
@@ -0,0 +1,172 @@
+# MotifTree.py
+import numpy as np
+
+from PackedSequence import MAX_CODE_K, decode_kmers, encode, encode_kmer, kmer_codes, mismatch_counts
+
+# Largest number of (pattern, window) distances computed at once
+DISTANCE_BATCH = 1 << 22
+
+# Levels of the tree with at most this many prefixes may be scored through a table of every prefix
+TABLE_MAX_PATTERNS = 1 << 24
+
+'''
+Exhaustive motif searches over the tree of all 4^k patterns: MedianString and MotifEnumeration.
+
+K-mers are 2-bit integer codes, so the Hamming distance between a pattern and a window is an XOR followed by a
+popcount of the differing base slots (mismatch_counts). The tree is walked one level (pattern prefix length) at
+a time, and every prefix is compared with the same-length prefix of every window. The distance of a prefix to
+a string can only grow as the prefix is extended, so a prefix whose bound already rules it out is pruned with
+its whole subtree: for MedianString when its summed distance exceeds that of a known pattern, for
+MotifEnumeration when it is more than d away from some string.
+
+While the tree is narrow and few prefixes survive, they are compared with the windows directly. Near the root,
+where nothing can be pruned yet, a level is instead scored through a distance transform: the distance from
+every one of the 4^p prefixes to the nearest window prefix of a string, computed in p vectorized passes (one
+per base position, since the Hamming distance adds up over positions) rather than one comparison per window.
+'''
+
+
+def DistanceBetweenPatternAndStrings(Pattern, Dna):
+    """
+    Computes d(Pattern, Dna): the sum over the strings of the smallest Hamming distance between the pattern
+    and any window of the string.
+
+    Args:
+        Pattern (str): The pattern, over A, C, G and T.
+        Dna (list): The DNA strings, each at least as long as the pattern.
+
+    Returns:
+        int: The distance.
+
+    Raises:
+        ValueError: If the pattern is empty or too long, or a string is too short or contains characters
+            other than A, C, G and T.
+    """
+    code = encode_kmer(Pattern)
+    if code is None or not Pattern:
+        raise ValueError("Pattern must be a non-empty string over A, C, G and T")
+    windows = _WindowCodes(Dna, len(Pattern))
+    return int(_PrefixDistances(np.array([code], dtype=np.uint64), windows).sum())
+
+
+def MedianString(Dna, k):
+    """
+    Finds a median string: a k-mer minimizing d(Pattern, Dna).
+
+    The distance of the best k-mer of the first string is taken as the initial bound, and every prefix whose
+    summed distance to the strings exceeds it is pruned. Ties go to the pattern that comes first in
+    lexicographic order, as when all 4^k patterns are tried in order.
+
+    Args:
+        Dna (list): The DNA strings, over A, C, G and T.
+        k (int): The length of the pattern, at most MAX_CODE_K.
+
+    Returns:
+        str: The median string.
+
+    Raises:
+        ValueError: If k is out of range, or a string is shorter than k or contains characters other than A, C,
+            G and T.
+    """
+    windows = _WindowCodes(Dna, k)
+    # Any k-mer of the first string bounds the best distance from above
+    seeds = np.unique(windows[0])
+    bound = int(_PrefixDistances(seeds, windows).sum(axis=1).min())
+    patterns, totals = _Walk(windows, k, lambda distances: distances.sum(axis=1) <= bound)
+    totals = totals.sum(axis=1)
+    # The surviving patterns are in lexicographic order, and argmin takes the first of the best
+    return decode_kmers(patterns[[int(totals.argmin())]], k)[0]
+
+
+def MotifEnumeration(Dna, k, d):
+    """
+    Finds every (k, d)-motif: the k-mers that occur with at most d mismatches in every string.
+
+    Args:
+        Dna (list): The DNA strings, over A, C, G and T.
+        k (int): The length of the motifs, at most MAX_CODE_K.
+        d (int): The maximum number of mismatches.
+
+    Returns:
+        list: The motifs, in lexicographic order.
+
+    Raises:
+        ValueError: If k is out of range, d is negative, or a string is shorter than k or contains characters
+            other than A, C, G and T.
+    """
+    if d < 0:
+        raise ValueError("d must be a non-negative integer")
+    windows = _WindowCodes(Dna, k)
+    patterns, _ = _Walk(windows, k, lambda distances: distances.max(axis=1) <= d)
+    return decode_kmers(patterns, k)
+
+
+def _Walk(windows, k, keep):
+    """
+    Walks the pattern tree level by level, keeping the prefixes that `keep` accepts.
+
+    Args:
+        windows (numpy.ndarray): The (t x W) window codes from _WindowCodes.
+        k (int): The pattern length.
+        keep (callable): Maps the (prefixes x t) distance matrix of a level to a boolean mask of survivors.
+
+    Returns:
+        tuple: The surviving patterns of length k (sorted codes) and their (patterns x t) distances.
+    """
+    prefixes = np.arange(4, dtype=np.uint64)
+    bases = np.arange(4, dtype=np.uint64)
+    for length in range(1, k + 1):
+        # Compare the prefixes with the first `length` bases of every window
+        heads = windows >> np.uint64(2 * (k - length))
+        if 4 ** length <= TABLE_MAX_PATTERNS and 4 ** length * length < len(prefixes) * windows.shape[1]:
+            distances = _TableDistances(prefixes, heads, length)
+        else:
+            distances = _PrefixDistances(prefixes, heads)
+        survivors = keep(distances)
+        prefixes, distances = prefixes[survivors], distances[survivors]
+        if length < k:
+            prefixes = ((prefixes[:, None] << np.uint64(2)) | bases).ravel()
+    return prefixes, distances
+
+
+def _PrefixDistances(prefixes, windows):
+    """Computes the (prefixes x t) matrix of the smallest distance between each prefix and each string."""
+    t, width = windows.shape
+    distances = np.empty((len(prefixes), t), dtype=np.int64)
+    step = max(DISTANCE_BATCH // max(t * width, 1), 1)
+    for start in range(0, len(prefixes), step):
+        chunk = prefixes[start:start + step]
+        mismatches = mismatch_counts(windows[None, :, :], chunk[:, None, None])
+        distances[start:start + step] = mismatches.min(axis=2)
+    return distances
+
+
+def _TableDistances(prefixes, windows, k):
+    """Computes the (prefixes x t) distance matrix through a distance transform of each string in turn."""
+    distances = np.empty((len(prefixes), len(windows)), dtype=np.int64)
+    for i, row in enumerate(windows):
+        table = np.full(4 ** k, k, dtype=np.uint8)
+        table[row.astype(np.intp)] = 0
+        for position in range(k):
+            # Changing the base at one position costs one mismatch
+            view = table.reshape(-1, 4, 4 ** position)
+            np.minimum(view, view.min(axis=1, keepdims=True) + 1, out=view)
+        distances[:, i] = table[prefixes.astype(np.intp)]
+    return distances
+
+
+def _WindowCodes(Dna, k):
+    """Encodes the k-mers of every string as a (t x W) code array, padding short rows with their own first k-mer."""
+    if k <= 0 or k > MAX_CODE_K:
+        raise ValueError(f"k must be between 1 and {MAX_CODE_K}")
+    if not Dna or min(len(text) for text in Dna) < k:
+        raise ValueError("Dna must hold strings at least k long")
+    rows = []
+    for text in Dna:
+        symbols = encode(text, ignore_whitespace=False)
+        if symbols.max() > 3:
+            raise ValueError("Dna may only contain A, C, G and T")
+        rows.append(kmer_codes(symbols, k)[0])
+    width = max(len(row) for row in rows)
+    # Repeating a k-mer of the same string leaves its smallest distance unchanged
+    return np.stack([np.concatenate((row, np.full(width - len(row), row[0], dtype=np.uint64))) for row in rows])
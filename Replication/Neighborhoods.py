@@ -0,0 +1,140 @@
+# Neighborhoods.py
+from itertools import combinations, product
+
+import numpy as np
+
+from KmerCounter import CountKmers, DENSE_MAX_K, KmerCounts
+from PackedSequence import decode_kmers, encode_kmer, reverse_complement_codes, MAX_CODE_K
+
+# Number of neighbor codes materialized at a time when neighborhoods are enumerated explicitly
+NEIGHBOR_BATCH = 1 << 22
+
+
+def NeighborhoodMasks(k, d):
+    """
+    Lists the XOR masks that turn a 2-bit k-mer code into each of its neighbors.
+
+    With A=0, C=1, G=2, T=3, substituting the base at one position is an XOR of that position's two bits with
+    1, 2 or 3. A mask choosing at most d positions, and one non-zero value for each, therefore maps every code to
+    a distinct neighbor at Hamming distance at most d, and the masks together cover the whole d-neighborhood.
+
+    Args:
+        k (int): The length of the k-mers.
+        d (int): The maximum number of mismatches.
+
+    Returns:
+        numpy.ndarray: The uint64 masks, starting with 0 (the k-mer itself).
+    """
+    masks = [0]
+    for mismatches in range(1, min(d, k) + 1):
+        for positions in combinations(range(k), mismatches):
+            shifts = [2 * (k - 1 - position) for position in positions]
+            for values in product((1, 2, 3), repeat=mismatches):
+                masks.append(sum(value << shift for value, shift in zip(values, shifts)))
+    return np.array(masks, dtype=np.uint64)
+
+
+def Neighbors(Pattern, d):
+    """
+    Generates the d-neighborhood of a pattern: every string within Hamming distance d of it.
+
+    Args:
+        Pattern (str): The pattern, made of A, C, G and T in any case.
+        d (int): The maximum number of mismatches.
+
+    Returns:
+        list: The neighbors in lexicographic order, including the pattern itself (in upper case).
+
+    Raises:
+        ValueError: If the pattern is empty, too long, or not made of A, C, G and T, or d is negative.
+    """
+    if d < 0:
+        raise ValueError("d must be a non-negative integer")
+    if not Pattern or len(Pattern) > MAX_CODE_K:
+        raise ValueError(f"Pattern length must be between 1 and {MAX_CODE_K}")
+    code = encode_kmer(Pattern.upper())
+    if code is None:
+        raise ValueError("Pattern must only contain A, C, G and T")
+    k = len(Pattern)
+    return decode_kmers(np.sort(np.uint64(code) ^ NeighborhoodMasks(k, d)), k)
+
+
+def CountWithMismatches(Text, k, d, reverse_complement=False):
+    """
+    Counts, for every k-mer, the windows of a text that lie within Hamming distance d of it.
+
+    The exact k-mer counts are computed first, so each distinct window is handled once however often it occurs.
+    Their counts are then spread over the d-neighborhoods, entirely on integer code arrays:
+
+    - For k up to DENSE_MAX_K, the counts live in a dense 4^k table and are spread one base position at a time.
+      After a position has been processed, layer j holds, for every code, the total count of the codes that
+      differ from it in exactly j of the positions processed so far. This costs O(k * d * 4^k) and does not
+      depend on the size of the neighborhoods.
+    - For longer k, each distinct code is XORed with every mask of NeighborhoodMasks, in batches, and equal
+      neighbor codes are summed by sorting. The result holds every distinct neighbor, so its size grows with
+      the number of distinct windows times the size of a neighborhood.
+
+    Args:
+        Text (str or PackedSequence): The text; a string may contain A, C, G, T and N in any case.
+        k (int): The length of the k-mers, at most MAX_CODE_K.
+        d (int): The maximum number of mismatches.
+        reverse_complement (bool): Whether to add, for every k-mer, the count of its reverse complement, so that
+            windows on the opposite strand count as well.
+
+    Returns:
+        KmerCounts: The counts with mismatches of every k-mer that has at least one approximate occurrence.
+                    Windows containing an N are not counted.
+
+    Raises:
+        ValueError: If k is out of range, d is negative, or the text contains characters other than
+            A, C, G, T and N.
+    """
+    if d < 0:
+        raise ValueError("d must be a non-negative integer")
+    exact = CountKmers(Text, k, dense=k <= DENSE_MAX_K)
+    if exact.dense:
+        table = exact._counts
+        if reverse_complement:
+            # Count every window a second time as its reverse complement
+            table = table + table[reverse_complement_codes(np.arange(4 ** k, dtype=np.uint64), k).astype(np.intp)]
+        return KmerCounts(k, None, _SpreadDense(table, k, d), dense=True)
+    codes, counts = exact.codes(), exact.counts()
+    if reverse_complement:
+        codes = np.concatenate((codes, reverse_complement_codes(codes, k)))
+        counts = np.concatenate((counts, counts))
+    return KmerCounts(k, *_SpreadSparse(codes, counts, k, d))
+
+
+def _SpreadDense(table, k, d):
+    """Sums a dense table of counts over the d-neighborhood of every code, one base position at a time."""
+    d = min(d, k)
+    # No sum exceeds the number of windows, so 32 bits suffice for any realistic text and halve the memory
+    dtype = np.int32 if int(table.sum()) < 2 ** 31 else np.int64
+    layers = [table.astype(dtype)] + [np.zeros(4 ** k, dtype=dtype) for _ in range(d)]
+    for position in range(k):
+        # Viewed this way, the middle axis is the base at this position
+        shape = (4 ** position, 4, 4 ** (k - 1 - position))
+        # Go down from the highest layer, so each update still reads the previous position's lower layer
+        for j in range(min(d, position + 1), 0, -1):
+            lower = layers[j - 1].reshape(shape)
+            # Every other base at this position adds one mismatch: the column total minus the base itself
+            layers[j] += (lower.sum(axis=1, keepdims=True) - lower).reshape(-1)
+    return sum(layers[1:], layers[0]).astype(np.int64)
+
+
+def _SpreadSparse(codes, counts, k, d):
+    """Sums code/count pairs over explicit d-neighborhoods, built by XOR masks and reduced by sorting."""
+    masks = NeighborhoodMasks(k, d)
+    batch = max(NEIGHBOR_BATCH // len(masks), 1)
+    partial_codes, partial_counts = [], []
+    for start in range(0, len(codes), batch):
+        neighbors = (codes[start:start + batch, None] ^ masks[None, :]).ravel()
+        weights = np.repeat(counts[start:start + batch], len(masks))
+        unique, inverse = np.unique(neighbors, return_inverse=True)
+        partial_codes.append(unique)
+        partial_counts.append(np.bincount(inverse.ravel(), weights=weights, minlength=len(unique)))
+    if not partial_codes:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    unique, inverse = np.unique(np.concatenate(partial_codes), return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=np.concatenate(partial_counts), minlength=len(unique))
+    return unique, totals.astype(np.int64)
@@ -0,0 +1,455 @@
+# PackedSequence.py
+import numpy as np
+
+# The four nucleotides in code order; A=0, C=1, G=2, T=3 keeps integer k-mer codes in lexicographic order
+NUCLEOTIDES = 'ACGT'
+
+# Largest k whose 2-bit code still fits in an unsigned 64-bit integer
+MAX_CODE_K = 32
+
+# Lookup table from an ASCII byte to its symbol: 0-3 for ACGT (either case), 4 for N and 255 for anything else
+_ENCODE = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate(NUCLEOTIDES):
+    _ENCODE[ord(_base)] = _code
+    _ENCODE[ord(_base.lower())] = _code
+_ENCODE[ord('N')] = 4
+_ENCODE[ord('n')] = 4
+
+# The same table without the lower-case letters, for callers whose string functions are case-sensitive
+_ENCODE_UPPER = _ENCODE.copy()
+_ENCODE_UPPER[np.frombuffer(b'acgtn', dtype=np.uint8)] = 255
+
+# Lookup table from a symbol back to its (upper-case) ASCII byte
+_DECODE = np.frombuffer(b'ACGTN', dtype=np.uint8)
+
+# The low bit of every 2-bit base slot of a 64-bit k-mer code
+_LOW_BITS = np.uint64(0x5555555555555555)
+
+# Reverse complement of every packed byte: its four 2-bit bases complemented (XOR 3) and put in reverse order
+_REVERSE_COMPLEMENT_BYTE = np.array([sum(((byte >> (2 * slot)) & 3 ^ 3) << (6 - 2 * slot) for slot in range(4))
+                                     for byte in range(256)], dtype=np.uint8)
+
+# Whitespace bytes dropped while encoding, so line-wrapped genome files can be passed in directly
+_WHITESPACE = b' \t\r\n\v\f'
+
+
+def encode(text, ignore_whitespace=True, case_sensitive=False):
+    """
+    Encodes a nucleotide string into an array of symbols.
+
+    Case is normalized here, once, so that callers only ever compare integers.
+
+    Args:
+        text (str or bytes): The sequence to encode; only A, C, G, T and N (in either case) are allowed.
+        ignore_whitespace (bool): Whether to skip whitespace instead of rejecting it.
+        case_sensitive (bool): Whether to reject lower-case letters instead of normalizing them.
+
+    Returns:
+        numpy.ndarray: A uint8 array holding 0-3 for A, C, G, T and 4 for N.
+
+    Raises:
+        ValueError: If the text contains any other character.
+    """
+    if isinstance(text, str):
+        try:
+            text = text.encode('ascii')
+        except UnicodeEncodeError:
+            raise ValueError("Sequence contains non-ASCII characters")
+    raw = bytes(text)
+    if ignore_whitespace:
+        # Drop line breaks and other whitespace in one C-level pass
+        raw = raw.translate(None, _WHITESPACE)
+    table = _ENCODE_UPPER if case_sensitive else _ENCODE
+    symbols = table[np.frombuffer(raw, dtype=np.uint8)]
+    # A single vectorized check replaces the per-character validation of the string functions
+    if symbols.size and symbols.max() == 255:
+        raise ValueError("Invalid nucleotide in the input sequence")
+    return symbols
+
+
+def is_acgt(text):
+    """
+    Tells whether a string consists only of upper-case A, C, G and T.
+
+    Args:
+        text (str): The string to check.
+
+    Returns:
+        bool: True if every character is A, C, G or T.
+    """
+    return not text.encode('ascii', 'replace').translate(None, b'ACGT')
+
+
+def encode_kmer(kmer):
+    """
+    Converts a k-mer string into its 2-bit integer code.
+
+    Args:
+        kmer (str): The k-mer to convert.
+
+    Returns:
+        int or None: The integer code, or None if the k-mer contains anything other than A, C, G or T.
+    """
+    code = 0
+    for base in kmer.upper():
+        digit = NUCLEOTIDES.find(base)
+        if digit < 0:
+            return None
+        code = (code << 2) | digit
+    return code
+
+
+def decode_kmers(codes, k):
+    """
+    Converts an array of 2-bit k-mer codes back into strings.
+
+    Args:
+        codes (numpy.ndarray): The integer codes to convert.
+        k (int): The length of the k-mers.
+
+    Returns:
+        list: The k-mer strings, in the same order as the codes.
+    """
+    codes = np.asarray(codes, dtype=np.uint64)
+    if codes.size == 0:
+        return []
+    # Split every code into its k base digits at once, most significant base first
+    shifts = np.arange(2 * (k - 1), -1, -2, dtype=np.uint64)
+    digits = ((codes[:, None] >> shifts) & np.uint64(3)).astype(np.uint8)
+    letters = np.ascontiguousarray(_DECODE[digits])
+    return [kmer.decode('ascii') for kmer in letters.view(f'S{k}').ravel()]
+
+
+def kmer_codes(codes, k, mask=None):
+    """
+    Computes the 2-bit integer code of every k-mer in a symbol array.
+
+    The codes are built by shifting in one base column at a time, so the whole text is processed in k
+    vectorized steps rather than n Python iterations.
+
+    Args:
+        codes (numpy.ndarray): The base codes (0-3) of the text.
+        k (int): The length of the k-mers, at most MAX_CODE_K.
+        mask (numpy.ndarray, optional): Boolean array marking masked (N) positions of the text.
+
+    Returns:
+        tuple: A uint64 array with the code of the k-mer starting at each position, and a boolean array
+               telling which of those k-mers avoid every masked position (None when there is no mask).
+
+    Raises:
+        ValueError: If k is non-positive or larger than MAX_CODE_K.
+    """
+    if k <= 0 or k > MAX_CODE_K:
+        raise ValueError(f"k must be between 1 and {MAX_CODE_K}")
+    count = len(codes) - k + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64), None
+    kmers = codes[:count].astype(np.uint64)
+    for offset in range(1, k):
+        # Shift the running codes left by one base and bring in the next column of the text
+        kmers <<= np.uint64(2)
+        kmers |= codes[offset:offset + count]
+    valid = None
+    if mask is not None:
+        # A k-mer is valid when the number of masked positions it covers is zero
+        covered = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+        valid = covered[k:] == covered[:count]
+    return kmers, valid
+
+
+def reverse_complement_codes(codes, k):
+    """
+    Reverse-complements an array of 2-bit k-mer codes.
+
+    Each 64-bit code is handled as eight bytes of four bases: one table lookup complements and reverses the
+    bases within every byte, a byte swap reverses the bytes, and a shift drops the slots beyond k. The whole
+    array is processed in three vectorized passes, whatever k is.
+
+    Args:
+        codes (numpy.ndarray): The uint64 k-mer codes.
+        k (int): The length of the k-mers, at most MAX_CODE_K.
+
+    Returns:
+        numpy.ndarray: The codes of the reverse complements, in the same order.
+    """
+    codes = np.ascontiguousarray(codes, dtype=np.uint64)
+    flipped = _REVERSE_COMPLEMENT_BYTE[codes.view(np.uint8)].view(np.uint64).byteswap()
+    # The unused high slots were complemented to T and now sit at the bottom, below the k bases
+    return flipped >> np.uint64(64 - 2 * k)
+
+
+def canonical(codes, k):
+    """
+    Maps k-mer codes to their canonical form: the smaller of the code and its reverse complement's code.
+
+    A k-mer and its reverse complement are the same site read from opposite strands, so they share one
+    canonical code.
+
+    Args:
+        codes (numpy.ndarray): The uint64 k-mer codes.
+        k (int): The length of the k-mers, at most MAX_CODE_K.
+
+    Returns:
+        numpy.ndarray: The canonical codes, in the same order.
+    """
+    codes = np.asarray(codes, dtype=np.uint64)
+    return np.minimum(codes, reverse_complement_codes(codes, k))
+
+
+def mismatch_counts(codes, code):
+    """
+    Counts the mismatching bases between 2-bit k-mer codes and one reference code.
+
+    The codes are XOR-ed, each 2-bit base slot that differs is folded onto a single bit, and the bits are counted,
+    so the Hamming distance of every k-mer is computed in a handful of vectorized word operations.
+
+    Args:
+        codes (numpy.ndarray): The uint64 k-mer codes.
+        code (int): The code to compare them with.
+
+    Returns:
+        numpy.ndarray: The number of mismatching bases of each k-mer.
+    """
+    diff = np.bitwise_xor(codes, np.uint64(code))
+    diff = (diff | (diff >> np.uint64(1))) & _LOW_BITS
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(diff)
+    # Without a native popcount, add up the bits of each byte and then the bytes of each word
+    diff = (diff & np.uint64(0x3333333333333333)) + ((diff >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    diff = (diff + (diff >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((diff * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.uint8)
+
+
+class PackedSequence:
+    """
+    A nucleotide sequence stored at 2 bits per base, with a side list of N runs.
+
+    The functions in replication.py accept a PackedSequence wherever they accept a string. Case is normalized
+    once when the sequence is built, and positions covered by an N are masked: k-mers overlapping them are
+    never counted, matched or reported.
+    """
+
+    __slots__ = ('_packed', '_length', '_n_runs')
+
+    def __init__(self, text=''):
+        """
+        Packs a nucleotide string.
+
+        Args:
+            text (str or bytes): The sequence; A, C, G, T and N in either case, whitespace is ignored.
+
+        Raises:
+            ValueError: If the text contains any other character.
+        """
+        symbols = encode(text)
+        self._length = len(symbols)
+        self._n_runs = _find_runs(symbols == 4)
+        # N positions are stored as A in the packed bases; the run list is what marks them
+        symbols[symbols == 4] = 0
+        self._packed = _pack(symbols)
+
+    @classmethod
+    def from_codes(cls, codes, n_runs=None):
+        """
+        Builds a packed sequence from base codes that are already encoded.
+
+        Args:
+            codes (numpy.ndarray): The base codes (0-3).
+            n_runs (numpy.ndarray, optional): The (start, end) pairs of the N runs.
+
+        Returns:
+            PackedSequence: The packed sequence.
+        """
+        sequence = cls.__new__(cls)
+        sequence._length = len(codes)
+        sequence._packed = _pack(np.asarray(codes, dtype=np.uint8))
+        if n_runs is None:
+            n_runs = np.empty((0, 2), dtype=np.int64)
+        sequence._n_runs = np.asarray(n_runs, dtype=np.int64).reshape(-1, 2)
+        return sequence
+
+    @classmethod
+    def from_packed(cls, packed, length, n_runs=None):
+        """
+        Wraps bases that are already packed at 2 bits per base, such as a shared-memory copy, without copying.
+
+        Args:
+            packed (numpy.ndarray): The packed bytes, as held by the packed property.
+            length (int): The number of bases.
+            n_runs (numpy.ndarray, optional): The (start, end) pairs of the N runs.
+
+        Returns:
+            PackedSequence: The packed sequence.
+        """
+        sequence = cls.__new__(cls)
+        sequence._length = length
+        sequence._packed = packed
+        if n_runs is None:
+            n_runs = np.empty((0, 2), dtype=np.int64)
+        sequence._n_runs = np.asarray(n_runs, dtype=np.int64).reshape(-1, 2)
+        return sequence
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        letters = _DECODE[self.codes()]
+        for start, end in self._n_runs:
+            letters[start:end] = ord('N')
+        return letters.tobytes().decode('ascii')
+
+    def __repr__(self):
+        preview = str(self[:20]) + ('...' if self._length > 20 else '')
+        return f"PackedSequence('{preview}', length={self._length})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedSequence):
+            return NotImplemented
+        return (self._length == other._length and np.array_equal(self._packed, other._packed)
+                and np.array_equal(self._n_runs, other._n_runs))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                raise ValueError("PackedSequence slices must be contiguous")
+            stop = max(start, stop)
+            return PackedSequence.from_codes(self.codes(start, stop), self._clip_runs(start, stop) - start)
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("PackedSequence index out of range")
+        return str(self[index:index + 1])
+
+    @property
+    def nbytes(self):
+        """int: The number of bytes held by the packed bases and the N runs."""
+        return self._packed.nbytes + self._n_runs.nbytes
+
+    @property
+    def packed(self):
+        """numpy.ndarray: The bases packed four to a byte, most significant bits first (N positions as A)."""
+        return self._packed
+
+    @property
+    def n_runs(self):
+        """numpy.ndarray: The (start, end) pairs of the N runs, sorted by position."""
+        return self._n_runs
+
+    def codes(self, start=0, stop=None):
+        """
+        Unpacks a range of the sequence into one base code per byte.
+
+        Args:
+            start (int): The first position to unpack.
+            stop (int, optional): The position after the last one to unpack; defaults to the end.
+
+        Returns:
+            numpy.ndarray: A uint8 array of base codes (0-3); N positions read as 0, see mask().
+        """
+        if stop is None:
+            stop = self._length
+        if stop <= start:
+            return np.empty(0, dtype=np.uint8)
+        first, last = start // 4, (stop + 3) // 4
+        block = self._packed[first:last]
+        unpacked = np.empty((len(block), 4), dtype=np.uint8)
+        unpacked[:, 0] = block >> 6
+        unpacked[:, 1] = (block >> 4) & 3
+        unpacked[:, 2] = (block >> 2) & 3
+        unpacked[:, 3] = block & 3
+        return unpacked.ravel()[start - 4 * first:stop - 4 * first]
+
+    def mask(self, start=0, stop=None):
+        """
+        Returns the N mask for a range of the sequence.
+
+        Args:
+            start (int): The first position of the range.
+            stop (int, optional): The position after the last one; defaults to the end.
+
+        Returns:
+            numpy.ndarray or None: A boolean array that is True at N positions, or None if the range has no N.
+        """
+        if stop is None:
+            stop = self._length
+        runs = self._clip_runs(start, stop)
+        if len(runs) == 0:
+            return None
+        mask = np.zeros(stop - start, dtype=bool)
+        for run_start, run_end in runs - start:
+            mask[run_start:run_end] = True
+        return mask
+
+    def reverse_complement(self):
+        """
+        Computes the reverse complement without leaving the packed representation.
+
+        Returns:
+            PackedSequence: The reverse complement; N runs are mirrored onto the opposite strand.
+        """
+        # Complement and reverse the bases of every byte by table lookup, and read the bytes backwards
+        packed = _REVERSE_COMPLEMENT_BYTE[self._packed[::-1]]
+        # The padding slots of the last byte are now at the front; shift the whole sequence over them
+        shift = (-self._length) % 4 * 2
+        if shift:
+            following = np.concatenate((packed[1:], np.zeros(1, dtype=np.uint8)))
+            packed = (packed << shift) | (following >> (8 - shift))
+        sequence = PackedSequence.__new__(PackedSequence)
+        sequence._length = self._length
+        sequence._packed = packed
+        sequence._n_runs = self._length - self._n_runs[::-1, ::-1]
+        return sequence
+
+    def _clip_runs(self, start, stop):
+        """Returns the N runs overlapping [start, stop), clipped to that range."""
+        runs = self._n_runs
+        overlapping = runs[(runs[:, 1] > start) & (runs[:, 0] < stop)]
+        return np.clip(overlapping, start, stop)
+
+
+def find_pattern(sequence, pattern):
+    """
+    Finds every (overlapping) occurrence of a pattern in a packed sequence.
+
+    Candidate positions matching the first base are found in one vectorized comparison and then narrowed down
+    one pattern column at a time, so no substring is ever created.
+
+    Args:
+        sequence (PackedSequence): The sequence to search.
+        pattern (str): The pattern to find; it is matched case-insensitively.
+
+    Returns:
+        numpy.ndarray: The sorted start positions of the occurrences. Patterns containing anything other than
+                       A, C, G or T, and occurrences overlapping an N, never match.
+    """
+    m = len(pattern)
+    n = len(sequence)
+    wanted = _ENCODE[np.frombuffer(pattern.encode('ascii', 'replace'), dtype=np.uint8)]
+    if m == 0 or m > n or wanted.max() > 3:
+        return np.empty(0, dtype=np.int64)
+    codes = sequence.codes()
+    positions = np.flatnonzero(codes[:n - m + 1] == wanted[0])
+    for offset in range(1, m):
+        if positions.size == 0:
+            break
+        positions = positions[codes[positions + offset] == wanted[offset]]
+    mask = sequence.mask()
+    if mask is not None and positions.size:
+        covered = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+        positions = positions[covered[positions + m] == covered[positions]]
+    return positions
+
+
+def _pack(codes):
+    """Packs base codes (0-3) four to a byte, first base in the high bits."""
+    padded = np.zeros((len(codes) + 3) // 4 * 4, dtype=np.uint8)
+    padded[:len(codes)] = codes
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+
+
+def _find_runs(flags):
+    """Returns the (start, end) pairs of the runs of True values in a boolean array."""
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    return np.stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)), axis=1).astype(np.int64)
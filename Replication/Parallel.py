@@ -0,0 +1,225 @@
+# Parallel.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import replication
+from KmerCache import CachedCountKmers
+from KmerCounter import CountKmers, KmerCounts, MergeCounts
+from PackedSequence import MAX_CODE_K, PackedSequence
+
+# Genomes shorter than this are processed serially unless a chunk size is given explicitly
+MIN_PARALLEL_LENGTH = 1 << 20
+
+# Smallest shard handed to a worker when the chunk size is chosen automatically
+MIN_CHUNK_SIZE = 1 << 16
+
+# The worker process's attachment to the shared genome, set up once by _Attach
+_shared_genome = None
+
+# For a packed genome, the worker's PackedSequence view of the shared packed bytes
+_shared_packed = None
+
+
+def _Attach(name, layout):
+    """Pool initializer: attaches the worker to the shared-memory copy of the genome."""
+    global _shared_genome, _shared_packed
+    _shared_genome = shared_memory.SharedMemory(name=name)
+    if layout is not None:
+        length, n_runs = layout
+        packed = np.frombuffer(_shared_genome.buf, dtype=np.uint8, count=(length + 3) // 4)
+        _shared_packed = PackedSequence.from_packed(packed, length, n_runs)
+
+
+def _Shard(start, end, packed):
+    """Reads one shard of the shared genome, as a PackedSequence if the caller passed a packed genome."""
+    if packed:
+        return _shared_packed[start:end]
+    return bytes(_shared_genome.buf[start:end]).decode('latin-1')
+
+
+def _RunSharded(Text, overlap, task, args, workers, chunk_size):
+    """
+    Runs a task over overlapping shards of a genome in a process pool.
+
+    The genome is copied once into shared memory (a packed genome as its 2-bit bytes, with the N runs passed to
+    each worker once); workers attach to it when they start and read their shard from it, so only shard
+    coordinates and results are pickled. Shard i owns the positions
+    [i * chunk_size, (i + 1) * chunk_size) and extends `overlap` bases further so that every k-mer (or window)
+    starting in it is complete.
+
+    Args:
+        Text (str or PackedSequence): The genome.
+        overlap (int): The number of bases each shard extends past the positions it owns.
+        task (callable): A module-level function called as task(start, end, packed, *args) in a worker.
+        args (tuple): Extra arguments for the task.
+        workers (int, optional): The number of worker processes; defaults to the number of CPUs.
+        chunk_size (int, optional): The number of positions owned by each shard.
+
+    Returns:
+        list: (start, result) pairs, in genome order.
+    """
+    # A packed genome is shared as its packed bytes, without expanding it to text
+    packed = isinstance(Text, PackedSequence)
+    data = Text.packed if packed else Text.encode('latin-1')
+    layout = (len(Text), Text.n_runs) if packed else None
+    n = len(Text)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # Aim for a few shards per worker so that uneven shards even out
+        chunk_size = max(-(-n // (4 * workers)), MIN_CHUNK_SIZE)
+    shards = [(start, min(start + chunk_size + overlap, n)) for start in range(0, n, chunk_size)]
+
+    shared = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    try:
+        shared.buf[:len(data)] = data
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_Attach,
+                                 initargs=(shared.name, layout)) as pool:
+            futures = [pool.submit(task, start, end, packed, *args) for start, end in shards]
+            return [(start, future.result()) for (start, _), future in zip(shards, futures)]
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def _Serial(Text, workers, chunk_size):
+    """Tells whether a call is too small, restricted to one worker, or on an index, so not worth a process pool."""
+    if not isinstance(Text, (str, PackedSequence)):
+        return True
+    return workers == 1 or (chunk_size is None and len(Text) < MIN_PARALLEL_LENGTH)
+
+
+def _FrequencyMapTask(start, end, packed, k):
+    shard = _Shard(start, end, packed)
+    if len(shard) < k:
+        # No k-mer starts in a tail shorter than k; FrequencyMap would still key the whole string
+        return KmerCounts(k, np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64))
+    if k <= MAX_CODE_K:
+        # Counted directly rather than through the k-mer cache: an entry per shard would never be looked up
+        # again, and only the merged table, which the parent caches, is
+        try:
+            # Engine tables travel back as compact code/count pairs
+            return CountKmers(shard, k).to_sparse()
+        except ValueError:
+            # Text with characters other than ACGTN takes FrequencyMap's string path
+            pass
+    return replication.FrequencyMap(shard, k)
+
+
+def _PatternCountTask(start, end, packed, Pattern):
+    shard = _Shard(start, end, packed)
+    return replication.PatternCount(shard, Pattern) if len(shard) >= len(Pattern) else 0
+
+
+def _PatternMatchingTask(start, end, packed, Pattern):
+    shard = _Shard(start, end, packed)
+    return [start + position for position in replication.PatternMatching(Pattern, shard)]
+
+
+def _ClumpFinderTask(start, end, packed, k, L, t):
+    return replication.ClumpFinder(_Shard(start, end, packed), k, L, t)
+
+
+def _ShardedFrequencyMap(Text, k, workers, chunk_size):
+    """Counts the k-mers of every shard in the process pool and adds the shard tables up."""
+    results = [freq for _, freq in _RunSharded(Text, k - 1, _FrequencyMapTask, (k,), workers, chunk_size)]
+    if all(isinstance(freq, KmerCounts) for freq in results):
+        return MergeCounts(results)
+    # Some shard needed the string path, so the merged map is a plain dictionary
+    merged = {}
+    for freq in results:
+        for kmer, count in freq.items():
+            merged[kmer] = merged.get(kmer, 0) + count
+    return merged
+
+
+def ParallelFrequencyMap(Text, k, workers=None, chunk_size=None):
+    """
+    Generates the frequency map of FrequencyMap using several processes.
+
+    Args:
+        Text (str or PackedSequence): The text to analyze.
+        k (int): The length of substrings.
+        workers (int, optional): The number of worker processes; defaults to the number of CPUs.
+        chunk_size (int, optional): The number of k-mer start positions per shard; by default the text is cut
+            into a few shards per worker, and texts under MIN_PARALLEL_LENGTH are counted serially.
+
+    Returns:
+        dict or KmerCounts: Exactly the counts FrequencyMap returns.
+    """
+    if not Text or k <= 0 or _Serial(Text, workers, chunk_size):
+        # Small inputs, and the errors for invalid ones, are left to the serial function
+        return replication.FrequencyMap(Text, k)
+    if k <= MAX_CODE_K:
+        try:
+            # As in FrequencyMap, the table of the whole genome goes through the k-mer cache when it is enabled
+            return CachedCountKmers(Text, k, counter=lambda: _ShardedFrequencyMap(Text, k, workers, chunk_size))
+        except ValueError:
+            # The digest rejected text with characters other than ACGTN
+            pass
+    return _ShardedFrequencyMap(Text, k, workers, chunk_size)
+
+
+def ParallelPatternCount(Text, Pattern, workers=None, chunk_size=None):
+    """
+    Counts the occurrences of a pattern like PatternCount, using several processes.
+
+    Args:
+        Text (str or PackedSequence): The text string to search for occurrences of the pattern.
+        Pattern (str): The pattern string to search for in the text.
+        workers (int, optional): The number of worker processes; defaults to the number of CPUs.
+        chunk_size (int, optional): The number of start positions per shard.
+
+    Returns:
+        int: Exactly the count PatternCount returns.
+    """
+    if not Text or not Pattern or len(Pattern) > len(Text) or _Serial(Text, workers, chunk_size):
+        return replication.PatternCount(Text, Pattern)
+    results = _RunSharded(Text, len(Pattern) - 1, _PatternCountTask, (Pattern,), workers, chunk_size)
+    return sum(count for _, count in results)
+
+
+def ParallelPatternMatching(Pattern, Genome, workers=None, chunk_size=None):
+    """
+    Finds all occurrences of a pattern like PatternMatching, using several processes.
+
+    Args:
+        Pattern (str): The pattern string to search for.
+        Genome (str or PackedSequence): The genome string in which to search for the pattern.
+        workers (int, optional): The number of worker processes; defaults to the number of CPUs.
+        chunk_size (int, optional): The number of start positions per shard.
+
+    Returns:
+        list: Exactly the positions PatternMatching returns.
+    """
+    if not Pattern or not Genome or _Serial(Genome, workers, chunk_size):
+        return replication.PatternMatching(Pattern, Genome)
+    results = _RunSharded(Genome, len(Pattern) - 1, _PatternMatchingTask, (Pattern,), workers, chunk_size)
+    return [position for _, positions in results for position in positions]
+
+
+def ParallelClumpFinder(Genome, k, L, t, workers=None, chunk_size=None):
+    """
+    Finds k-mers forming (L, t)-clumps like ClumpFinder, using several processes.
+
+    Shards overlap by L-1 bases, so every window of length L lies entirely within one shard.
+
+    Args:
+        Genome (str or PackedSequence): The DNA sequence to analyze.
+        k (int): The length of the k-mers to search for.
+        L (int): The length of the sliding window.
+        t (int): The minimum number of occurrences required for a k-mer to form a clump.
+        workers (int, optional): The number of worker processes; defaults to the number of CPUs.
+        chunk_size (int, optional): The number of window start positions per shard.
+
+    Returns:
+        set: Exactly the k-mers ClumpFinder returns.
+    """
+    if not Genome or min(k, L, t) <= 0 or len(Genome) <= L or _Serial(Genome, workers, chunk_size):
+        return replication.ClumpFinder(Genome, k, L, t)
+    clumps = set()
+    for _, found in _RunSharded(Genome, L - 1, _ClumpFinderTask, (k, L, t), workers, chunk_size):
+        clumps |= found
+    return clumps
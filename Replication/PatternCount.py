@@ -1,3 +1,6 @@
+from ExactSearch import CountOccurrences
+
+
 def PatternCount(Text, Pattern):
     """
     Counts the occurrences of a given pattern in a text string.
@@ -20,13 +23,5 @@ def PatternCount(Text, Pattern):
     # If the pattern is longer than the text, it cannot occur
     if len(Pattern) > len(Text):
         raise ValueError("Pattern length cannot be greater than Text length")
-    # Initialize the count of occurrences to 0
-    count = 0
-    # Iterate through each possible starting position of a substring of length Pattern in Text
-    for i in range(len(Text) - len(Pattern) + 1):
-        # Check if the substring from position i to i + len(Pattern) (converted to lowercase) is equal to the given Pattern (converted to lowercase)
-        if Text[i:i+len(Pattern)].lower() == Pattern.lower():
-            # If equal, increment the count
-            count += 1
-    # Return the final count of occurrences
-    return count
+    # Count the occurrences regardless of case, without building a list of positions
+    return CountOccurrences(Text, Pattern, ignore_case=True)
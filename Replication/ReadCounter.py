@@ -0,0 +1,230 @@
+# ReadCounter.py
+import gzip
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from KmerCounter import CountAccumulator, CountKmers, DENSE_MAX_K
+from PackedSequence import MAX_CODE_K, encode
+
+# Number of file bytes parsed into one batch of reads
+DEFAULT_BATCH_SIZE = 1 << 22
+
+# Batches the reader thread may parse ahead of the counting
+QUEUE_BATCHES = 2
+
+# Offset of the FASTQ (Sanger / Illumina 1.8+) quality characters
+PHRED_OFFSET = 33
+
+# The first bytes of a gzip stream
+_GZIP_MAGIC = b'\x1f\x8b'
+
+# Put on the batch queue by the reader thread once the file is exhausted
+_DONE = object()
+
+'''
+K-mer counting over read sets: FASTQ or FASTA files, optionally gzip-compressed, holding many short reads.
+
+Joining the reads into one text would count false k-mers across every pair of neighbouring reads, so each batch
+of reads is encoded as one symbol array (see encode) with a masked symbol, 4, between consecutive reads. CountKmers
+never counts a k-mer covering a masked symbol, so no k-mer crosses a read boundary, and a batch of thousands of
+reads is counted in the same few vectorized passes as one long sequence. With a minimum quality, FASTQ bases
+whose Phred score is lower are masked the same way, so the k-mers covering them are dropped too.
+
+CountReads runs a pipeline of three stages:
+
+- A reader thread reads (and decompresses) the file in blocks of batch_size bytes and turns every block into one
+  batch, keeping an incomplete trailing record for the next block, so a read is never split between batches.
+  File reads and gzip decompression release the GIL, so reading overlaps the merging in the calling thread.
+- Worker processes count the k-mers of each batch and send back the table as sorted code/count pairs.
+- The calling thread merges the tables into one as they arrive.
+
+At most QUEUE_BATCHES parsed batches wait in the queue and two batches per worker are being counted, so memory
+is bounded by the batch size (and the longest read) rather than by the size of the file, apart from the table
+itself.
+'''
+
+
+def ReadBatches(path, batch_size=DEFAULT_BATCH_SIZE, min_quality=None):
+    """
+    Reads a FASTQ or FASTA file as batches of encoded reads.
+
+    The format is told from the first character of the file (@ or >), and gzip compression from its magic bytes.
+    FASTQ records must have four lines each; FASTA records may span several lines.
+
+    Args:
+        path (str): The path to the file.
+        batch_size (int): The number of file bytes parsed into each batch (larger if a record is longer).
+        min_quality (int, optional): Mask FASTQ bases whose Phred quality is below this.
+
+    Yields:
+        numpy.ndarray: The symbols of the reads of one batch, with a 4 (masked) before each read.
+
+    Raises:
+        ValueError: If the file is neither FASTQ nor FASTA, a FASTQ record is malformed, a read contains
+            characters other than A, C, G, T and N, or a minimum quality is given for a FASTA file.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer")
+    with open(path, 'rb') as handle:
+        compressed = handle.read(2) == _GZIP_MAGIC
+    with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as handle:
+        carry = handle.read(batch_size)
+        kind = carry.lstrip()[:1]
+        if kind == b'@':
+            parse, cut = _ParseFastq, _CutFastq
+        elif kind == b'>':
+            if min_quality is not None:
+                raise ValueError("Quality masking requires a FASTQ file")
+            parse, cut = _ParseFasta, _CutFasta
+        elif not kind:
+            return
+        else:
+            raise ValueError(f"{path} is neither a FASTQ nor a FASTA file")
+        while True:
+            block = handle.read(batch_size)
+            data = (carry + block).replace(b'\r', b'')
+            if not block:
+                break
+            records, carry = cut(data)
+            if records:
+                yield parse(records, min_quality)
+        records, _ = cut(data, final=True)
+        if records:
+            yield parse(records, min_quality)
+
+
+def CountReads(path, k, canonical=False, min_quality=None, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Counts the k-mers of every read in a FASTQ or FASTA file, never across read boundaries.
+
+    Args:
+        path (str): The path to the file, optionally gzip-compressed.
+        k (int): The length of the k-mers, at most MAX_CODE_K.
+        canonical (bool): Whether to count every k-mer together with its reverse complement.
+        min_quality (int, optional): Skip the k-mers covering a FASTQ base whose Phred quality is below this.
+        workers (int, optional): The number of worker processes; defaults to the number of CPUs. 1 counts in
+            this process (the file is still read by a separate thread).
+        batch_size (int): The number of file bytes per batch of reads.
+
+    Returns:
+        KmerCounts: The summed counts of the reads, equal to counting each read separately and adding up.
+
+    Raises:
+        ValueError: If k is out of range, or as ReadBatches.
+    """
+    if k <= 0 or k > MAX_CODE_K:
+        raise ValueError(f"k must be between 1 and {MAX_CODE_K}")
+    workers = workers or os.cpu_count() or 1
+    batches = queue.Queue(maxsize=QUEUE_BATCHES)
+    stop = threading.Event()
+    reader = threading.Thread(target=_Produce, args=(path, batch_size, min_quality, batches, stop), daemon=True)
+    reader.start()
+    total = CountAccumulator(k, dense=k <= DENSE_MAX_K and 4 ** k <= 16 * batch_size)
+    try:
+        if workers == 1:
+            for batch in _Consume(batches):
+                total.add(_CountBatch(batch, k, canonical))
+            return total.result()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for batch in _Consume(batches):
+                pending.add(pool.submit(_CountBatch, batch, k, canonical))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        total.add(future.result())
+            for future in pending:
+                total.add(future.result())
+        return total.result()
+    finally:
+        stop.set()
+        reader.join()
+
+
+def _Produce(path, batch_size, min_quality, batches, stop):
+    """Reader thread: parses the file into the batch queue, then puts _DONE (or the error that stopped it)."""
+    try:
+        for batch in ReadBatches(path, batch_size, min_quality):
+            if not _Put(batches, batch, stop):
+                return
+        item = _DONE
+    except Exception as e:
+        item = e
+    _Put(batches, item, stop)
+
+
+def _Put(batches, item, stop):
+    """Puts an item on the queue unless the consumer has stopped; returns whether it was put."""
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _Consume(batches):
+    """Yields the batches from the reader thread, re-raising its error if it failed."""
+    while True:
+        item = batches.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def _CountBatch(batch, k, canonical):
+    """Counts one batch; the table travels back as compact code/count pairs."""
+    return CountKmers(batch, k, canonical=canonical).to_sparse()
+
+
+def _CutFastq(data, final=False):
+    """Splits parsed-ahead data into its complete four-line records and the rest; returns (lines, rest)."""
+    lines = data.split(b'\n')
+    if final:
+        while lines and not lines[-1]:
+            lines.pop()
+        if len(lines) % 4:
+            raise ValueError("Truncated FASTQ record at the end of the file")
+        return lines, b''
+    # The last element is an incomplete line (or empty after a final newline)
+    complete = len(lines) - 1
+    usable = complete - complete % 4
+    return lines[:usable], b'\n'.join(lines[usable:])
+
+
+def _CutFasta(data, final=False):
+    """Splits data at the start of its last record, which may continue in the next block; returns (data, rest)."""
+    if final:
+        return data, b''
+    cut = data.rfind(b'\n>')
+    if cut < 0:
+        return b'', data
+    return data[:cut + 1], data[cut + 1:]
+
+
+def _ParseFastq(lines, min_quality):
+    """Encodes complete FASTQ records (a list of lines) into one batch."""
+    reads, qualities = lines[1::4], lines[3::4]
+    if not all(line[:1] == b'@' for line in lines[0::4]) or not all(line[:1] == b'+' for line in lines[2::4]):
+        raise ValueError("Malformed FASTQ record: expected @header, sequence, +, quality lines")
+    if list(map(len, reads)) != list(map(len, qualities)):
+        raise ValueError("FASTQ quality and sequence lengths differ")
+    # A leading N masks the boundary before every read
+    symbols = encode(b'N' + b'N'.join(reads), ignore_whitespace=False)
+    if min_quality is not None:
+        scores = np.frombuffer(b'!' + b'!'.join(qualities), dtype=np.uint8).astype(np.int16) - PHRED_OFFSET
+        symbols[scores < min_quality] = 4
+    return symbols
+
+
+def _ParseFasta(data, min_quality):
+    """Encodes complete FASTA records into one batch, with each header line replaced by a masked base."""
+    lines = data.split(b'\n')
+    return encode(b''.join(b'N' if line[:1] == b'>' else line for line in lines))
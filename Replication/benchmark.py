@@ -0,0 +1,342 @@
+# benchmark.py
+import argparse
+import contextlib
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# The repository root, the FrequentPatterns data directory and the assignment sources
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_DIR, 'assignments', 'FrequentPatterns', 'data')
+ASSIGNMENT_SOURCES = os.path.join('src', 'main', 'python', 'edu', 'yu', 'bioinfo')
+
+# Lengths of the seeded synthetic genomes, by dataset suffix
+SYNTHETIC_SIZES = {'10k': 10 ** 4, '100k': 10 ** 5, '1M': 10 ** 6, '10M': 10 ** 7, '100M': 10 ** 8}
+
+# Datasets run when none are named; the larger synthetic genomes are opt-in
+DEFAULT_DATASETS = ('vibrio_cholerae', 'rosalind_ba1a', 'rosalind_ba1b', 'synthetic_10k', 'synthetic_1M')
+
+# Relative slowdown (or peak RSS growth) tolerated by --compare before a result counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# The DnaA box of Vibrio cholerae, used as the search pattern
+PATTERN = 'ATGATCAAG'
+
+# Length of the motifs cut from a genome for the motif benchmarks
+MOTIF_LENGTH = 20
+
+# Size of the promoter sets cut from a genome for the motif search benchmarks: t strings of PROMOTER_LENGTH
+PROMOTER_COUNT = 25
+PROMOTER_LENGTH = 500
+
+# Longest genome handed to the benchmarks that still loop in pure Python
+PURE_PYTHON_MAX_LENGTH = 10 ** 7
+
+
+def SyntheticGenome(length, seed=0):
+    """
+    Generates a reproducible random genome.
+
+    Args:
+        length (int): The number of bases.
+        seed (int): The random seed.
+
+    Returns:
+        str: The genome, in upper case.
+    """
+    bases = np.frombuffer(b'ACGT', dtype=np.uint8)
+    return bases[np.random.default_rng(seed).integers(0, 4, length)].tobytes().decode('ascii')
+
+
+def LoadDataset(name):
+    """
+    Loads a benchmark genome by name.
+
+    Args:
+        name (str): 'vibrio_cholerae', 'rosalind_ba1a', 'rosalind_ba1b' (the text of a Rosalind fixture), or
+            'synthetic_<size>' with a size from SYNTHETIC_SIZES.
+
+    Returns:
+        str: The genome.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name.startswith('synthetic_') and name[len('synthetic_'):] in SYNTHETIC_SIZES:
+        return SyntheticGenome(SYNTHETIC_SIZES[name[len('synthetic_'):]])
+    files = {'vibrio_cholerae': 'Vibrio_cholerae.txt', 'rosalind_ba1a': 'rosalind_ba1a.txt',
+             'rosalind_ba1b': 'rosalind_ba1b.txt'}
+    if name not in files:
+        raise ValueError(f"Unknown dataset: {name}")
+    with open(os.path.join(DATA_DIR, files[name])) as handle:
+        # The fixtures hold the text on their first line, followed by the problem parameters
+        return handle.readline().strip()
+
+
+def _LoadAssignment(assignment, module):
+    """
+    Imports a module from an assignment's sources.
+
+    This runs in the fresh worker process of a single measurement. The assignment directory goes first on the
+    path, because its modules import siblings (PatternCount) whose names also exist in this directory.
+    """
+    directory = os.path.join(REPO_DIR, 'assignments', assignment, ASSIGNMENT_SOURCES)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return importlib.import_module(module)
+
+
+def _Motifs(genome):
+    """Cuts a genome into consecutive motifs of MOTIF_LENGTH bases."""
+    return [genome[i:i + MOTIF_LENGTH] for i in range(0, len(genome) - MOTIF_LENGTH + 1, MOTIF_LENGTH)]
+
+
+def _Promoters(genome):
+    """Cuts up to PROMOTER_COUNT consecutive strings of PROMOTER_LENGTH bases from the start of a genome."""
+    end = min(len(genome), PROMOTER_COUNT * PROMOTER_LENGTH) - PROMOTER_LENGTH + 1
+    return [genome[i:i + PROMOTER_LENGTH] for i in range(0, max(end, 1), PROMOTER_LENGTH)]
+
+
+def _PatternCount(genome):
+    import replication
+    return (lambda: replication.PatternCount(genome, PATTERN)), len(genome)
+
+
+def _FrequencyMap(genome):
+    import replication
+    return (lambda: replication.FrequencyMap(genome, 9)), len(genome)
+
+
+def _FrequentWords(genome):
+    import replication
+    return (lambda: replication.FrequentWords(genome, 9)), len(genome)
+
+
+def _SketchFrequentWords(genome):
+    import replication
+    return (lambda: replication.SketchFrequentWords(genome, 20, 10)), len(genome)
+
+
+def _ReverseComplement(genome):
+    import replication
+    return (lambda: replication.ReverseComplement(genome)), len(genome)
+
+
+def _PatternMatching(genome):
+    import replication
+    return (lambda: replication.PatternMatching(PATTERN, genome)), len(genome)
+
+
+def _ClumpFinder(genome):
+    import replication
+    return (lambda: replication.ClumpFinder(genome, 9, 500, 3)), len(genome)
+
+
+def _KmpPatternSearch(genome):
+    from KMP_PatternSearch import kmp_pattern_search
+    return (lambda: kmp_pattern_search(genome, PATTERN)), len(genome)
+
+
+def _BetterFrequentWords(genome):
+    FrequentWords = _LoadAssignment('FrequentPatterns', 'FrequentWords')
+    return (lambda: FrequentWords.BetterFrequentWords(genome, 9)), len(genome)
+
+
+def _ProfileWithPseudocounts(genome):
+    Pseudocounts = _LoadAssignment('Motifs', 'Pseudocounts')
+    motifs = _Motifs(genome)
+    return (lambda: Pseudocounts.ProfileWithPseudocounts(motifs)), sum(map(len, motifs))
+
+
+def _GreedyMotifSearch(genome):
+    GreedyMotifSearch = _LoadAssignment('Motifs', 'GreedyMotifSearch')
+    promoters = _Promoters(genome)
+    return (lambda: GreedyMotifSearch.GreedyMotifSearchWithPseudocounts(promoters, 12, len(promoters),
+                                                                        workers=1)), sum(map(len, promoters))
+
+
+def _RandomizedMotifSearch(genome):
+    RandomizedMotifSearch = _LoadAssignment('Motifs', 'RandomizedMotifSearch')
+    promoters = _Promoters(genome)
+    return (lambda: RandomizedMotifSearch.RandomizedMotifSearch(promoters, 12, len(promoters), restarts=100, seed=0,
+                                                                workers=1)), sum(map(len, promoters))
+
+
+def _GibbsSampler(genome):
+    GibbsSampler = _LoadAssignment('Motifs', 'GibbsSampler')
+    promoters = _Promoters(genome)
+    return (lambda: GibbsSampler.GibbsSampler(promoters, 12, len(promoters), 200, restarts=10, seed=0,
+                                              workers=1)), sum(map(len, promoters))
+
+
+def _MedianString(genome):
+    MedianString = _LoadAssignment('Motifs', 'MedianString')
+    promoters = _Promoters(genome)
+    return (lambda: MedianString.MedianString(promoters, 10)), sum(map(len, promoters))
+
+
+# Every benchmark: name -> (setup returning the timed callable and the number of bases it processes, longest
+# genome it is run on)
+BENCHMARKS = {
+    'PatternCount': (_PatternCount, None),
+    'FrequencyMap': (_FrequencyMap, None),
+    'FrequentWords': (_FrequentWords, None),
+    'SketchFrequentWords': (_SketchFrequentWords, None),
+    'ReverseComplement': (_ReverseComplement, None),
+    'PatternMatching': (_PatternMatching, None),
+    'ClumpFinder': (_ClumpFinder, None),
+    'kmp_pattern_search': (_KmpPatternSearch, PURE_PYTHON_MAX_LENGTH),
+    'BetterFrequentWords': (_BetterFrequentWords, None),
+    'ProfileWithPseudocounts': (_ProfileWithPseudocounts, PURE_PYTHON_MAX_LENGTH),
+    'GreedyMotifSearch': (_GreedyMotifSearch, None),
+    'RandomizedMotifSearch': (_RandomizedMotifSearch, None),
+    'GibbsSampler': (_GibbsSampler, None),
+    'MedianString': (_MedianString, None),
+}
+
+
+def _Measure(benchmark, dataset, repeat):
+    """
+    Times one benchmark on one dataset; run in a fresh process so that the peak RSS is its own.
+
+    Returns:
+        dict: The result record, with 'skipped' set if the genome is longer than the benchmark allows.
+    """
+    setup, max_length = BENCHMARKS[benchmark]
+    genome = LoadDataset(dataset)
+    result = {'benchmark': benchmark, 'dataset': dataset, 'bases': len(genome)}
+    if max_length is not None and len(genome) > max_length:
+        result['skipped'] = True
+        return result
+    # The motif benchmarks only read a few promoters cut from the genome, so their throughput is over those bases
+    run, result['bases'] = setup(genome)
+    timings = []
+    # Some functions print their intermediate results; keep them out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    result.update({'seconds': seconds, 'bases_per_second': result['bases'] / seconds if seconds > 0 else None,
+                   'peak_rss_bytes': peak})
+    return result
+
+
+def RunBenchmarks(benchmarks, datasets, repeat=3, progress=None):
+    """
+    Runs every benchmark on every dataset, each measurement in its own worker process.
+
+    Args:
+        benchmarks (list): Names from BENCHMARKS.
+        datasets (list): Dataset names understood by LoadDataset.
+        repeat (int): The number of timed runs per measurement; the fastest one is reported.
+        progress (file, optional): Where to write one line per finished measurement.
+
+    Returns:
+        dict: The report: 'meta' describes the machine and 'results' lists one record per measurement.
+
+    Raises:
+        ValueError: If a benchmark name is unknown.
+    """
+    unknown = [name for name in benchmarks if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for dataset in datasets:
+        for benchmark in benchmarks:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_Measure, benchmark, dataset, repeat).result()
+            results.append(result)
+            if progress is not None:
+                print(_Describe(result), file=progress, flush=True)
+    meta = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'repeat': repeat, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+    return {'meta': meta, 'results': results}
+
+
+def CompareResults(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Finds the measurements that regressed against a baseline report.
+
+    A measurement regresses when its throughput falls below (1 - tolerance) times the baseline's, or its peak
+    RSS grows above (1 + tolerance) times the baseline's. Measurements missing from either report are ignored.
+
+    Args:
+        results (dict): The current report from RunBenchmarks.
+        baseline (dict): The stored report to compare against.
+        tolerance (float): The relative change tolerated.
+
+    Returns:
+        list: One message per regression.
+    """
+    previous = {(result['benchmark'], result['dataset']): result
+                for result in baseline['results'] if not result.get('skipped')}
+    regressions = []
+    for result in results['results']:
+        before = previous.get((result['benchmark'], result['dataset']))
+        if before is None or result.get('skipped'):
+            continue
+        name = f"{result['benchmark']} on {result['dataset']}"
+        if before['bases_per_second'] and result['bases_per_second'] is not None and \
+                result['bases_per_second'] < (1 - tolerance) * before['bases_per_second']:
+            regressions.append(f"{name}: {result['bases_per_second']:.3g} bases/s, "
+                               f"baseline {before['bases_per_second']:.3g}")
+        if result['peak_rss_bytes'] > (1 + tolerance) * before['peak_rss_bytes']:
+            regressions.append(f"{name}: peak RSS {result['peak_rss_bytes'] / 2 ** 20:.1f} MiB, "
+                               f"baseline {before['peak_rss_bytes'] / 2 ** 20:.1f} MiB")
+    return regressions
+
+
+def _Describe(result):
+    """Formats one result record as a line of the progress report."""
+    name = f"{result['benchmark']:<24} {result['dataset']:<16} {result['bases']:>11,} bases"
+    if result.get('skipped'):
+        return f"{name}  skipped"
+    return (f"{name}  {result['seconds']:10.4f} s  {result['bases_per_second'] or 0:14,.0f} bases/s  "
+            f"{result['peak_rss_bytes'] / 2 ** 20:8.1f} MiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times the replication and motif functions.")
+    parser.add_argument('--benchmarks', default=','.join(BENCHMARKS),
+                        help="comma-separated benchmark names (default: all)")
+    parser.add_argument('--datasets', default=','.join(DEFAULT_DATASETS),
+                        help="comma-separated datasets: vibrio_cholerae, rosalind_ba1a, rosalind_ba1b, "
+                             f"synthetic_<{'|'.join(SYNTHETIC_SIZES)}>")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per measurement (default: 3)")
+    parser.add_argument('--output', help="write the JSON report to this file instead of standard output")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON report to check for regressions against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"relative change tolerated by --compare (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+
+    report = RunBenchmarks(args.benchmarks.split(','), args.datasets.split(','), args.repeat, sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = CompareResults(report, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,31 @@
 #Replication.py
 from collections import Counter
 
+import numpy as np
+
+import Instrumentation
+from ApproximateMatching import ApproximateSearch
+from ClumpEngine import FindClumps
+from ExactSearch import CountOccurrences, FindOccurrences
+from FMIndex import FMIndex
+from GenomeReader import DEFAULT_CHUNK_SIZE, GenomeReader
+from GenomeSession import Genome as GenomeSession
+from HeavyHitters import DEFAULT_DEPTH, DEFAULT_WIDTH, TopKmers
+from KmerCache import CachedCountKmers
+from KmerCounter import CountKmers, KmerCounts, StrandCounts
+from Neighborhoods import CountWithMismatches
+from PackedSequence import PackedSequence, find_pattern, is_acgt, MAX_CODE_K
+
+@Instrumentation.timed()
 def PatternCount(Text, Pattern):
     """
     Counts the occurrences of a given pattern in a text string.
 
     Args:
-        Text (str): The text string to search for occurrences of the pattern.
+        Text (str, PackedSequence, FMIndex or Genome): The text string to search for occurrences of the pattern.
+            Pass an FMIndex built from the text to answer repeated queries without rescanning it; a Genome is
+            searched through its index if one is cached, and through its packed encoding otherwise, except for
+            patterns containing an N, which those never match.
         Pattern (str): The pattern string to search for in the text.
 
     Returns:
@@ -23,36 +42,89 @@ def PatternCount(Text, Pattern):
     # If the pattern is longer than the text, it cannot occur
     if len(Pattern) > len(Text):
         raise ValueError("Pattern length cannot be greater than Text length")
-    # Initialize the count of occurrences to 0
-    count = 0
-    # Iterate through each possible starting position of a substring of length Pattern in Text
-    for i in range(len(Text) - len(Pattern) + 1):
-        # Check if the substring from position i to i + len(Pattern) (converted to lowercase) is equal to the given Pattern (converted to lowercase)
-        if Text[i:i+len(Pattern)].lower() == Pattern.lower():
-            # If equal, increment the count
-            count += 1
-    # Return the final count of occurrences
-    return count
-
-def FrequencyMap(Text, k):
+    windows = len(Text) - len(Pattern) + 1
+    if isinstance(Text, GenomeSession):
+        # The count is case-insensitive either way, but only the text matches an N like any other letter
+        Text = (Text.peek(('index',)) or Text.sequence) if is_acgt(Pattern.upper()) else Text.text
+    # An index answers the count by backward search, without looking at the text at all
+    if isinstance(Text, FMIndex):
+        if Instrumentation._enabled:
+            Instrumentation.count('replication.PatternCount', allocations_avoided=windows)
+        return Text.count(Pattern)
+    # A packed text is already case-normalized, so its occurrences can be found by comparing integer codes
+    if isinstance(Text, PackedSequence):
+        if Instrumentation._enabled:
+            Instrumentation.count('replication.PatternCount', positions=windows, allocations_avoided=windows)
+        return len(find_pattern(Text, Pattern))
+    # The engine scans the text without making a slice or lower-case copy per window
+    if Instrumentation._enabled:
+        Instrumentation.count('replication.PatternCount', positions=windows, allocations_avoided=3 * windows)
+    return CountOccurrences(Text, Pattern, ignore_case=True)
+
+@Instrumentation.timed()
+def FrequencyMap(Text, k, canonical=False, strands=False):
     """
     Generates a frequency map of substrings of length 'k' in the given text using a sliding window approach.
 
+    Nucleotide text (A, C, G, T and N in any case) is counted by the integer k-mer engine in KmerCounter; any
+    other text is counted by slicing out each window.
+
+    In canonical mode each window is counted together with its reverse complement, under whichever of the two
+    comes first lexicographically, so both strands are counted in one pass over the text.
+
     Args:
-        Text (str): The text to analyze.
+        Text (str, PackedSequence or Genome): The text to analyze. The tables of a Genome are cached, so asking
+            again for the same k is free.
         k (int): The length of substrings.
+        canonical (bool): Whether to count strand-agnostic, canonical k-mers.
+        strands (bool): In canonical mode, whether to also return the counts of each strand.
 
     Returns:
-        dict: A dictionary where keys are substrings of length 'k' and values are their frequencies.
+        dict, KmerCounts or StrandCounts: A dictionary (or dict-compatible KmerCounts view) where keys are
+            substrings of length 'k' and values are their frequencies. With strands, a StrandCounts holding the
+            total, forward-strand and reverse-strand maps. A KmerCounts lists its k-mers in lexicographic order,
+            not in the order they first occur in the text as the dictionary does.
         
     Raises:
-        ValueError: If Text is empty or k is non-positive.
+        ValueError: If Text is empty, k is non-positive, strands is set without canonical, or canonical
+            counting meets characters other than A, C, G, T and N.
     """
     # Check for empty input or invalid value of k
     if not Text:
         raise ValueError("Text must not be empty")
     if k <= 0:
         raise ValueError("k must be a positive integer")
+    if strands and not canonical:
+        raise ValueError("Per-strand counts require canonical counting")
+    if isinstance(Text, GenomeSession):
+        if Text.nucleotide and k <= MAX_CODE_K and not strands:
+            freq = Text.frequency_map(k, canonical)
+            if Instrumentation._enabled:
+                Instrumentation.observe('replication.FrequencyMap', table_size=len(freq))
+            return freq
+        # Per-strand counts of a genome with an N come from its text, which keeps the k-mers containing one
+        Text = Text.text if Text.masked else Text.sequence
+    # Count nucleotide text by rolling integer k-mer codes instead of slicing out strings
+    if isinstance(Text, PackedSequence) and k > MAX_CODE_K:
+        Text = str(Text)
+    if k <= MAX_CODE_K:
+        try:
+            if strands:
+                freq = CountKmers(Text, k, canonical=True, strands=True)
+            else:
+                # Tables of genomes counted before are read back from the disk cache, when it is enabled
+                freq = CachedCountKmers(Text, k, canonical=canonical)
+            # Sizing a dense table lists its k-mers, so only do it while recording
+            if Instrumentation._enabled:
+                Instrumentation.count('replication.FrequencyMap', positions=len(Text),
+                                      allocations_avoided=max(len(Text) - k + 1, 0))
+                Instrumentation.observe('replication.FrequencyMap', table_size=len(freq.total if strands else freq))
+            return freq
+        except ValueError:
+            # Text with characters other than ACGTN is counted by the string windows below
+            pass
+    if canonical:
+        return _CanonicalFrequencyMap(Text, k, strands)
 
     freq = {}  # Initialize frequency map
     # Initialize the sliding window with the first k characters
@@ -66,6 +138,11 @@ def FrequencyMap(Text, k):
         # Update the frequency count for the current window
         freq[window] = freq.get(window, 0) + 1
 
+    # Every window makes a slice and an upper-case copy
+    windows = max(len(Text) - k + 1, 0)
+    if Instrumentation._enabled:
+        Instrumentation.count('replication.FrequencyMap', positions=len(Text), allocations_made=2 * windows)
+        Instrumentation.observe('replication.FrequencyMap', table_size=len(freq))
     return freq  # Return the frequency map
 
 
@@ -77,12 +154,18 @@ def MaxMap(freqMap):
     - freqMap (dict): A map (dictionary) with keys as strings and values as integers.
 
     Returns:
-    - tuple: A tuple containing the maximum value, kmers with that value, and their length.
+    - tuple: A tuple containing the maximum value, kmers with that value, and their length. The kmers of a
+      KmerCounts are in lexicographic order; those of a dictionary, in its insertion order.
     """
-    max_value = max(
-        freqMap.values())  # Find the maximum value in the dictionary
-    # Find kmers with maximum value
-    max_kmers = [kmer for kmer, count in freqMap.items() if count == max_value]
+    if isinstance(freqMap, KmerCounts) and freqMap:
+        # Count tables from the k-mer engine find their maximum with array operations
+        max_value = freqMap.max_count()
+        max_kmers = freqMap.most_frequent()
+    else:
+        max_value = max(
+            freqMap.values())  # Find the maximum value in the dictionary
+        # Find kmers with maximum value
+        max_kmers = [kmer for kmer, count in freqMap.items() if count == max_value]
     kmer_length = len(max_kmers[0])  # Get the length of the kmers
     print(f"The maximum value is: {max_value}")
     print(f"The kmers with the maximum value are: {max_kmers}")
@@ -90,13 +173,32 @@ def MaxMap(freqMap):
     # Return the maximum value, kmers, and their length as a tuple
     return max_value, max_kmers, kmer_length
 
-def FrequentWords(Text, k):
+def _CanonicalFrequencyMap(Text, k, strands):
+    """Counts canonical k-mers by slicing out each window, for k-mers too long for an integer code."""
+    forward, reverse = {}, {}
+    for i in range(len(Text) - k + 1):
+        window = Text[i:i + k].upper()
+        complement = ReverseComplement(window)
+        # Count the window under the smaller of the two strands, and on the strand it was read from
+        if complement < window:
+            reverse[complement] = reverse.get(complement, 0) + 1
+        else:
+            forward[window] = forward.get(window, 0) + 1
+    total = dict(forward)
+    for kmer, count in reverse.items():
+        total[kmer] = total.get(kmer, 0) + count
+    return StrandCounts(total, forward, reverse) if strands else total
+
+@Instrumentation.timed()
+def FrequentWords(Text, k, canonical=False):
     """
     Finds the most frequent substrings of length 'k' in the given text.
     
     Args:
-        Text (str): The text to analyze.
+        Text (str, PackedSequence or Genome): The text to analyze.
         k (int): The length of substrings.
+        canonical (bool): Whether to count each substring together with its reverse complement, returning
+            canonical substrings (in upper case).
         
     Returns:
         list: A list of the most frequent substrings of length 'k'.
@@ -105,89 +207,269 @@ def FrequentWords(Text, k):
     if not Text:
         return []
     # Generate frequency map of substrings of length 'k'
-    # Convert text to lowercase for case-insensitive comparison
-    freq = FrequencyMap(Text.lower(), k)
+    # Convert text to lowercase for case-insensitive comparison (a packed text or Genome is already normalized)
+    freq = FrequencyMap(Text if isinstance(Text, (PackedSequence, GenomeSession)) else Text.lower(), k, canonical)
+    # A text shorter than k has no substrings of length 'k'
+    if not freq:
+        return []
     # Find maximum frequency
-    # Get the maximum frequency value, or 0 if the map is empty
-    max_freq, _, _ = MaxMap(freq)
-    # Use list comprehension to filter frequent words
-    frequent_words = [key for key, value in freq.items() if value == max_freq]
+    # MaxMap already returns the substrings that reach the maximum frequency
+    _, frequent_words, _ = MaxMap(freq)
     # Return the list of most frequent substrings
     return frequent_words
 
+@Instrumentation.timed()
+def SketchFrequentWords(Text, k, n=1, width=DEFAULT_WIDTH, depth=DEFAULT_DEPTH, verify=True,
+                        canonical=False):
+    """
+    Finds the n most frequent substrings of length 'k' in bounded memory.
+
+    FrequentWords builds an exact table of every distinct k-mer, which for long k-mers on large inputs holds
+    about one entry per base. This variant keeps a Count-Min sketch of width x depth counters and a fixed
+    number of candidates instead (see TopKmers), so its memory does not grow with the number of distinct
+    k-mers. With verify, the text is read a second time to count the candidates exactly; use TopKmers
+    directly to get the counts and the error bound of the estimates.
 
+    Args:
+        Text (str, PackedSequence, Genome or GenomeReader): The text; a string may contain A, C, G, T and N in
+            any case.
+        k (int): The length of substrings, at most MAX_CODE_K.
+        n (int): The number of substrings to return.
+        width (int): The number of counters per sketch row.
+        depth (int): The number of sketch rows.
+        verify (bool): Whether to rank the candidates by their exact counts.
+        canonical (bool): Whether to count each substring together with its reverse complement.
+
+    Returns:
+        list: Up to n substrings (upper case), most frequent first.
+
+    Raises:
+        ValueError: If k is out of range, n is not positive, or the text contains characters other than
+            A, C, G, T and N.
+    """
+    if isinstance(Text, GenomeSession):
+        Text = Text.sequence
+    hitters = TopKmers(Text, k, n, width, depth, verify=verify, canonical=canonical)
+    if Instrumentation._enabled:
+        Instrumentation.observe('replication.SketchFrequentWords', table_size=width * depth)
+    return hitters.kmers
+
+
+# Complement of every byte: A, C, G, T and N in either case map to their upper-case complement, anything else
+# to 0, which marks the pattern as invalid
+_COMPLEMENT = bytearray(256)
+for _base, _complement in zip(b'ACGTNacgtn', b'TGCANTGCAN'):
+    _COMPLEMENT[_base] = _complement
+_COMPLEMENT = bytes(_COMPLEMENT)
+
+# Not timed: the wrapper alone would add about a tenth of the cost of complementing a single k-mer
 def ReverseComplement(Pattern):
     """
     Finds the reverse complement of a DNA sequence pattern.
 
+    A string or bytes pattern is complemented with one bytes.translate over a 256-entry table and then
+    reversed; a packed pattern is complemented byte by byte through a lookup array. Either way the pattern is
+    checked for invalid bases in a single scan rather than base by base.
+
     Args:
-        Pattern (str): The DNA sequence pattern.
+        Pattern (str, bytes, bytearray, PackedSequence or Genome): The DNA sequence pattern.
     Returns:
-        str: The reverse complement of the input pattern.
+        str, bytes, bytearray or PackedSequence: The (upper-case) reverse complement of the input pattern, of the same type
+            as the input. The reverse complement of a Genome is a string, computed once and cached.
     Raises:
         ValueError: If the input pattern contains invalid nucleotides or is empty.
     """
-    # Set of valid nucleotides
-    valid_nucleotides = {'A', 'T', 'C', 'G', 'N'}
-
-    # Create a dictionary to store the complement of each nucleotide
-    complement_dict = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C', 'N': 'N'}
-
     # Check if the input pattern is empty
     if not Pattern:
         raise ValueError("Input pattern cannot be empty")
 
-    # Initialize a list to store the reverse complement
-    reverse_complement = []
+    if isinstance(Pattern, GenomeSession):
+        return Pattern.cached(('reverse_complement',), lambda: ReverseComplement(Pattern.text))
+    # A packed sequence was validated when it was encoded, so it can be complemented code by code
+    if isinstance(Pattern, PackedSequence):
+        return Pattern.reverse_complement()
+
+    try:
+        data = Pattern if isinstance(Pattern, (bytes, bytearray)) else Pattern.encode('latin-1')
+    except UnicodeEncodeError:
+        raise ValueError("Invalid nucleotide in the input pattern") from None
+    complemented = data.translate(_COMPLEMENT)
+    # Any invalid base was translated to 0
+    if 0 in complemented:
+        raise ValueError("Invalid nucleotide in the input pattern")
+    reverse_complement = complemented[::-1]
+    # translate and slicing keep the type of bytes and bytearray input
+    return reverse_complement if isinstance(Pattern, (bytes, bytearray)) else reverse_complement.decode('ascii')
+
+
+@Instrumentation.timed()
+def PatternMatching(Pattern, Genome):
+    """
+    Finds all occurrences of a pattern in a genome 
 
-    # Iterate through the input pattern in reverse order
-    for base in reversed(Pattern.upper()):
-        # Check if the current nucleotide is valid
-        if base not in valid_nucleotides:
-            raise ValueError("Invalid nucleotide in the input pattern")
+    Occurrences may overlap. A string genome is searched by the exact-search engine in ExactSearch.py, which
+    matches short and repetitive patterns with vectorized column comparisons and others with a str.find loop,
+    so no substring is made per position.
 
-        # Find the complement of each nucleotide and append it to the reverse complement list
-        reverse_complement.append(complement_dict[base])
+    Args:
+        Pattern (str): The pattern string to search for.
+        Genome (str, PackedSequence, FMIndex or Genome): The genome string in which to search for the pattern.
+            A packed or indexed genome is upper-case, so the pattern is matched case-insensitively against it. A
+            Genome gives the positions its text would as a string: it is searched through its index if one is
+            cached, or its packed encoding, for an upper-case ACGT pattern on a genome that was upper-case, and
+            as a string otherwise.
 
-    # Join the reverse complement list and return the result
-    return ''.join(reverse_complement)
+    Returns:
+        list: A list containing the starting positions of all occurrences of the pattern in the genome.
 
+    Raises:
+        ValueError: If the pattern or genome is empty.
+    """
+    if not Pattern or not Genome:
+        raise ValueError("Pattern and Genome must not be empty")
 
-def PatternMatching(Pattern, Genome):
+    if isinstance(Genome, GenomeSession):
+        # The index and the packed encoding ignore case and never match an N, unlike the string search
+        if not Genome.lower_case and is_acgt(Pattern):
+            Genome = Genome.peek(('index',)) or Genome.sequence
+        else:
+            Genome = Genome.original
+    # An index locates the occurrences from its suffix array instead of scanning the genome
+    if isinstance(Genome, FMIndex):
+        return Genome.locate(Pattern).tolist()
+    if Instrumentation._enabled:
+        Instrumentation.count('replication.PatternMatching', positions=max(len(Genome) - len(Pattern) + 1, 0))
+    # Search a packed genome by comparing integer codes
+    if isinstance(Genome, PackedSequence):
+        return find_pattern(Genome, Pattern).tolist()
+
+    # Overlapping occurrences are found by the exact-search engine, which picks the scan for the query
+    return FindOccurrences(Genome, Pattern)
+
+def HammingDistance(p, q):
     """
-    Finds all occurrences of a pattern in a genome 
+    Computes the Hamming distance between two strings of equal length.
+
+    Args:
+        p (str): The first string.
+        q (str): The second string.
 
-    The generator expression iterates over the range of possible starting positions 
-    in the genome, yielding each position if the pattern is found starting from that 
-    position. By using a generator expression, the function avoids creating a large 
-    list of positions in memory, making it more memory-efficient, especially for large genomes.
+    Returns:
+        int: The number of positions at which the strings differ.
+
+    Raises:
+        ValueError: If the strings have different lengths.
+    """
+    if len(p) != len(q):
+        raise ValueError("Strings must have the same length")
+    # Count the positions where the characters differ
+    return sum(1 for a, b in zip(p, q) if a != b)
+
+@Instrumentation.timed()
+def ApproximatePatternMatching(Pattern, Genome, d, index=None):
+    """
+    Finds all positions where a pattern occurs in a genome with at most d mismatches.
+
+    Nucleotide genomes are searched by the engine in ApproximateMatching, which picks a bit-parallel scan or
+    pigeonhole seed-and-verify (using `index`, if given) for the pattern. Other text is compared window by
+    window with HammingDistance. Matching is case-insensitive.
 
     Args:
         Pattern (str): The pattern string to search for.
-        Genome (str): The genome string in which to search for the pattern.
+        Genome (str, PackedSequence or Genome): The genome string in which to search for the pattern. The
+            cached index of a Genome, if any, is used as `index`.
+        d (int): The maximum number of mismatches.
+        index (FMIndex, optional): An index of the genome, used for seed lookups on long patterns.
 
     Returns:
-        list: A list containing the starting positions of all occurrences of the pattern in the genome.
+        list: A list containing the starting positions of all approximate occurrences of the pattern.
 
     Raises:
-        ValueError: If the pattern or genome is empty.
+        ValueError: If the pattern or genome is empty, or d is negative.
     """
     if not Pattern or not Genome:
         raise ValueError("Pattern and Genome must not be empty")
+    if d < 0:
+        raise ValueError("d must be a non-negative integer")
+    if isinstance(Genome, GenomeSession):
+        index = index or Genome.peek(('index',))
+        Genome = Genome.sequence
+    try:
+        return ApproximateSearch([Pattern], Genome, d, index)[0].tolist()
+    except ValueError:
+        # Text the engine cannot encode is compared window by window below
+        pass
+    Pattern, Genome = Pattern.upper(), str(Genome).upper()
+    return [i for i in range(len(Genome) - len(Pattern) + 1)
+            if HammingDistance(Pattern, Genome[i:i + len(Pattern)]) <= d]
+
+def ApproximatePatternCount(Text, Pattern, d, index=None):
+    """
+    Counts the occurrences of a pattern in a text with at most d mismatches.
 
-     # Find the length of the pattern and genome
-    Pattern_length = len(Pattern)
-    Genome_length = len(Genome)
+    Args:
+        Text (str, PackedSequence or Genome): The text string to search for occurrences of the pattern.
+        Pattern (str): The pattern string to search for in the text.
+        d (int): The maximum number of mismatches.
+        index (FMIndex, optional): An index of the text, used for seed lookups on long patterns.
 
-    # Calculate the maximum index for the search
-    max_index = Genome_length - Pattern_length + 1
+    Returns:
+        int: The count of approximate occurrences of the pattern in the text.
 
-    # Use a generator expression to find all occurrences of the pattern in the genome
-    positions = (i for i in range(max_index) if Genome.find(
-        Pattern, i, i + Pattern_length) != -1)
+    Raises:
+        ValueError: If Text or Pattern is empty, or d is negative.
+    """
+    return len(ApproximatePatternMatching(Pattern, Text, d, index))
 
-    return list(positions)
+@Instrumentation.timed()
+def FrequentWordsWithMismatches(Text, k, d):
+    """
+    Finds the most frequent k-mers with up to d mismatches in a text.
+
+    A k-mer need not occur in the text itself to be reported: it is counted once for every window within
+    Hamming distance d of it. The counts are accumulated over integer-coded neighborhoods by
+    CountWithMismatches rather than by listing the neighbors of each window as strings.
+
+    Args:
+        Text (str, PackedSequence or Genome): The text; a string may contain A, C, G, T and N in any case.
+        k (int): The length of the k-mers.
+        d (int): The maximum number of mismatches.
+
+    Returns:
+        list: The most frequent k-mers (upper case, in lexicographic order).
+
+    Raises:
+        ValueError: If k is out of range, d is negative, or the text contains characters other than
+            A, C, G, T and N.
+    """
+    if isinstance(Text, GenomeSession):
+        Text = Text.sequence
+    return CountWithMismatches(Text, k, d).most_frequent()
+
+@Instrumentation.timed()
+def FrequentWordsWithMismatchesAndReverseComplements(Text, k, d):
+    """
+    Finds the k-mers maximizing the number of approximate occurrences of the k-mer and its reverse complement.
+
+    This is the variant used to look for DnaA boxes near a replication origin, which may sit on either strand.
+
+    Args:
+        Text (str, PackedSequence or Genome): The text; a string may contain A, C, G, T and N in any case.
+        k (int): The length of the k-mers.
+        d (int): The maximum number of mismatches.
+
+    Returns:
+        list: The most frequent k-mers (upper case, in lexicographic order).
 
+    Raises:
+        ValueError: If k is out of range, d is negative, or the text contains characters other than
+            A, C, G, T and N.
+    """
+    if isinstance(Text, GenomeSession):
+        Text = Text.sequence
+    return CountWithMismatches(Text, k, d, reverse_complement=True).most_frequent()
+
+@Instrumentation.timed()
 def ClumpFinder(Genome, k, L, t):
     """
     Finds k-mers forming (L, t)-clumps within a genome.
@@ -195,10 +477,13 @@ def ClumpFinder(Genome, k, L, t):
     A (L, t)-clump is defined as a region of length L in the genome where a specific k-mer occurs at least t times.
     This function scans through the genome using a sliding window approach, identifying regions where k-mers are 
     overrepresented. By adjusting the parameters k, L, and t, we can target specific motifs or regulatory 
-    elements within the genome.
+    elements within the genome. Upper-case ACGT genomes and packed genomes are handed to the vectorized
+    engine in ClumpEngine, which gives the same k-mers; use FindClumps directly to sweep several (k, L, t)
+    combinations at once or to get the window coordinates of each clump.
 
     Args:
-        Genome (str): The DNA sequence to analyze.
+        Genome (str, PackedSequence or Genome): The DNA sequence to analyze. A Genome is analyzed through its
+            cached packed encoding.
         k (int): The length of the k-mers to search for.
         L (int): The length of the sliding window.
         t (int): The minimum number of occurrences required for a k-mer to form a clump.
@@ -216,6 +501,20 @@ def ClumpFinder(Genome, k, L, t):
     if k <= 0 or L <= 0 or t <= 0:
         raise ValueError("k, L, and t must be positive integers")
 
+    if isinstance(Genome, GenomeSession):
+        Genome = Genome.sequence
+    # Nucleotide genomes are answered from integer k-mer codes instead of sliding string windows
+    if isinstance(Genome, PackedSequence) and k > MAX_CODE_K:
+        Genome = str(Genome)
+    windows = max(len(Genome) - k + 1, 0)
+    if k <= MAX_CODE_K and (isinstance(Genome, PackedSequence) or is_acgt(Genome)):
+        if Instrumentation._enabled:
+            Instrumentation.count('replication.ClumpFinder', positions=windows, allocations_avoided=windows)
+        return {clump.kmer for clump in FindClumps(Genome, [(k, L, t)])[(k, L, t)]}
+    # Every k-mer is sliced once as it enters the window and once as it leaves it
+    if Instrumentation._enabled:
+        Instrumentation.count('replication.ClumpFinder', positions=windows, allocations_made=2 * windows)
+
     clumps = set()  # Initialize the set to store clumps
     kmer_counts = {}  # Dictionary to store counts of k-mers within the sliding window
 
@@ -246,5 +545,108 @@ def ClumpFinder(Genome, k, L, t):
         if kmer_counts[new_kmer] == t:
             clumps.add(new_kmer)
 
+    if Instrumentation._enabled:
+        Instrumentation.observe('replication.ClumpFinder', table_size=len(kmer_counts))
     # Return the set of k-mers forming (L, t)-clumps within the genome
     return clumps
+
+# Skew step of every byte: +1 for G, -1 for C (either case), 0 for anything else
+_SKEW_STEPS = np.zeros(256, dtype=np.int8)
+_SKEW_STEPS[[ord('G'), ord('g')]] = 1
+_SKEW_STEPS[[ord('C'), ord('c')]] = -1
+
+# Skew step of every 2-bit base code (A, C, G, T); a packed N reads as A and adds nothing
+_SKEW_CODE_STEPS = np.array([0, -1, 1, 0], dtype=np.int8)
+
+def _SkewSteps(Genome, chunk_size):
+    """Yields the skew steps of a genome (str, PackedSequence or GenomeReader) as int8 arrays, chunk by chunk."""
+    if isinstance(Genome, GenomeReader):
+        for _, _, bases in Genome.chunks(chunk_size):
+            yield _SKEW_STEPS[np.frombuffer(bases.encode('latin-1'), dtype=np.uint8)]
+        return
+    for start in range(0, len(Genome), chunk_size):
+        stop = min(start + chunk_size, len(Genome))
+        if isinstance(Genome, PackedSequence):
+            yield _SKEW_CODE_STEPS[Genome.codes(start, stop)]
+        else:
+            # Characters outside Latin-1 become '?', keeping one byte per character
+            chunk = Genome[start:stop].encode('latin-1', errors='replace')
+            yield _SKEW_STEPS[np.frombuffer(chunk, dtype=np.uint8)]
+
+@Instrumentation.timed()
+def Skew(Genome):
+    """
+    Computes the skew of a genome: the number of G minus the number of C in each prefix.
+
+    Args:
+        Genome (str, PackedSequence or Genome): The DNA sequence to analyze.
+
+    Returns:
+        numpy.ndarray: The skew after each of the first i bases, for i from 0 to len(Genome) (int64). The skew
+                       of a Genome is computed once and cached, as a read-only array.
+    """
+    if isinstance(Genome, GenomeSession):
+        return Genome.cached(('skew',), lambda: Skew(Genome.sequence))
+    skew = np.zeros(len(Genome) + 1, dtype=np.int64)
+    # The whole genome is one chunk, summed straight into the result
+    for steps in _SkewSteps(Genome, max(len(Genome), 1)):
+        np.cumsum(steps, dtype=np.int64, out=skew[1:])
+    if Instrumentation._enabled:
+        Instrumentation.count('replication.Skew', positions=len(Genome))
+    return skew
+
+@Instrumentation.timed()
+def MinimumSkew(Genome, trace_step=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Finds the positions where the skew of a genome reaches its minimum, a hint for the replication origin.
+
+    The skew is accumulated chunk by chunk with a vectorized cumulative sum, carrying the running skew from one
+    chunk to the next, so memory is bounded by the chunk size rather than the genome size. A GenomeReader is
+    read the same way, straight from its memory map.
+
+    Args:
+        Genome (str, PackedSequence, Genome or GenomeReader): The DNA sequence to analyze. The records of a
+            FASTA file are read as one sequence, in file order. A Genome is answered from its cached skew array.
+        trace_step (int, optional): If given, also return the skew at every trace_step-th position, for plotting.
+        chunk_size (int): The number of bases processed at a time.
+
+    Returns:
+        list or tuple: The positions i (0 to len(Genome)) where the skew after the first i bases is minimal.
+                       With trace_step, a (positions, trace) tuple, where trace is a numpy array holding the skew
+                       at positions 0, trace_step, 2 * trace_step, ...
+
+    Raises:
+        ValueError: If trace_step or chunk_size is not positive.
+    """
+    if chunk_size <= 0 or (trace_step is not None and trace_step <= 0):
+        raise ValueError("trace_step and chunk_size must be positive integers")
+    if isinstance(Genome, GenomeSession):
+        values = Skew(Genome)
+        positions = np.flatnonzero(values == values.min()).tolist()
+        return positions if trace_step is None else (positions, values[::trace_step].copy())
+    skew = 0  # The skew at the end of the bases read so far
+    lowest = 0  # The minimum skew so far, starting with the empty prefix
+    positions = [np.zeros(1, dtype=np.int64)]
+    trace = [np.zeros(1, dtype=np.int64)]
+    offset = 0  # The number of bases read so far
+    for steps in _SkewSteps(Genome, chunk_size):
+        if not len(steps):
+            continue
+        # The skew after bases offset + 1 ... offset + len(steps)
+        values = skew + np.cumsum(steps, dtype=np.int64)
+        low = int(values.min())
+        if low <= lowest:
+            found = offset + 1 + np.flatnonzero(values == low)
+            positions = [found] if low < lowest else positions + [found]
+            lowest = low
+        if trace_step is not None:
+            # Keep the values whose position is a multiple of trace_step
+            trace.append(values[(-(offset + 1)) % trace_step::trace_step])
+        skew = int(values[-1])
+        offset += len(steps)
+    positions = np.concatenate(positions).tolist()
+    if Instrumentation._enabled:
+        Instrumentation.count('replication.MinimumSkew', positions=offset)
+    if trace_step is None:
+        return positions
+    return positions, np.concatenate(trace)
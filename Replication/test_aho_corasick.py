@@ -0,0 +1,52 @@
+import random
+import unittest
+
+from AhoCorasick import AhoCorasick, aho_corasick_search
+from KMP_PatternSearch import kmp_pattern_search
+from replication import PatternMatching, ReverseComplement
+
+
+class TestAhoCorasick(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.text = ''.join(rng.choice('ACGT') for _ in range(4000))
+        self.patterns = [self.text[i:i + rng.randint(1, 9)] for i in range(0, 4000, 97)] + ["GGGGGGGGGG", "ATAT"]
+
+    def test_matches_kmp_for_every_pattern(self):
+        # Test that one automaton pass finds the same positions as one KMP pass per pattern
+        positions, counts = aho_corasick_search(self.text, self.patterns)
+        for pattern, found, count in zip(self.patterns, positions, counts):
+            expected_positions, expected_count = kmp_pattern_search(self.text, pattern)
+            self.assertEqual(found, expected_positions)
+            self.assertEqual(count, expected_count)
+
+    def test_nested_patterns(self):
+        # Test that patterns that are suffixes or prefixes of each other are all reported
+        automaton = AhoCorasick(["HE", "SHE", "HIS", "HERS"])
+        self.assertEqual(automaton.search("USHERS"), [[2], [1], [], [2]])
+        self.assertEqual(sorted(automaton.iter_matches("USHERS")), [(0, 2), (1, 1), (3, 2)])
+
+    def test_ignore_case(self):
+        # Test case-insensitive matching
+        automaton = AhoCorasick(["atg"], ignore_case=True)
+        self.assertEqual(automaton.count("ATGcgtgatGTCgTGCA"), [2])
+
+    def test_reverse_complement(self):
+        # Test that reverse-complement occurrences are reported under the pattern's id
+        automaton = AhoCorasick(["ATGC", "GAATTC"], reverse_complement=True)
+        found = automaton.search(self.text)
+        expected = sorted(PatternMatching("ATGC", self.text) + PatternMatching(ReverseComplement("ATGC"), self.text))
+        self.assertEqual(found[0], expected)
+        self.assertEqual(found[1], PatternMatching("GAATTC", self.text))
+
+    def test_invalid_patterns(self):
+        # Test that empty pattern sets and empty patterns are rejected
+        with self.assertRaises(ValueError):
+            AhoCorasick([])
+        with self.assertRaises(ValueError):
+            AhoCorasick(["ACG", ""])
+
+
+if __name__ == "__main__":
+    unittest.main()
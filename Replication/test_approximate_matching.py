@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from ApproximateMatching import ApproximateSearch
+from FMIndex import FMIndex
+from PackedSequence import PackedSequence
+from replication import ApproximatePatternCount, ApproximatePatternMatching, HammingDistance
+
+
+def brute_force(pattern, genome, d):
+    # Reference result: compare the pattern with every window
+    return [i for i in range(len(genome) - len(pattern) + 1)
+            if HammingDistance(pattern.upper(), genome[i:i + len(pattern)].upper()) <= d]
+
+
+class TestApproximateMatching(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(21)
+        self.genome = ''.join(rng.choice('ACGT') for _ in range(5000))
+        self.patterns = [self.genome[i:i + length] for i, length in ((10, 4), (300, 9), (900, 24), (2000, 40))]
+
+    def test_hamming_distance(self):
+        # Test the textbook example
+        self.assertEqual(HammingDistance("GGGCCGTTGGT", "GGACCGTTGAC"), 3)
+        with self.assertRaises(ValueError):
+            HammingDistance("AC", "A")
+
+    def test_textbook_example(self):
+        # Test the Rosalind BA1H sample
+        text = "CGCCCGAATCCAGAACGCATTCCCATATTTCGGGACCACTGGCCTCCACGGTACGGACGTCAATCAAATGCCTAGCGGCTTGTGGTTTCTCCTACGCTCC"
+        self.assertEqual(ApproximatePatternMatching("ATTCTGGA", text, 3), [6, 7, 26, 27, 78])
+        self.assertEqual(ApproximatePatternCount("AACAAGCTGATAAACATTTAAAGAG", "AAAAA", 2), 11)
+
+    def test_scan_matches_brute_force(self):
+        # Test the bit-parallel scan, including patterns too long for one code
+        for d in (0, 1, 3):
+            results = ApproximateSearch(self.patterns, self.genome, d)
+            for pattern, found in zip(self.patterns, results):
+                self.assertEqual(found.tolist(), brute_force(pattern, self.genome, d))
+
+    def test_seed_and_verify_matches_brute_force(self):
+        # Test pigeonhole seeding through an index
+        index = FMIndex.build(self.genome)
+        for pattern in self.patterns[2:]:
+            for d in (1, 2):
+                self.assertEqual(ApproximatePatternMatching(pattern, self.genome, d, index=index),
+                                 brute_force(pattern, self.genome, d))
+
+    def test_n_counts_as_mismatch(self):
+        # Test that an N in the genome is one mismatch, in strings and packed genomes alike
+        genome = "ACGTNACGTAACNT"
+        for source in (genome, PackedSequence(genome)):
+            self.assertEqual(ApproximatePatternMatching("ACGTA", source, 1), brute_force("ACGTA", genome, 1))
+
+    def test_non_nucleotide_text(self):
+        # Test that other text falls back to comparing windows
+        self.assertEqual(ApproximatePatternMatching("AB", "ABXBAB", 1), [0, 2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from benchmark import CompareResults, LoadDataset, SyntheticGenome, _Measure
+
+
+def report(*results):
+    # Build a minimal report from (benchmark, bases_per_second, peak_rss_bytes) triples
+    return {'results': [{'benchmark': name, 'dataset': 'synthetic_10k', 'bases': 10000, 'seconds': 1.0,
+                         'bases_per_second': speed, 'peak_rss_bytes': rss} for name, speed, rss in results]}
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_synthetic_genome(self):
+        # Test that synthetic genomes are reproducible nucleotide strings
+        genome = SyntheticGenome(1000, seed=3)
+        self.assertEqual(genome, SyntheticGenome(1000, seed=3))
+        self.assertNotEqual(genome, SyntheticGenome(1000, seed=4))
+        self.assertEqual(set(genome), set('ACGT'))
+        self.assertEqual(len(LoadDataset('synthetic_10k')), 10000)
+
+    def test_load_fixture(self):
+        # Test that a Rosalind fixture yields its text line only
+        text = LoadDataset('rosalind_ba1b')
+        self.assertEqual(len(text), 876)
+        with self.assertRaises(ValueError):
+            LoadDataset('synthetic_3k')
+
+    def test_measure(self):
+        # Test one measurement in this process
+        result = _Measure('FrequencyMap', 'rosalind_ba1a', 2)
+        self.assertEqual(result['bases'], 957)
+        self.assertGreater(result['bases_per_second'], 0)
+        self.assertGreater(result['peak_rss_bytes'], 0)
+
+    def test_measure_counts_processed_bases(self):
+        # Test that a motif benchmark reports the bases of its promoters, not of the whole genome
+        result = _Measure('MedianString', 'rosalind_ba1b', 1)
+        self.assertEqual(result['bases'], 500)
+        self.assertAlmostEqual(result['bases_per_second'], 500 / result['seconds'])
+
+    def test_compare(self):
+        # Test that slowdowns and memory growth beyond the tolerance are flagged, and nothing else
+        baseline = report(('PatternCount', 100.0, 1000), ('ClumpFinder', 100.0, 1000), ('FrequencyMap', 100.0, 1000))
+        current = report(('PatternCount', 80.0, 1200), ('ClumpFinder', 70.0, 1000), ('FrequencyMap', 100.0, 1300),
+                         ('ReverseComplement', 1.0, 10 ** 9))
+        regressions = CompareResults(current, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('ClumpFinder'))
+        self.assertTrue(regressions[1].startswith('FrequencyMap'))
+
+
+if __name__ == '__main__':
+    unittest.main()
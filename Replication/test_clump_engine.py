@@ -0,0 +1,65 @@
+import random
+import unittest
+
+from ClumpEngine import Clump, FindClumps
+from PackedSequence import PackedSequence
+from replication import ClumpFinder
+
+
+def naive_first_windows(genome, k, L, t):
+    # Reference result: scan every window and remember where each k-mer first reaches t occurrences
+    L = min(L, len(genome))
+    first = {}
+    for start in range(len(genome) - L + 1):
+        counts = {}
+        for j in range(start, start + L - k + 1):
+            kmer = genome[j:j + k]
+            counts[kmer] = counts.get(kmer, 0) + 1
+        for kmer, count in counts.items():
+            if count >= t and kmer not in first:
+                first[kmer] = (start, start + L)
+    return first
+
+
+class TestFindClumps(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.genome = ''.join(rng.choice('ACGT') for _ in range(600)) + "TGTGGATAA" * 4 + \
+            ''.join(rng.choice('AC') for _ in range(300))
+
+    def test_matches_sliding_window(self):
+        # Test that every combination gives the same k-mers and first windows as a full window scan
+        params = [(3, 30, 4), (4, 60, 3), (9, 100, 3), (2, 10, 5)]
+        results = FindClumps(self.genome, params)
+        for k, L, t in params:
+            expected = naive_first_windows(self.genome, k, L, t)
+            found = {clump.kmer: (clump.start, clump.end) for clump in results[(k, L, t)]}
+            self.assertEqual(found, expected)
+
+    def test_ordered_by_first_crossing(self):
+        # Test that clumps are reported in the order their threshold was first crossed
+        clumps = FindClumps(self.genome, [(3, 30, 4)])[(3, 30, 4)]
+        starts = [clump.start for clump in clumps]
+        self.assertEqual(starts, sorted(starts))
+
+    def test_clump_finder_uses_engine(self):
+        # Test that ClumpFinder gives the same set for upper-case, lower-case (string path) and packed genomes
+        expected = {kmer.upper() for kmer in ClumpFinder(self.genome.lower(), 5, 50, 4)}
+        self.assertEqual(ClumpFinder(self.genome, 5, 50, 4), expected)
+        self.assertEqual(ClumpFinder(PackedSequence(self.genome), 5, 50, 4), expected)
+
+    def test_genome_shorter_than_window(self):
+        # Test that a genome shorter than L is treated as a single window
+        self.assertEqual(FindClumps("ACACAC", [(2, 100, 3)]), {(2, 100, 3): [Clump("AC", 0, 6)]})
+
+    def test_invalid_parameters(self):
+        # Test that non-positive parameters are rejected
+        with self.assertRaises(ValueError):
+            FindClumps(self.genome, [(0, 10, 2)])
+        with self.assertRaises(ValueError):
+            FindClumps("", [(3, 10, 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import random
+import re
+import unittest
+
+import ExactSearch
+from ExactSearch import CountOccurrences, FindOccurrences, SearchStrategy
+from KMP_PatternSearch import kmp_pattern_search
+from replication import PatternCount, PatternMatching
+
+
+def overlapping(text, pattern):
+    return [match.start() for match in re.finditer('(?=%s)' % re.escape(pattern), text)]
+
+
+class TestExactSearch(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.genome = ''.join(rng.choice('ACGT') for _ in range(5000))
+        self.repeat = 'AT' * 3000
+
+    def test_strategies(self):
+        # Test that short and repetitive patterns are matched by columns, long ones by find, lists by KMP
+        self.assertEqual(SearchStrategy(self.genome, "ACG"), 'columns')
+        self.assertEqual(SearchStrategy(self.repeat, "AT" * 200), 'columns')
+        self.assertEqual(SearchStrategy(self.genome, self.genome[100:160]), 'find')
+        # Longer non-repetitive patterns are rare, so the find loop is faster even within the period limit
+        self.assertEqual(SearchStrategy(self.genome, self.genome[100:120]), 'find')
+        self.assertEqual(SearchStrategy(self.genome, "ACGTACGTACGT"), 'columns')
+        self.assertEqual(SearchStrategy("ACGTACGT", "ACG"), 'find')
+        self.assertEqual(SearchStrategy(list(self.genome), list("ACG")), 'kmp')
+
+    def test_every_strategy_matches_overlapping_search(self):
+        # Test that str, bytes and list queries of every strategy find the same overlapping occurrences
+        rng = random.Random(3)
+        for text in (self.genome, self.repeat, self.genome[:200]):
+            for _ in range(40):
+                length = rng.randint(1, 70)
+                start = rng.randrange(len(text) - length)
+                pattern = text[start:start + length] if rng.random() < 0.7 else ('ATA' * 30)[:length]
+                expected = overlapping(text, pattern)
+                self.assertEqual(FindOccurrences(text, pattern), expected)
+                self.assertEqual(FindOccurrences(text.encode(), pattern.encode()), expected)
+                self.assertEqual(CountOccurrences(text, pattern), len(expected))
+                self.assertEqual(CountOccurrences(list(text[:300]), list(pattern)), len(overlapping(text[:300], pattern)))
+
+    def test_forced_strategies_agree(self):
+        # Test that the column matcher and the find loop agree on the same queries
+        original = ExactSearch.COLUMN_MIN_LENGTH
+        try:
+            for pattern in ("A", "ATAT", "AT" * 37 + "A", self.genome[10:40]):
+                ExactSearch.COLUMN_MIN_LENGTH = 0
+                columns = FindOccurrences(self.repeat, pattern), FindOccurrences(self.genome, pattern)
+                ExactSearch.COLUMN_MIN_LENGTH = float('inf')
+                self.assertEqual((FindOccurrences(self.repeat, pattern), FindOccurrences(self.genome, pattern)), columns)
+        finally:
+            ExactSearch.COLUMN_MIN_LENGTH = original
+
+    def test_ignore_case(self):
+        # Test case-insensitive queries on ASCII and non-ASCII text
+        self.assertEqual(CountOccurrences(self.genome.lower(), "acGT", ignore_case=True),
+                         CountOccurrences(self.genome, "ACGT"))
+        self.assertEqual(FindOccurrences("ßAaAß", "aa", ignore_case=True), [1, 2])
+        self.assertEqual(CountOccurrences("ACGT", "acg"), 0)
+
+    def test_entry_points(self):
+        # Test that PatternCount, PatternMatching and kmp_pattern_search report the same occurrences
+        pattern = "ATAT"
+        expected = overlapping(self.repeat[:1001] + self.genome, pattern)
+        text = self.repeat[:1001] + self.genome
+        self.assertEqual(PatternMatching(pattern, text), expected)
+        self.assertEqual(PatternCount(text.lower(), pattern), len(expected))
+        self.assertEqual(kmp_pattern_search(text, pattern), (expected, len(expected)))
+        self.assertEqual(kmp_pattern_search(list(text), list(pattern)), (expected, len(expected)))
+        with self.assertRaises(ValueError):
+            CountOccurrences(text, "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import pickle
+import random
+import tempfile
+import unittest
+
+import FMIndex as fm_index
+from FMIndex import FMIndex
+from PackedSequence import PackedSequence
+from replication import PatternCount, PatternMatching
+
+
+class TestFMIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(5)
+        self.genome = ''.join(rng.choice('ACGT') for _ in range(3000)) + "ATATATATATAT" + "GATTACA" * 7
+        self.index = FMIndex.build(self.genome, checkpoint_step=16)
+
+    def test_suffix_array(self):
+        # Test that the suffix array sorts the suffixes, with the sentinel suffix first
+        text = "GATTACAGATTACA"
+        index = FMIndex.build(text)
+        expected = [len(text)] + sorted(range(len(text)), key=lambda i: text[i:])
+        self.assertEqual(index.suffix_array.tolist(), expected)
+
+    def test_count_and_locate(self):
+        # Test that count and locate agree with the scanning functions
+        for pattern in ("A", "GATTACA", "ATAT", "CCCCCCCCCC", "acgt", self.genome[100:130]):
+            self.assertEqual(self.index.count(pattern), PatternCount(self.genome, pattern))
+            self.assertEqual(self.index.locate(pattern).tolist(), PatternMatching(pattern.upper(), self.genome))
+
+    def test_index_backed_replication_functions(self):
+        # Test that PatternCount and PatternMatching accept the index in place of the genome
+        self.assertEqual(PatternCount(self.index, "GATTACA"), PatternCount(self.genome, "GATTACA"))
+        self.assertEqual(PatternMatching("ATATAT", self.index), PatternMatching("ATATAT", self.genome))
+        with self.assertRaises(ValueError):
+            PatternCount(self.index, "")
+
+    def test_n_is_never_matched(self):
+        # Test that patterns never match across an N of a packed genome
+        index = FMIndex.build(PackedSequence("ACGTNACGT"))
+        self.assertEqual(index.count("ACGT"), 2)
+        self.assertEqual(index.count("TNA"), 0)
+        self.assertEqual(index.count("GTA"), 0)
+
+    def test_n_rows_in_packed_bwt(self):
+        # Test counts on a genome with many N runs, whose BWT rows are masked in the 2-bit BWT
+        rng = random.Random(8)
+        genome = ''.join(rng.choice('ACGT') if rng.random() < 0.9 else 'N' * rng.randint(1, 30) for _ in range(4000))
+        index = FMIndex.build(PackedSequence(genome), checkpoint_step=8)
+        self.assertLessEqual(index.bwt.packed.nbytes, len(genome) // 4 + 1)
+        for pattern in ("A", "AC", "TTA", "GATC", genome[500:509].replace('N', 'A')):
+            expected = sum(genome.startswith(pattern, i) for i in range(len(genome)))
+            self.assertEqual(index.count(pattern), expected)
+
+    def test_pair_sort_without_int64_keys(self):
+        # Test that the prefix doubling sorts rank pairs directly once a combined key could overflow
+        limit = fm_index._PAIR_KEY_LIMIT
+        fm_index._PAIR_KEY_LIMIT = 0
+        try:
+            index = FMIndex.build(self.genome, checkpoint_step=16)
+        finally:
+            fm_index._PAIR_KEY_LIMIT = limit
+        self.assertEqual(index.suffix_array.tolist(), self.index.suffix_array.tolist())
+        with self.assertRaises(ValueError):
+            FMIndex.build(self.genome, checkpoint_step=10)
+
+    def test_save_and_load(self):
+        # Test that a saved index loads back through memory maps and answers the same queries
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index")
+            self.index.save(path)
+            loaded = FMIndex.load(path)
+            self.assertEqual(len(loaded), len(self.genome))
+            self.assertEqual(loaded.locate("GATTACA").tolist(), self.index.locate("GATTACA").tolist())
+            self.assertEqual(loaded.count("ACG"), self.index.count("ACG"))
+            self.assertEqual(pickle.loads(pickle.dumps(loaded)).count("ACG"), self.index.count("ACG"))
+            del loaded
+
+
+if __name__ == "__main__":
+    unittest.main()
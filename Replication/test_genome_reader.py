@@ -0,0 +1,77 @@
+import os
+import random
+import tempfile
+import unittest
+
+from GenomeReader import GenomeReader, StreamClumpFinder, StreamFrequencyMap, StreamPatternCount
+from replication import ClumpFinder, FrequencyMap, PatternCount
+
+
+def random_genome(length, seed):
+    # Build a reproducible random DNA string
+    rng = random.Random(seed)
+    return ''.join(rng.choice('ACGT') for _ in range(length))
+
+
+def wrap(sequence, width=60):
+    # Split a sequence into FASTA-style lines
+    return '\n'.join(sequence[i:i + width] for i in range(0, len(sequence), width))
+
+
+class TestGenomeReader(unittest.TestCase):
+
+    def setUp(self):
+        self.first = random_genome(2500, 1) + "ATGATCAAG" * 5
+        self.second = random_genome(1200, 2).lower()
+        self.directory = tempfile.TemporaryDirectory()
+        self.plain = os.path.join(self.directory.name, "genome.txt")
+        with open(self.plain, "w") as handle:
+            handle.write(wrap(self.first) + "\n")
+        self.fasta = os.path.join(self.directory.name, "genome.fa")
+        with open(self.fasta, "w") as handle:
+            handle.write(">first record\n" + wrap(self.first) + "\n>second\n" + wrap(self.second) + "\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunks_overlap(self):
+        # Test that chunks overlap by the requested number of bases and rebuild the sequence
+        with GenomeReader(self.plain) as reader:
+            chunks = list(reader.chunks(chunk_size=500, overlap=8))
+        self.assertTrue(all(len(bases) <= 500 for _, _, bases in chunks))
+        rebuilt = chunks[0][2] + ''.join(bases[8:] for _, _, bases in chunks[1:])
+        self.assertEqual(rebuilt, self.first)
+        self.assertEqual([offset for _, offset, _ in chunks][:3], [0, 492, 984])
+
+    def test_fasta_records_are_separate(self):
+        # Test that headers are skipped and no chunk spans two records
+        with GenomeReader(self.fasta) as reader:
+            chunks = list(reader.chunks(chunk_size=1000, overlap=3))
+        records = {}
+        for record, offset, bases in chunks:
+            records.setdefault(record, []).append(bases if offset == 0 else bases[3:])
+        self.assertEqual(''.join(records[0]), self.first)
+        self.assertEqual(''.join(records[1]), self.second)
+
+    def test_stream_frequency_map(self):
+        # Test that streamed counts equal the in-memory counts
+        for k in (3, 11, 14):
+            self.assertEqual(StreamFrequencyMap(self.plain, k, chunk_size=700), FrequencyMap(self.first, k))
+        expected = dict(FrequencyMap(self.first, 4))
+        for kmer, count in FrequencyMap(self.second, 4).items():
+            expected[kmer] = expected.get(kmer, 0) + count
+        self.assertEqual(StreamFrequencyMap(self.fasta, 4, chunk_size=700), expected)
+
+    def test_stream_pattern_count(self):
+        # Test that streamed pattern counts equal the in-memory counts
+        for pattern in ("ATGATCAAG", "ACG", "T"):
+            self.assertEqual(StreamPatternCount(self.plain, pattern, chunk_size=100), PatternCount(self.first, pattern))
+
+    def test_stream_clump_finder(self):
+        # Test that streamed clumps equal the in-memory clumps
+        self.assertEqual(StreamClumpFinder(self.plain, 9, 100, 3, chunk_size=300), ClumpFinder(self.first, 9, 100, 3))
+        self.assertEqual(StreamClumpFinder(self.plain, 3, 40, 4, chunk_size=300), ClumpFinder(self.first, 3, 40, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
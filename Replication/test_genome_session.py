@@ -0,0 +1,107 @@
+import unittest
+
+import numpy as np
+
+from benchmark import SyntheticGenome
+from GenomeSession import Genome
+from PackedSequence import PackedSequence
+from replication import (ClumpFinder, FrequencyMap, FrequentWords, MinimumSkew, PatternCount, PatternMatching,
+                         ReverseComplement, Skew)
+
+
+class TestGenome(unittest.TestCase):
+
+    def setUp(self):
+        self.text = SyntheticGenome(3000, seed=11)
+        # Line-wrapped, lower-case input is normalized once
+        self.original = self.text[:1500].lower() + self.text[1500:]
+        self.genome = Genome(self.original[:1500] + "\n" + self.original[1500:])
+
+    def test_normalized(self):
+        # Test that the genome holds the upper-case text without whitespace
+        self.assertEqual(str(self.genome), self.text)
+        self.assertEqual(len(self.genome), 3000)
+        self.assertEqual(str(Genome(PackedSequence(self.text)).packed()), self.text)
+
+    def test_functions_match_strings(self):
+        # Test that the replication functions give the same answers for a Genome as for its text
+        genome, text = self.genome, self.text
+        self.assertEqual(FrequencyMap(genome, 5), FrequencyMap(text, 5))
+        self.assertEqual(FrequencyMap(genome, 5, canonical=True), FrequencyMap(text, 5, canonical=True))
+        self.assertEqual(FrequentWords(genome, 6), FrequentWords(text, 6))
+        self.assertEqual(ClumpFinder(genome, 5, 100, 4), ClumpFinder(text, 5, 100, 4))
+        self.assertEqual(PatternMatching("ACGT", genome), PatternMatching("ACGT", self.original))
+        self.assertEqual(PatternCount(genome, "ACG"), PatternCount(text, "ACG"))
+        self.assertEqual(ReverseComplement(genome), ReverseComplement(text))
+        self.assertTrue(np.array_equal(Skew(genome), Skew(text)))
+        self.assertEqual(MinimumSkew(genome), MinimumSkew(text))
+        positions, trace = MinimumSkew(genome, trace_step=7)
+        self.assertTrue(np.array_equal(trace, MinimumSkew(text, trace_step=7)[1]))
+
+    def test_case_and_n_match_strings(self):
+        # Test that case-sensitive searches and k-mers containing an N give what the string would
+        text = self.text[:1500].lower() + "NNACGTN" + self.text[1500:]
+        genome = Genome(text)
+        for pattern in ("acgt", "ACGT", "AcG", "TNN", "nac"):
+            self.assertEqual(PatternMatching(pattern, genome), PatternMatching(pattern, text))
+            self.assertEqual(PatternCount(genome, pattern), PatternCount(text, pattern))
+        self.assertEqual(PatternMatching("acgt", Genome(self.text)), [])
+        for canonical in (False, True):
+            self.assertEqual(dict(FrequencyMap(genome, 3, canonical)), dict(FrequencyMap(text, 3, canonical)))
+        self.assertIn("GTN", FrequencyMap(genome, 3))
+        strands, expected = FrequencyMap(genome, 4, True, True), FrequencyMap(text, 4, True, True)
+        self.assertEqual(dict(strands.reverse), dict(expected.reverse))
+        genome.index()
+        self.assertEqual(PatternMatching("acgt", genome), PatternMatching("acgt", text))
+        self.assertEqual(PatternCount(genome, "NNA"), 1)
+
+    def test_cache_hits(self):
+        # Test that repeated calls are served from the cache and cached arrays are read-only
+        FrequencyMap(self.genome, 8)
+        misses = self.genome.stats().misses
+        self.assertIs(FrequencyMap(self.genome, 8), FrequencyMap(self.genome, 8))
+        self.assertIs(ReverseComplement(self.genome), ReverseComplement(self.genome))
+        stats = self.genome.stats()
+        self.assertEqual(stats.misses, misses + 1)
+        self.assertGreaterEqual(stats.hits, 3)
+        with self.assertRaises(ValueError):
+            Skew(self.genome)[0] = 1
+
+    def test_index_reused(self):
+        # Test that searches go through the index once it is cached
+        genome = Genome(self.text)
+        index = genome.index()
+        self.assertEqual(PatternMatching("ACGTA", genome), index.locate("ACGTA").tolist())
+        self.assertEqual(PatternCount(genome, "ACGTA"), PatternCount(self.text, "ACGTA"))
+        self.assertGreaterEqual(genome.stats().hits, 2)
+
+    def test_eviction(self):
+        # Test that the least recently used entries are evicted to stay within the byte budget
+        genome = Genome(self.text, max_bytes=2 * 4 ** 6 * 8 + 4096)
+        genome.frequency_map(6)
+        genome.frequency_map(6, canonical=True)
+        genome.frequency_map(6)
+        genome.frequency_map(4)
+        genome.frequency_map(5)
+        stats = genome.stats()
+        self.assertLessEqual(stats.bytes, stats.max_bytes)
+        self.assertGreater(stats.evictions, 0)
+        self.assertIsNotNone(genome.peek(('frequency_map', 6, False)))
+        self.assertIsNone(genome.peek(('frequency_map', 6, True)))
+        # An entry larger than the whole budget is computed but not kept
+        tiny = Genome(self.text, max_bytes=10)
+        self.assertEqual(tiny.frequency_map(3), FrequencyMap(self.text, 3))
+        self.assertEqual(tiny.stats().entries, 0)
+
+    def test_non_nucleotide(self):
+        # Test that text other than DNA falls back to the string functions
+        genome = Genome("hello world hello")
+        self.assertFalse(genome.nucleotide)
+        self.assertEqual(FrequencyMap(genome, 5), FrequencyMap("HELLOWORLDHELLO", 5))
+        self.assertEqual(PatternCount(genome, "hello"), 2)
+        with self.assertRaises(ValueError):
+            ReverseComplement(genome)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from benchmark import SyntheticGenome
+from GenomeReader import GenomeReader
+from HeavyHitters import CountMinSketch, TopKmers
+from KmerCounter import CountKmers
+from replication import SketchFrequentWords
+
+
+def exact_top(text, k, n):
+    # Rank the k-mers of a text by exact count, ties in lexicographic order
+    counts = CountKmers(text, k, dense=False)
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+class TestCountMinSketch(unittest.TestCase):
+
+    def test_never_undercounts(self):
+        # Test that estimates are at least the true counts and within the error bound on a narrow sketch
+        codes = np.random.default_rng(1).integers(0, 5000, 20000).astype(np.uint64)
+        sketch = CountMinSketch(width=1000, depth=5)
+        sketch.add(codes)
+        self.assertEqual(sketch.width, 1024)
+        self.assertEqual(sketch.nbytes, 5 * 1024 * 8)
+        values, truth = np.unique(codes, return_counts=True)
+        estimates = sketch.estimate(values)
+        self.assertTrue(np.all(estimates >= truth))
+        self.assertLessEqual(np.mean(estimates - truth > sketch.error_bound), 1 - sketch.confidence)
+
+    def test_weighted_add(self):
+        # Test that weighted codes are counted exactly when there are no collisions
+        sketch = CountMinSketch(width=1 << 16, depth=3)
+        sketch.add(np.array([7, 9], dtype=np.uint64), np.array([5, 2]))
+        sketch.add(np.array([7], dtype=np.uint64))
+        self.assertEqual(sketch.estimate(np.array([7, 9], dtype=np.uint64)).tolist(), [6, 2])
+        self.assertEqual(sketch.total, 8)
+        with self.assertRaises(ValueError):
+            CountMinSketch(width=0)
+
+
+class TestTopKmers(unittest.TestCase):
+
+    def test_verified_matches_exact(self):
+        # Test that the verified top k-mers and counts match an exact count, across chunk boundaries
+        genome = SyntheticGenome(20000, seed=2) + 'ACGTACGTAC' * 30
+        for k in (5, 12, 21):
+            hitters = TopKmers(genome, k, 5, width=1 << 12, chunk_size=3000, verify=True)
+            self.assertEqual(list(zip(hitters.kmers, hitters.counts)), exact_top(genome, k, 5))
+            self.assertTrue(hitters.exact)
+
+    def test_estimates_within_bound(self):
+        # Test that unverified counts overestimate by no more than the reported bound
+        genome = SyntheticGenome(20000, seed=5) + 'GATTACA' * 50
+        hitters = TopKmers(genome, 7, 3, width=1 << 10, depth=4)
+        exact = dict(CountKmers(genome, 7, dense=False).items())
+        self.assertFalse(hitters.exact)
+        # Every rotation of the repeat occurs about 50 times, far above any random 7-mer
+        self.assertIn(hitters.kmers[0], {('GATTACA' * 2)[i:i + 7] for i in range(7)})
+        for kmer, count in zip(hitters.kmers, hitters.counts):
+            self.assertGreaterEqual(count, exact[kmer])
+            self.assertLessEqual(count - exact[kmer], hitters.error_bound)
+
+    def test_sources(self):
+        # Test that a reader, N runs and canonical counting give the same answers as a string
+        genome = SyntheticGenome(5000, seed=7)
+        text = genome[:2000] + 'NNNN' + genome[2000:]
+        expected = TopKmers(text, 6, 4, chunk_size=700, verify=True)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "genome.txt")
+            with open(path, "w") as handle:
+                handle.write(text)
+            with GenomeReader(path) as reader:
+                self.assertEqual(TopKmers(reader, 6, 4, chunk_size=700, verify=True), expected)
+        canonical = TopKmers(genome, 6, 1, canonical=True, verify=True)
+        self.assertEqual(canonical.counts[0], CountKmers(genome, 6, canonical=True).max_count())
+        with self.assertRaises(ValueError):
+            TopKmers(genome, 33)
+
+    def test_approximate_frequent_words(self):
+        # Test the replication entry point against the exact FrequentWords
+        text = "ACGTTGCATGTCGCATGATGCATGAGAGCT"
+        self.assertEqual(SketchFrequentWords(text, 4, 2), ['CATG', 'GCAT'])
+        self.assertEqual(SketchFrequentWords(text.lower(), 4, 2, width=16, depth=2), ['CATG', 'GCAT'])
+        self.assertEqual(SketchFrequentWords("ACG", 4), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import random
+import unittest
+
+from benchmark import SyntheticGenome
+from ClumpEngine import FindClumps
+from IncrementalKmers import ClumpTracker, KmerTable
+from KmerCounter import CountKmers
+from PackedSequence import PackedSequence
+from replication import ClumpFinder
+
+
+def random_edits(state, text, rng, count, alphabet='ACGT'):
+    # Apply the same random edits to an incremental structure and a plain string, checking after each one
+    for _ in range(count):
+        action = rng.choice(['append', 'substitute', 'insert', 'delete'])
+        if action == 'append':
+            bases = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            state.append(bases)
+            text += bases
+        elif action == 'substitute' and text:
+            position, base = rng.randrange(len(text)), rng.choice(alphabet)
+            state.substitute(position, base)
+            text = text[:position] + base + text[position + 1:]
+        elif action == 'insert':
+            position = rng.randint(0, len(text))
+            bases = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 15)))
+            state.insert(position, bases)
+            text = text[:position] + bases + text[position:]
+        elif action == 'delete' and text:
+            position = rng.randrange(len(text))
+            length = rng.randint(0, min(20, len(text) - position))
+            state.delete(position, length)
+            text = text[:position] + text[position + length:]
+        yield text
+
+
+class TestKmerTable(unittest.TestCase):
+
+    def test_matches_full_recount(self):
+        # Test that dense, sparse and canonical tables equal CountKmers after every kind of edit
+        rng = random.Random(7)
+        for k, canonical, dense in [(3, False, True), (5, True, True), (9, False, False), (14, True, False)]:
+            text = SyntheticGenome(300, seed=k)
+            table = KmerTable(k, text, canonical=canonical, dense=dense)
+            for text in random_edits(table, text, rng, 150):
+                self.assertEqual(str(table), text)
+                self.assertEqual(table.counts(), CountKmers(text, k, canonical=canonical))
+            self.assertEqual(table.most_frequent(), CountKmers(text, k, canonical=canonical).most_frequent())
+
+    def test_masks_n(self):
+        # Test that k-mers overlapping an N are never counted, as for a PackedSequence
+        rng = random.Random(2)
+        table = KmerTable(4, 'acgtNacgtacg')
+        for text in random_edits(table, str(table), rng, 100, alphabet='ACGTN'):
+            self.assertEqual(table.counts(), CountKmers(PackedSequence(text), 4))
+
+    def test_grows_from_empty(self):
+        # Test that a table started empty follows a stream of appended chunks and answers single lookups
+        genome = SyntheticGenome(5000, seed=1)
+        table = KmerTable(6)
+        for start in range(0, len(genome), 700):
+            table.append(genome[start:start + 700])
+        expected = CountKmers(genome, 6)
+        self.assertEqual(table.counts(), expected)
+        self.assertEqual(table.count(genome[:6]), expected[genome[:6]])
+        self.assertEqual(table.count('ACG'), 0)
+        self.assertEqual(KmerTable(3, PackedSequence('ACGTNACG')).counts(), CountKmers(PackedSequence('ACGTNACG'), 3))
+        # A string with N is counted as its PackedSequence, without the k-mers that overlap the N
+        self.assertEqual(dict(KmerTable(4, 'CCNACATA').counts()), {'ACAT': 1, 'CATA': 1})
+
+    def test_snapshot_and_errors(self):
+        # Test that snapshots do not follow later edits and that invalid edits are rejected
+        table = KmerTable(2, 'ACGT')
+        snapshot = table.counts()
+        table.substitute(0, 'G')
+        self.assertEqual(dict(snapshot), {'AC': 1, 'CG': 1, 'GT': 1})
+        self.assertEqual(table.count('GC'), 1)
+        with self.assertRaises(IndexError):
+            table.substitute(4, 'A')
+        with self.assertRaises(IndexError):
+            table.delete(3, 2)
+        with self.assertRaises(ValueError):
+            table.substitute(0, 'AC')
+        with self.assertRaises(ValueError):
+            table.append('ACGX')
+        with self.assertRaises(ValueError):
+            KmerTable(0)
+        self.assertEqual(str(table), 'GCGT')
+
+
+class TestClumpTracker(unittest.TestCase):
+
+    def test_matches_full_recount(self):
+        # Test that the clumps equal ClumpFinder after every kind of edit, across the genome-shorter-than-L switch
+        rng = random.Random(11)
+        for k, L, t in [(3, 40, 3), (2, 25, 4), (4, 60, 2), (5, 30, 1)]:
+            text = ''.join(rng.choice('ACGT') for _ in range(50)) + 'ACGTACGT' * 3
+            tracker = ClumpTracker(k, L, t, text)
+            for text in random_edits(tracker, text, rng, 200):
+                self.assertEqual(tracker.clumps(), ClumpFinder(text, k, L, t) if text else set())
+
+    def test_masks_n(self):
+        # Test that clumps of a sequence with N match FindClumps, which never counts k-mers overlapping an N
+        rng = random.Random(4)
+        tracker = ClumpTracker(3, 30, 3, 'ACGNACGACGTTT' * 4)
+        for text in random_edits(tracker, str(tracker), rng, 100, alphabet='ACGN'):
+            expected = {clump.kmer for clump in FindClumps(text, [(3, 30, 3)])[(3, 30, 3)]} if text else set()
+            self.assertEqual(tracker.clumps(), expected)
+
+    def test_snp_on_long_genome(self):
+        # Test that single substitutions on a long genome give the same clumps as recounting it
+        genome = SyntheticGenome(20000, seed=3)
+        tracker = ClumpTracker(4, 200, 5, genome)
+        rng = random.Random(5)
+        for _ in range(20):
+            position, base = rng.randrange(len(genome)), rng.choice('ACGT')
+            tracker.substitute(position, base)
+            genome = genome[:position] + base + genome[position + 1:]
+        self.assertEqual(tracker.clumps(), ClumpFinder(genome, 4, 200, 5))
+
+    def test_invalid_parameters(self):
+        # Test that non-positive parameters are rejected
+        with self.assertRaises(ValueError):
+            ClumpTracker(3, 0, 2)
+        with self.assertRaises(ValueError):
+            ClumpTracker(3, 10, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
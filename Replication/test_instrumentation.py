@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+import unittest
+
+import Instrumentation
+from KMP_PatternSearch import kmp_pattern_search
+from replication import FrequencyMap, PatternCount
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        Instrumentation.disable()
+        Instrumentation.reset()
+
+    def test_disabled_records_nothing(self):
+        # Test that calls leave the registry empty while instrumentation is off
+        PatternCount("ACGTACGT", "ACG")
+        kmp_pattern_search("ACGTACGT", "ACG")
+        self.assertEqual(Instrumentation.snapshot(), {})
+
+    def test_disabled_overhead(self):
+        # Test that a timed function costs at most a fraction of a microsecond more than the undecorated one
+        def best_time(func, *args):
+            return min(timeit.repeat(lambda: func(*args), number=2000, repeat=5)) / 2000
+
+        def overhead(func, *args):
+            # Interleave the two functions, so that noise from the machine falls on both alike
+            plain, timed = [], []
+            for _ in range(5):
+                plain.append(best_time(func.__wrapped__, *args))
+                timed.append(best_time(func, *args))
+            return min(timed) - min(plain), min(plain)
+
+        def within(bound, func, *args):
+            # Noise only ever inflates the overhead, so one measurement within the bound out of three will do
+            for _ in range(3):
+                extra, plain = overhead(func, *args)
+                if extra < bound(plain):
+                    return True
+            return False
+
+        self.assertTrue(within(lambda plain: 0.5e-6, Instrumentation.timed()(lambda: None)))
+        self.assertTrue(within(lambda plain: 0.1 * plain, FrequencyMap, "ACGTTGCA" * 50, 3))
+        self.assertEqual(Instrumentation.snapshot(), {})
+
+    def test_context_manager(self):
+        # Test that calls, counters and gauges are recorded inside the block only
+        with Instrumentation.instrumented() as stats:
+            self.assertTrue(Instrumentation.enabled())
+            PatternCount("ACGTACGT", "acg")
+            PatternCount("ACGTACGT", "ACG")
+            kmp_pattern_search(list("ACGTACGT"), list("ACG"))
+            FrequencyMap("ACGTACGT", 3)
+        PatternCount("ACGTACGT", "ACG")
+        self.assertFalse(Instrumentation.enabled())
+        registry = stats.snapshot()
+        self.assertEqual(registry['replication.PatternCount']['calls'], 2)
+        self.assertEqual(registry['replication.PatternCount']['counters'],
+                         {'positions': 12, 'allocations_avoided': 36})
+        self.assertEqual(registry['KMP_PatternSearch.kmp_pattern_search']['counters'],
+                         {'positions': 8, 'matches': 2})
+        self.assertEqual(registry['KMP_PatternSearch.compute_prefix']['gauges'], {'table_size': 4})
+        self.assertEqual(registry['replication.FrequencyMap']['gauges'], {'table_size': 4})
+        self.assertGreaterEqual(registry['replication.PatternCount']['max_seconds'], 0)
+
+    def test_exports(self):
+        # Test the JSON and Prometheus exports
+        with Instrumentation.instrumented():
+            kmp_pattern_search(list("AAAA"), list("AA"))
+        self.assertEqual(json.loads(Instrumentation.to_json())['KMP_PatternSearch.kmp_pattern_search']['calls'], 1)
+        text = Instrumentation.to_prometheus()
+        self.assertIn('# TYPE replication_calls_total counter\n', text)
+        self.assertIn('replication_matches_total{function="KMP_PatternSearch.kmp_pattern_search"} 3\n', text)
+        self.assertIn('# TYPE replication_table_size gauge\n', text)
+
+    def test_environment_variable(self):
+        # Test that the environment variable turns recording on and writes the registry at exit
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.json')
+            environment = dict(os.environ, REPLICATION_INSTRUMENT='1', REPLICATION_INSTRUMENT_OUTPUT=path)
+            script = "from replication import PatternCount; PatternCount('ACGT', 'CG')"
+            subprocess.run([sys.executable, '-c', script], check=True, env=environment,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+            with open(path) as handle:
+                self.assertEqual(json.load(handle)['replication.PatternCount']['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import itertools
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import KmerCache
+from benchmark import SyntheticGenome
+from ClumpEngine import FindClumps
+from GenomeSession import Genome
+from KmerCache import CachedCountKmers, KmerCache as Cache, SequenceDigest
+from KmerCounter import CountKmers
+from PackedSequence import PackedSequence
+from replication import FrequencyMap
+
+
+def _Store(directory, text, k):
+    """Counts a table through a cache in a worker process and returns its k-mers."""
+    return dict(Cache(directory).count(text, k))
+
+
+class TestKmerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = Cache(self.directory.name)
+        self.text = SyntheticGenome(4000, seed=5)
+
+    def tearDown(self):
+        KmerCache.disable()
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        # Test that dense, sparse and N-containing tables come back from disk equal and memory-mapped
+        for text, k in ((self.text, 4), (self.text, 14), (self.text[:500] + "NN" + self.text[500:1000], 6)):
+            expected = CountKmers(text, k)
+            self.assertEqual(self.cache.count(text, k), expected)
+            cached = self.cache.count(text, k)
+            self.assertEqual(cached, expected)
+            self.assertEqual(cached.dense, expected.dense)
+            self.assertIsInstance(cached._counts, np.memmap)
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.writes, stats.entries), (3, 3, 3, 3))
+
+    def test_keys(self):
+        # Test that the key covers the content, k and options, but not the case or packing of text without N
+        self.cache.count(self.text, 5)
+        self.cache.count(self.text.lower(), 5)
+        self.cache.count(PackedSequence(self.text), 5)
+        self.assertEqual(self.cache.stats().misses, 1)
+        self.assertEqual(self.cache.count(self.text, 5, canonical=True), CountKmers(self.text, 5, canonical=True))
+        self.cache.count(self.text, 6)
+        self.cache.count(self.text[1:], 5)
+        self.assertEqual(self.cache.stats().misses, 4)
+        self.assertEqual(SequenceDigest(self.text), SequenceDigest(PackedSequence(self.text.lower())))
+
+    def test_masked_and_string_kept_apart(self):
+        # Test that a packed sequence, which drops the k-mers overlapping an N, does not answer for a string
+        text = "ACGTNACGTACGGTNNACGT"
+        self.assertEqual(self.cache.count(PackedSequence(text), 3), CountKmers(PackedSequence(text), 3))
+        self.assertEqual(self.cache.count(text, 3), CountKmers(text, 3))
+        self.assertIn("GTN", self.cache.count(text, 3))
+        self.assertNotIn("GTN", self.cache.count(PackedSequence(text), 3))
+        self.assertEqual(self.cache.stats().misses, 2)
+        KmerCache.enable(self.directory.name)
+        self.assertEqual(dict(FrequencyMap(PackedSequence(text), 3)), dict(CountKmers(PackedSequence(text), 3)))
+        self.assertEqual(dict(FrequencyMap(text, 3)), dict(CountKmers(text, 3)))
+
+    def test_eviction(self):
+        # Test that the least recently used tables are evicted to stay within the budget
+        cache = Cache(self.directory.name, max_bytes=2 * 4 ** 6 * 8)
+        cache.count(self.text, 6)
+        cache.count(self.text[1:], 6)
+        cache.count(self.text, 6)
+        cache.count(self.text[2:], 6)
+        stats = cache.stats()
+        self.assertEqual((stats.evictions, stats.entries), (1, 2))
+        self.assertLessEqual(stats.bytes, stats.max_bytes)
+        # The table used last survived, the one used longest ago did not
+        cache.count(self.text, 6)
+        cache.count(self.text[1:], 6)
+        self.assertEqual(cache.stats().hits, 2)
+        self.assertEqual(cache.stats().misses, 4)
+
+    def test_concurrent_writers(self):
+        # Test that processes storing the same table at once leave one complete entry
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(_Store, [self.directory.name] * 8, [self.text] * 8, [7] * 8))
+        expected = dict(CountKmers(self.text, 7))
+        self.assertTrue(all(result == expected for result in results))
+        self.assertEqual(self.cache.stats().entries, 1)
+        self.assertEqual([name for name in os.listdir(self.directory.name) if name.startswith('.')], [])
+
+    def test_transparent_use(self):
+        # Test that FrequencyMap, Genome and FindClumps read the enabled cache and give unchanged answers
+        self.assertEqual(CachedCountKmers(self.text, 5), CountKmers(self.text, 5))
+        expected_map, expected_clumps = FrequencyMap(self.text, 8), FindClumps(self.text, [(8, 200, 3)])
+        cache = KmerCache.enable(self.directory.name)
+        self.assertEqual(FrequencyMap(self.text, 8), expected_map)
+        self.assertEqual(FrequencyMap(Genome(self.text), 8), expected_map)
+        self.assertEqual(FindClumps(self.text, [(8, 200, 3)]), expected_clumps)
+        self.assertEqual((cache.stats().misses, cache.stats().hits), (1, 2))
+
+    def test_lookup(self):
+        # Test that vectorized lookups agree with the mapping for dense and sparse tables
+        codes = np.arange(4 ** 5, dtype=np.uint64)
+        for dense in (True, False):
+            table = CountKmers(self.text[:300], 5, dense=dense)
+            expected = [table.get(kmer, 0) for kmer in map(''.join, itertools.product('ACGT', repeat=5))]
+            self.assertEqual(table.lookup(codes).tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
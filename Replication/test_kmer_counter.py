@@ -0,0 +1,137 @@
+import random
+import unittest
+
+from KmerCounter import CountAccumulator, CountKmers, KmerCounts, MergeCounts
+from PackedSequence import PackedSequence
+from replication import FrequencyMap, FrequentWords, MaxMap, ReverseComplement
+
+
+def naive_counts(text, k):
+    # Reference count built by slicing out every window
+    freq = {}
+    for i in range(len(text) - k + 1):
+        kmer = text[i:i + k].upper()
+        freq[kmer] = freq.get(kmer, 0) + 1
+    return freq
+
+
+def naive_strand_counts(text, k):
+    # Reference canonical counts, split by the strand each window was read from
+    forward, reverse = {}, {}
+    for kmer in (text[i:i + k].upper() for i in range(len(text) - k + 1)):
+        complement = ReverseComplement(kmer)
+        if complement < kmer:
+            reverse[complement] = reverse.get(complement, 0) + 1
+        else:
+            forward[kmer] = forward.get(kmer, 0) + 1
+    total = dict(forward)
+    for kmer, count in reverse.items():
+        total[kmer] = total.get(kmer, 0) + count
+    return total, forward, reverse
+
+
+class TestCountKmers(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.text = ''.join(rng.choice('ACGT') for _ in range(5000))
+
+    def test_dense_and_sparse_layouts_agree(self):
+        # Test that both table layouts give the reference counts
+        for k in (1, 3, 8):
+            self.assertEqual(CountKmers(self.text, k, dense=True), naive_counts(self.text, k))
+            self.assertEqual(CountKmers(self.text, k, dense=False), naive_counts(self.text, k))
+        self.assertEqual(CountKmers(self.text, 20), naive_counts(self.text, 20))
+
+    def test_dict_interface(self):
+        # Test that the view behaves like a read-only dictionary
+        counts = CountKmers("ATGATGATG", 3)
+        self.assertIsInstance(counts, KmerCounts)
+        self.assertEqual(counts["ATG"], 3)
+        self.assertEqual(counts.get("CCC", 0), 0)
+        self.assertNotIn("atg", counts)
+        self.assertEqual(len(counts), 3)
+        self.assertEqual(list(counts.items()), [("ATG", 3), ("GAT", 2), ("TGA", 2)])
+        with self.assertRaises(KeyError):
+            counts["AAAA"]
+
+    def test_kmers_with_n_in_strings(self):
+        # Test that k-mers containing N in a plain string are still counted under their string key
+        self.assertEqual(CountKmers("ACNACN", 2), naive_counts("ACNACN", 2))
+
+    def test_invalid_text(self):
+        # Test that text the engine cannot encode is rejected
+        with self.assertRaises(ValueError):
+            CountKmers("ACG#T", 2)
+        with self.assertRaises(ValueError):
+            CountKmers("acgt", 2, case_sensitive=True)
+
+    def test_most_frequent(self):
+        # Test that the array-based maximum matches MaxMap on a plain dictionary
+        counts = CountKmers(self.text, 6)
+        max_value, max_kmers, _ = MaxMap(naive_counts(self.text, 6))
+        self.assertEqual(counts.max_count(), max_value)
+        self.assertEqual(sorted(counts.most_frequent()), sorted(max_kmers))
+
+    def test_frequency_map_uses_engine(self):
+        # Test that FrequencyMap returns an engine table for nucleotide text of either case or packing
+        self.assertIsInstance(FrequencyMap(self.text.lower(), 5), KmerCounts)
+        self.assertEqual(FrequencyMap(PackedSequence(self.text), 5), FrequencyMap(self.text, 5))
+        self.assertEqual(FrequentWords("ACGTTGCATGTCGCATGATGCATGAGAGCT", 4), ["CATG", "GCAT"])
+        # Engine tables list their k-mers in lexicographic order, not in order of first occurrence
+        self.assertEqual(list(FrequencyMap("TTGACA", 2)), ["AC", "CA", "GA", "TG", "TT"])
+
+    def test_accumulator(self):
+        # Test that a stream of tables, with N k-mers in the side table, sums like one merge in both layouts
+        rng = random.Random(3)
+        pieces = [''.join(rng.choice('ACGTN' if rng.random() < 0.2 else 'ACGT') for _ in range(rng.randint(0, 300)))
+                  for _ in range(40)]
+        for k, dense in [(3, True), (3, False), (13, False)]:
+            tables = [CountKmers(piece, k, dense=dense) for piece in pieces]
+            total = CountAccumulator(k, dense)
+            for table in tables:
+                total.add(table)
+            self.assertEqual(total.result(), MergeCounts(tables))
+        self.assertEqual(dict(CountAccumulator(5, False).result()), {})
+
+
+class TestCanonicalCounts(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(14)
+        self.text = ''.join(rng.choice('ACGT') for _ in range(3000))
+
+    def test_canonical_counts(self):
+        # Test canonical counts in both layouts, and that they match counting both strands separately
+        for k in (1, 4, 9, 21):
+            total, _, _ = naive_strand_counts(self.text, k)
+            self.assertEqual(CountKmers(self.text, k, canonical=True, dense=False), total)
+            self.assertEqual(FrequencyMap(self.text, k, canonical=True), total)
+        both = naive_counts(self.text, 5)
+        for kmer, count in naive_counts(ReverseComplement(self.text), 5).items():
+            both[kmer] = both.get(kmer, 0) + count
+        for kmer, count in FrequencyMap(self.text, 5, canonical=True).items():
+            # A palindrome is read the same way on both strands, so the separate counts see it twice
+            self.assertEqual(2 * count if kmer == ReverseComplement(kmer) else count, both[kmer])
+
+    def test_strand_breakdown(self):
+        # Test the per-strand tables, including N-containing k-mers and k-mers too long for a code
+        text = self.text[:500] + "NN" + self.text[500:800].lower()
+        for k in (3, 40):
+            counts = FrequencyMap(text, k, canonical=True, strands=True)
+            self.assertEqual([dict(table) for table in counts], list(naive_strand_counts(text, k)))
+        packed = CountKmers(PackedSequence(text), 6, canonical=True, strands=True)
+        # A packed sequence masks the k-mers containing N
+        expected = {kmer: count for kmer, count in naive_strand_counts(text, 6)[0].items() if "N" not in kmer}
+        self.assertEqual(dict(packed.total), expected)
+
+    def test_canonical_frequent_words(self):
+        # Test that the most frequent canonical k-mer pools both strands
+        text = "ATGC" * 3 + "GCAT" * 3
+        self.assertEqual(FrequentWords(text, 4, canonical=True), ["ATGC"])
+        with self.assertRaises(ValueError):
+            FrequencyMap(text, 4, strands=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
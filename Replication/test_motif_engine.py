@@ -0,0 +1,138 @@
+import math
+import random
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from MotifEngine import (Consensus, CountMatrix, Entropy, GreedySearch, ProfileMatrix, ProfileMostProbable,
+                         ProfileMostProbableKmer, Score, encode_motifs, window_log_probabilities, encode_texts)
+
+
+def textbook_profile(motifs, pseudocount):
+    # Build a profile dict the way the course code does, cell by cell
+    t, k = len(motifs), len(motifs[0])
+    count = {symbol: [pseudocount] * k for symbol in "ACGT"}
+    for motif in motifs:
+        for j, symbol in enumerate(motif):
+            count[symbol][j] += 1
+    return {symbol: [c / (t + 4 * pseudocount) for c in count[symbol]] for symbol in "ACGT"}
+
+
+def textbook_most_probable(text, k, profile):
+    # Scan every window, multiplying its probabilities left to right, and keep the first best one
+    best, best_kmer = -1, text[:k]
+    for i in range(len(text) - k + 1):
+        p = 1
+        for j, symbol in enumerate(text[i:i + k]):
+            p = p * profile[symbol][j]
+        if p > best:
+            best, best_kmer = p, text[i:i + k]
+    return best_kmer
+
+
+def textbook_score(motifs):
+    # Count the mismatches with the consensus, column by column
+    return sum(len(motifs) - max(column.count(symbol) for symbol in "ACGT") for column in zip(*motifs))
+
+
+def textbook_greedy(dna, k, t, pseudocount):
+    # Run the course's GreedyMotifSearch, recomputing the profile for every string
+    best = [text[:k] for text in dna[:t]]
+    for i in range(len(dna[0]) - k + 1):
+        motifs = [dna[0][i:i + k]]
+        for j in range(1, t):
+            motifs.append(textbook_most_probable(dna[j], k, textbook_profile(motifs, pseudocount)))
+        if textbook_score(motifs) < textbook_score(best):
+            best = motifs
+    return best
+
+
+def random_dna(rng, length):
+    # Draw a random DNA string
+    return ''.join(rng.choice("ACGT") for _ in range(length))
+
+
+class TestMotifEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.motifs = ["TCGGGGGTTTTT", "CCGGTGACTTAC", "ACGGGGATTTTC", "TTGGGGACTTTT", "AAGGGGACTTCC",
+                       "TTGGGGACTTCC", "TCGGGGATTCAT", "TCGGGGATTCCT", "TAGGGGAACTAC", "TCGGGTATAACC"]
+
+    def test_matrices(self):
+        # Test the count, profile, consensus, score and entropy of the textbook motif collection
+        counts = CountMatrix(self.motifs)
+        self.assertEqual(counts[:, 0].tolist(), [2, 1, 0, 7])
+        self.assertTrue(np.all(counts.sum(axis=0) == 10))
+        self.assertEqual(Consensus(self.motifs), "TCGGGGATTTCC")
+        self.assertEqual(Score(self.motifs), 30)
+        self.assertAlmostEqual(Entropy(self.motifs), 9.9163, places=3)
+        expected = textbook_profile(self.motifs, 1)
+        profile = ProfileMatrix(self.motifs, pseudocount=1)
+        self.assertEqual(profile.tolist(), [expected[symbol] for symbol in "ACGT"])
+        self.assertEqual(CountMatrix(encode_motifs(self.motifs), 1).tolist(), CountMatrix(self.motifs, 1).tolist())
+        with self.assertRaises(ValueError):
+            encode_motifs(["ACGT", "ACG"])
+        with self.assertRaises(ValueError):
+            encode_motifs(["ACGN"])
+
+    def test_most_probable_textbook(self):
+        # Test the textbook sample of the profile-most-probable k-mer problem
+        profile = {'A': [0.2, 0.2, 0.3, 0.2, 0.3], 'C': [0.4, 0.3, 0.1, 0.5, 0.1],
+                   'G': [0.3, 0.3, 0.5, 0.2, 0.4], 'T': [0.1, 0.2, 0.1, 0.1, 0.2]}
+        self.assertEqual(ProfileMostProbableKmer("ACCTGTTTATTGCCTAAGTTCCGAACAAACCCAATATAGCCCGAGGGCCT", 5, profile),
+                         "CCGAG")
+
+    def test_most_probable_matches_scan(self):
+        # Test many strings of different lengths, including profiles with zeros and many ties
+        rng = random.Random(4)
+        for k in (3, 6, 12):
+            texts = [random_dna(rng, rng.randint(k, 60)) for _ in range(25)]
+            motifs = [text[:k] for text in texts[:5]]
+            for pseudocount in (0, 1):
+                profile = textbook_profile(motifs, pseudocount)
+                expected = [textbook_most_probable(text, k, profile) for text in texts]
+                self.assertEqual(ProfileMostProbable(texts, k, profile), expected)
+                self.assertEqual(ProfileMostProbable(texts, k, ProfileMatrix(motifs, pseudocount)), expected)
+
+    def test_log_probabilities(self):
+        # Test the sliding log-probability sums against a direct computation
+        profile = ProfileMatrix(["ACGT", "ACGA", "TCGA"], pseudocount=1)
+        codes, _ = encode_texts(["ACGTAC", "GGA"])
+        scores = window_log_probabilities(codes, 3, profile[:, :3])
+        self.assertAlmostEqual(scores[0, 1], math.log(profile[1, 0] * profile[2, 1] * profile[3, 2]))
+        self.assertEqual(scores[1, 1], -np.inf)
+        with self.assertRaises(ValueError):
+            ProfileMostProbable(["AC"], 3, profile[:, :3])
+
+
+class TestGreedySearch(unittest.TestCase):
+
+    def test_textbook_sample(self):
+        # Test the textbook sample, with and without pseudocounts
+        dna = ["GGCGTTCAGGCA", "AAGAATCAGTCA", "CAAGGAGTTCGC", "CACGTCAATCAC", "CAATAATATTCG"]
+        self.assertEqual(GreedySearch(dna, 3, 5), ["CAG", "CAG", "CAA", "CAA", "CAA"])
+        self.assertEqual(GreedySearch(dna, 3, 5, pseudocount=1), ["TTC", "ATC", "TTC", "ATC", "TTC"])
+
+    def test_matches_textbook(self):
+        # Test random string sets of uneven lengths, including short ones where ties are common
+        rng = random.Random(9)
+        for k, length in ((3, 8), (4, 30), (8, 40)):
+            dna = [random_dna(rng, length + rng.randint(0, 5)) for _ in range(6)]
+            for pseudocount in (0, 1):
+                self.assertEqual(GreedySearch(dna, k, 5, pseudocount), textbook_greedy(dna, k, 5, pseudocount))
+
+    def test_process_pool(self):
+        # Test that spreading the seeds over worker processes, or over a given pool, changes nothing
+        rng = random.Random(12)
+        dna = [random_dna(rng, 60) for _ in range(8)]
+        expected = GreedySearch(dna, 6, 8, 1, workers=1)
+        self.assertEqual(GreedySearch(dna, 6, 8, 1, workers=2), expected)
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            self.assertEqual(GreedySearch(dna, 6, 8, 1, executor=pool), expected)
+        with self.assertRaises(ValueError):
+            GreedySearch(dna, 61, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from MotifEngine import Score
+from MotifSampling import GibbsSearch, RandomizedSearch
+
+# The textbook sample for RandomizedMotifSearch and GibbsSampler (k=8, t=5), whose best motifs score 9
+DNA = ["CGCCCCTCTCGGGGGTGTTCAGTAACCGGCCA", "GGGCGAGGTATGTGTAAGTGCCAAGGTGCCAG", "TAGTACCGAGACCGAAAGAAGTATACAGGCGT",
+       "TAGATCAAGTTTCAGGTGCACGTCGGTGAACC", "AATCCACCAGCTCCACGTGCAATGTTGGCCTA"]
+
+
+class TestMotifSampling(unittest.TestCase):
+
+    def test_randomized_search(self):
+        # Test that the randomized search finds the textbook motifs and that traces improve until the last step
+        result = RandomizedSearch(DNA, 8, 5, restarts=1000, seed=0, workers=1)
+        self.assertEqual(result.score, 9)
+        self.assertEqual(Score(result.motifs), 9)
+        self.assertEqual(len(result.traces), 1000)
+        for trace in result.traces:
+            self.assertTrue(np.all(np.diff(trace[:-1]) < 0))
+            self.assertGreaterEqual(trace[-1], trace[-2] if len(trace) > 1 else trace[-1])
+
+    def test_gibbs_search(self):
+        # Test that the Gibbs sampler finds the textbook motifs and records one score per iteration
+        result = GibbsSearch(DNA, 8, 5, N=100, restarts=20, seed=1, workers=1)
+        self.assertEqual(result.motifs, ["TCTCGGGG", "CCAAGGTG", "TACAGGCG", "TTCAGGTG", "TCCACGTG"])
+        self.assertEqual([len(trace) for trace in result.traces], [101] * 20)
+        stalled = GibbsSearch(DNA, 8, 5, N=100, restarts=5, seed=1, stall=10, workers=1)
+        self.assertTrue(all(len(trace) < 101 for trace in stalled.traces))
+
+    def test_reproducible_across_workers(self):
+        # Test that a master seed gives the same motifs and traces however the restarts are spread
+        for search, args in ((RandomizedSearch, (200,)), (GibbsSearch, (30, 8))):
+            serial = search(DNA, 8, 5, *args, seed=7, workers=1)
+            pooled = search(DNA, 8, 5, *args, seed=7, workers=3)
+            self.assertEqual(serial.motifs, pooled.motifs)
+            self.assertEqual(len(serial.traces), len(pooled.traces))
+            self.assertTrue(all(np.array_equal(a, b) for a, b in zip(serial.traces, pooled.traces)))
+
+    def test_early_stopping(self):
+        # Test that patience cuts the restarts short, in restart order, and an exhausted time budget runs nothing
+        full = RandomizedSearch(DNA, 8, 5, restarts=300, seed=3, workers=1)
+        stopped = RandomizedSearch(DNA, 8, 5, restarts=300, seed=3, patience=20, workers=1)
+        self.assertLess(len(stopped.traces), 300)
+        self.assertTrue(all(np.array_equal(a, b) for a, b in zip(stopped.traces, full.traces)))
+        self.assertEqual(RandomizedSearch(DNA, 8, 5, restarts=10, time_budget=-1, workers=1).traces, [])
+        with self.assertRaises(ValueError):
+            GibbsSearch(DNA, 8, 6, N=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import itertools
+import random
+import unittest
+
+import MotifTree
+from MotifTree import DistanceBetweenPatternAndStrings, MedianString, MotifEnumeration
+
+
+def hamming(a, b):
+    return sum(x != y for x, y in zip(a, b))
+
+
+def textbook_distance(pattern, dna):
+    k = len(pattern)
+    return sum(min(hamming(pattern, text[i:i + k]) for i in range(len(text) - k + 1)) for text in dna)
+
+
+def textbook_median(dna, k):
+    best, median = None, None
+    for pattern in map(''.join, itertools.product('ACGT', repeat=k)):
+        distance = textbook_distance(pattern, dna)
+        if best is None or distance < best:
+            best, median = distance, pattern
+    return median
+
+
+def textbook_enumeration(dna, k, d):
+    return [pattern for pattern in map(''.join, itertools.product('ACGT', repeat=k))
+            if all(min(hamming(pattern, text[i:i + k]) for i in range(len(text) - k + 1)) <= d for text in dna)]
+
+
+def random_dna(rng, length):
+    return ''.join(rng.choice('ACGT') for _ in range(length))
+
+
+class TestMotifTree(unittest.TestCase):
+
+    def test_textbook_samples(self):
+        # Test the textbook samples of MedianString, DistanceBetweenPatternAndStrings and MotifEnumeration
+        dna = ["AAATTGACGCAT", "GACGACCACGTT", "CGTCAGCGCCTG", "GCTGAGCACCGG", "AGTTCGGGACAG"]
+        self.assertEqual(MedianString(dna, 3), "GAC")
+        dna = ["TTACCTTAAC", "GATATCTGTC", "ACGGCGTTCG", "CCCTAAAGAG", "CGTCAGAGGT"]
+        self.assertEqual(DistanceBetweenPatternAndStrings("AAA", dna), 5)
+        self.assertEqual(MotifEnumeration(["ATTTGGC", "TGCCTTA", "CGGTATC", "GAAAATT"], 3, 1),
+                         ["ATA", "ATT", "GTT", "TTT"])
+
+    def test_matches_textbook(self):
+        # Test random inputs of unequal lengths against the exhaustive textbook versions
+        rng = random.Random(3)
+        for _ in range(15):
+            k = rng.randint(1, 5)
+            dna = [random_dna(rng, rng.randint(k, 30)) for _ in range(rng.randint(1, 5))]
+            self.assertEqual(MedianString(dna, k), textbook_median(dna, k))
+            d = rng.randint(0, 2)
+            self.assertEqual(MotifEnumeration(dna, k, d), textbook_enumeration(dna, k, d))
+            pattern = random_dna(rng, k)
+            self.assertEqual(DistanceBetweenPatternAndStrings(pattern, dna), textbook_distance(pattern, dna))
+
+    def test_table_and_direct_scoring_agree(self):
+        # Test that scoring every level through distance transforms or window comparisons gives the same result
+        rng = random.Random(5)
+        dna = [random_dna(rng, 200) for _ in range(6)]
+        expected = (MedianString(dna, 7), MotifEnumeration(dna, 7, 2))
+        original = MotifTree.TABLE_MAX_PATTERNS
+        try:
+            MotifTree.TABLE_MAX_PATTERNS = 0
+            self.assertEqual((MedianString(dna, 7), MotifEnumeration(dna, 7, 2)), expected)
+        finally:
+            MotifTree.TABLE_MAX_PATTERNS = original
+        self.assertEqual(textbook_distance(expected[0], dna), DistanceBetweenPatternAndStrings(expected[0], dna))
+
+    def test_invalid_input(self):
+        # Test that bad lengths, mismatch counts and characters are rejected
+        with self.assertRaises(ValueError):
+            MedianString(["ACG"], 4)
+        with self.assertRaises(ValueError):
+            MotifEnumeration(["ACGT"], 2, -1)
+        with self.assertRaises(ValueError):
+            MedianString(["ACNGT"], 2)
+        with self.assertRaises(ValueError):
+            DistanceBetweenPatternAndStrings("AXG", ["ACGT"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import itertools
+import random
+import unittest
+
+import numpy as np
+
+from KmerCounter import CountKmers
+from Neighborhoods import CountWithMismatches, Neighbors, _SpreadSparse
+from PackedSequence import PackedSequence, decode_kmers, encode_kmer, reverse_complement_codes
+from replication import (FrequentWordsWithMismatches, FrequentWordsWithMismatchesAndReverseComplements,
+                         HammingDistance, ReverseComplement)
+
+
+def brute_force(text, k, d, reverse_complement):
+    # Reference result: compare every possible k-mer with every window
+    windows = [text[i:i + k] for i in range(len(text) - k + 1)]
+    counts = {}
+    for kmer in map(''.join, itertools.product('ACGT', repeat=k)):
+        count = sum(HammingDistance(kmer, window) <= d for window in windows)
+        if reverse_complement:
+            count += sum(HammingDistance(ReverseComplement(kmer), window) <= d for window in windows)
+        if count:
+            counts[kmer] = count
+    return counts
+
+
+class TestNeighborhoods(unittest.TestCase):
+
+    def test_neighbors(self):
+        # Test the Rosalind BA1N sample, and the size of larger neighborhoods
+        self.assertEqual(Neighbors("ACG", 1),
+                         ["AAG", "ACA", "ACC", "ACG", "ACT", "AGG", "ATG", "CCG", "GCG", "TCG"])
+        self.assertEqual(len(Neighbors("acgtacgt", 2)), 1 + 8 * 3 + 28 * 9)
+        self.assertEqual(Neighbors("T", 3), ["A", "C", "G", "T"])
+        with self.assertRaises(ValueError):
+            Neighbors("ACN", 1)
+
+    def test_textbook_examples(self):
+        # Test the Rosalind BA1I and BA1J samples
+        text = "ACGTTGCATGTCGCATGATGCATGAGAGCT"
+        self.assertEqual(FrequentWordsWithMismatches(text, 4, 1), ["ATGC", "ATGT", "GATG"])
+        self.assertEqual(FrequentWordsWithMismatchesAndReverseComplements(text, 4, 1), ["ACAT", "ATGT"])
+
+    def test_counts_match_brute_force(self):
+        # Test random texts against the reference, on both the dense and the sparse path
+        rng = random.Random(9)
+        for _ in range(15):
+            text = ''.join(rng.choice('ACGT') for _ in range(rng.randint(0, 50)))
+            k, d, reverse = rng.randint(1, 5), rng.randint(0, 3), rng.random() < 0.5
+            expected = brute_force(text, k, d, reverse)
+            self.assertEqual(dict(CountWithMismatches(text, k, d, reverse)), expected)
+            exact = CountKmers(text, k, dense=False)
+            codes, counts = exact.codes(), exact.counts()
+            if reverse:
+                codes = np.concatenate((codes, reverse_complement_codes(codes, k)))
+                counts = np.concatenate((counts, counts))
+            sparse_codes, sparse_counts = _SpreadSparse(codes, counts, k, d)
+            self.assertEqual(dict(zip(decode_kmers(sparse_codes, k), sparse_counts.tolist())), expected)
+
+    def test_long_kmers(self):
+        # Test k above the dense limit, where neighborhoods are enumerated explicitly
+        text = "ACGTTGCATGTCGCATGATGCATGAGAGCTACGTTGCATGTCGG"
+        windows = [text[i:i + 14] for i in range(len(text) - 13)]
+        counts = CountWithMismatches(text, 14, 1, reverse_complement=True)
+        self.assertFalse(counts.dense)
+        for kmer in (text[:14], "ACGTTGCATGTCGG", ReverseComplement(text[5:19])):
+            expected = sum(HammingDistance(kmer, window) <= 1 for window in windows)
+            expected += sum(HammingDistance(ReverseComplement(kmer), window) <= 1 for window in windows)
+            self.assertEqual(counts[kmer], expected)
+
+    def test_packed_and_n(self):
+        # Test packed input, and that windows containing N are left out
+        self.assertEqual(dict(CountWithMismatches(PackedSequence("ACGTNACG"), 3, 1)),
+                         dict(CountWithMismatches("acgtnacg", 3, 1)))
+        self.assertEqual(CountWithMismatches("ACGNACG", 3, 0)["ACG"], 2)
+        with self.assertRaises(ValueError):
+            CountWithMismatches("ACGT", 2, -1)
+
+    def test_reverse_complement_codes(self):
+        # Test the batch reverse complement of k-mer codes
+        codes = [encode_kmer("AACGT"), encode_kmer("GGGTA")]
+        self.assertEqual(decode_kmers(reverse_complement_codes(codes, 5), 5), ["ACGTT", "TACCC"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import random
+import unittest
+
+from PackedSequence import PackedSequence, canonical, decode_kmers, encode_kmer, reverse_complement_codes
+from replication import ClumpFinder, FrequencyMap, FrequentWords, PatternCount, PatternMatching, ReverseComplement
+
+
+def random_genome(length, seed=0):
+    # Build a reproducible random DNA string
+    rng = random.Random(seed)
+    return ''.join(rng.choice('ACGT') for _ in range(length))
+
+
+class TestPackedSequence(unittest.TestCase):
+
+    def test_round_trip(self):
+        # Test that packing normalizes case, drops whitespace and decodes back to the same bases
+        packed = PackedSequence("acgTN\nNGGa ")
+        self.assertEqual(str(packed), "ACGTNNGGA")
+        self.assertEqual(len(packed), 9)
+        self.assertEqual(packed[4], "N")
+        self.assertEqual(str(packed[2:7]), "GTNNG")
+
+    def test_quarter_memory(self):
+        # Test that the bases take 2 bits each
+        packed = PackedSequence(random_genome(10000))
+        self.assertLessEqual(packed.nbytes, 10000 // 4 + 16)
+
+    def test_invalid_nucleotide(self):
+        # Test that characters other than ACGTN are rejected when encoding
+        with self.assertRaises(ValueError):
+            PackedSequence("ACGX")
+
+    def test_kmer_codes(self):
+        # Test that k-mer codes follow lexicographic order and decode back
+        self.assertEqual(encode_kmer("AAA"), 0)
+        self.assertEqual(encode_kmer("TTT"), 63)
+        self.assertIsNone(encode_kmer("ANA"))
+        self.assertEqual(decode_kmers([0, 27, 63], 3), ["AAA", "CGT", "TTT"])
+
+    def test_reverse_complement_codes(self):
+        # Test the batch reverse complement and canonical codes for every k
+        rng = random.Random(5)
+        for k in range(1, 33):
+            kmers = [random_genome(k, seed=rng.random()) for _ in range(10)]
+            codes = [encode_kmer(kmer) for kmer in kmers]
+            complements = [ReverseComplement(kmer) for kmer in kmers]
+            self.assertEqual(decode_kmers(reverse_complement_codes(codes, k), k), complements)
+            self.assertEqual(decode_kmers(canonical(codes, k), k),
+                             [min(kmer, complement) for kmer, complement in zip(kmers, complements)])
+
+
+class TestPackedReplication(unittest.TestCase):
+
+    def setUp(self):
+        self.text = random_genome(3000, seed=1) + "ATGATCAAG" * 6 + random_genome(2000, seed=2)
+        self.packed = PackedSequence(self.text)
+
+    def test_pattern_count(self):
+        # Test that counting on a packed genome matches the string version, case-insensitively
+        for pattern in ("ATG", "atgatcaag", "CGATT", "A"):
+            self.assertEqual(PatternCount(self.packed, pattern), PatternCount(self.text, pattern))
+
+    def test_pattern_matching(self):
+        # Test that matching on a packed genome returns the same positions
+        for pattern in ("ATGATCAAG", "GGG", "TTTTTTTTTTTT"):
+            self.assertEqual(PatternMatching(pattern, self.packed), PatternMatching(pattern, self.text))
+
+    def test_frequency_map_and_frequent_words(self):
+        # Test that k-mer counts and most frequent words match the string version
+        for k in (1, 4, 9):
+            self.assertEqual(FrequencyMap(self.packed, k), FrequencyMap(self.text, k))
+        self.assertEqual(sorted(FrequentWords(self.packed, 9)), sorted(FrequentWords(self.text, 9)))
+
+    def test_reverse_complement(self):
+        # Test that the packed reverse complement stays packed and mirrors N runs
+        packed = PackedSequence("AACGNNT")
+        self.assertEqual(str(ReverseComplement(packed)), ReverseComplement("AACGNNT"))
+        # Test every length modulo 4, where the padding of the last byte has to be shifted away
+        for length in range(1, 9):
+            text = self.text[:length]
+            self.assertEqual(ReverseComplement(PackedSequence(text)), PackedSequence(ReverseComplement(text)))
+        self.assertEqual(str(ReverseComplement(self.packed)), ReverseComplement(self.text))
+
+    def test_clump_finder(self):
+        # Test that clumps found on a packed genome match the string version
+        self.assertEqual(ClumpFinder(self.packed, 9, 500, 3), ClumpFinder(self.text, 9, 500, 3))
+        self.assertEqual(ClumpFinder(self.packed, 5, 75, 4), ClumpFinder(self.text, 5, 75, 4))
+
+    def test_masked_positions(self):
+        # Test that k-mers overlapping an N are never counted or matched
+        packed = PackedSequence("ACGTNACGT")
+        self.assertEqual(FrequencyMap(packed, 4), {"ACGT": 2})
+        self.assertEqual(PatternMatching("TNA", packed), [])
+        self.assertEqual(PatternCount(packed, "ACG"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import random
+import tempfile
+import unittest
+
+import KmerCache
+
+from Parallel import ParallelClumpFinder, ParallelFrequencyMap, ParallelPatternCount, ParallelPatternMatching
+from PackedSequence import PackedSequence
+from replication import ClumpFinder, FrequencyMap, PatternCount, PatternMatching
+
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(9)
+        self.genome = ''.join(rng.choice('ACGT') for _ in range(6000)) + "TTATCCACA" * 4 + \
+            ''.join(rng.choice('ACGT') for _ in range(3000))
+        # Small shards force several workers and shard boundaries through every result
+        self.options = {"workers": 2, "chunk_size": 700}
+
+    def test_frequency_map(self):
+        # Test that merged shard counts equal the serial counts, including the string path
+        self.assertEqual(ParallelFrequencyMap(self.genome, 9, **self.options), FrequencyMap(self.genome, 9))
+        text = self.genome[:3000] + "#" + self.genome[3000:]
+        self.assertEqual(ParallelFrequencyMap(text, 4, **self.options), FrequencyMap(text, 4))
+
+    def test_cache_holds_merged_table_only(self):
+        # Test that with the k-mer cache on, the shards are not cached and the merged table is reused
+        with tempfile.TemporaryDirectory() as directory:
+            cache = KmerCache.enable(directory)
+            try:
+                merged = ParallelFrequencyMap(self.genome, 9, **self.options)
+                self.assertEqual(cache.stats().entries, 1)
+                self.assertEqual(ParallelFrequencyMap(self.genome, 9, **self.options), merged)
+                self.assertEqual(cache.stats().hits, 1)
+            finally:
+                KmerCache.disable()
+        self.assertEqual(merged, FrequencyMap(self.genome, 9))
+
+    def test_short_tail_shard(self):
+        # Test that a last shard shorter than k adds no k-mers, even on the string path
+        text = self.genome[:1400] + "A#C"
+        merged = ParallelFrequencyMap(text, 4, **self.options)
+        self.assertNotIn("A#C", merged)
+        self.assertEqual(merged, FrequencyMap(text, 4))
+
+    def test_pattern_count_and_matching(self):
+        # Test that occurrences spanning shard boundaries are found exactly once
+        for pattern in ("TTATCCACA", "AC", self.genome[695:705]):
+            self.assertEqual(ParallelPatternCount(self.genome, pattern, **self.options), PatternCount(self.genome, pattern))
+            self.assertEqual(ParallelPatternMatching(pattern, self.genome, **self.options),
+                             PatternMatching(pattern, self.genome))
+
+    def test_clump_finder(self):
+        # Test that the union of shard clumps equals the serial clumps
+        self.assertEqual(ParallelClumpFinder(self.genome, 9, 500, 3, **self.options), ClumpFinder(self.genome, 9, 500, 3))
+        self.assertEqual(ParallelClumpFinder(self.genome, 4, 60, 5, **self.options), ClumpFinder(self.genome, 4, 60, 5))
+
+    def test_packed_genome(self):
+        # Test that a packed genome keeps its N mask in the workers
+        packed = PackedSequence(self.genome[:4000] + "NNNN" + self.genome[4000:])
+        self.assertEqual(ParallelFrequencyMap(packed, 5, **self.options), FrequencyMap(packed, 5))
+        self.assertEqual(ParallelPatternMatching("ttatccaca", packed, **self.options), PatternMatching("ttatccaca", packed))
+        self.assertEqual(ParallelClumpFinder(packed, 4, 60, 5, **self.options), ClumpFinder(packed, 4, 60, 5))
+        self.assertEqual(ParallelPatternCount(packed, "ACGTA", **self.options), PatternCount(packed, "ACGTA"))
+
+    def test_invalid_inputs_raise_serial_errors(self):
+        # Test that invalid inputs raise the same errors as the serial functions
+        with self.assertRaises(ValueError):
+            ParallelPatternCount(self.genome, "", **self.options)
+        with self.assertRaises(ValueError):
+            ParallelFrequencyMap("", 3, **self.options)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import gzip
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from KmerCounter import CountKmers, MergeCounts
+from PackedSequence import PackedSequence
+from ReadCounter import CountReads, ReadBatches
+
+
+def random_reads(count, seed):
+    # Build reproducible reads of varying length with Phred+33 quality strings
+    rng = random.Random(seed)
+    reads = []
+    for _ in range(count):
+        length = rng.randint(0, 120)
+        bases = ''.join(rng.choice('ACGTacgtN' if rng.random() < 0.1 else 'ACGT') for _ in range(length))
+        quality = ''.join(chr(33 + rng.randint(2, 40)) for _ in range(length))
+        reads.append((bases, quality))
+    return reads
+
+
+def expected_counts(reads, k, canonical=False, min_quality=None):
+    # Reference result: count every read on its own, with low-quality bases turned into N, and add up
+    tables = [CountKmers('', k)]
+    for bases, quality in reads:
+        if min_quality is not None:
+            bases = ''.join('N' if ord(q) - 33 < min_quality else b for b, q in zip(bases, quality))
+        tables.append(CountKmers(PackedSequence(bases), k, canonical=canonical))
+    return MergeCounts(tables)
+
+
+class TestReadCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.reads = random_reads(400, 5)
+        self.directory = tempfile.TemporaryDirectory()
+        self.fastq = os.path.join(self.directory.name, "reads.fastq")
+        with open(self.fastq, "w") as handle:
+            for i, (bases, quality) in enumerate(self.reads):
+                handle.write(f"@read{i}\n{bases}\n+\n{quality}\n")
+        self.fasta = os.path.join(self.directory.name, "reads.fa.gz")
+        with gzip.open(self.fasta, "wt") as handle:
+            for i, (bases, _) in enumerate(self.reads):
+                # Wrap the longer reads over several lines
+                handle.write(f">read{i} sample\n" + "\n".join(bases[j:j + 50] for j in range(0, len(bases), 50))
+                             + "\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_never_crosses_reads(self):
+        # Test that counts equal the sum of per-read counts, for FASTQ and gzipped multi-line FASTA
+        for k, canonical in [(3, False), (7, True), (15, False)]:
+            expected = expected_counts(self.reads, k, canonical)
+            for path in (self.fastq, self.fasta):
+                self.assertEqual(CountReads(path, k, canonical=canonical, workers=1, batch_size=999), expected)
+
+    def test_process_pool(self):
+        # Test that counting batches in worker processes gives the same table
+        expected = expected_counts(self.reads, 11)
+        self.assertEqual(CountReads(self.fastq, 11, workers=2, batch_size=2000), expected)
+        self.assertEqual(CountReads(self.fasta, 11, workers=2, batch_size=2000), expected)
+
+    def test_quality_mask(self):
+        # Test that k-mers covering a base below the minimum quality are skipped
+        for min_quality in (10, 30):
+            self.assertEqual(CountReads(self.fastq, 5, min_quality=min_quality, workers=1, batch_size=1500),
+                             expected_counts(self.reads, 5, min_quality=min_quality))
+        with self.assertRaises(ValueError):
+            CountReads(self.fasta, 5, min_quality=20, workers=1)
+
+    def test_batches_keep_reads_whole(self):
+        # Test that batches stay near the batch size and hold every read exactly once
+        batches = list(ReadBatches(self.fastq, batch_size=1000))
+        self.assertGreater(len(batches), 10)
+        bases = sum(int(np.count_nonzero(batch != 4)) for batch in batches)
+        self.assertEqual(bases, sum(len(b) - b.upper().count('N') for b, _ in self.reads))
+        self.assertEqual(sum(int(np.count_nonzero(batch == 4)) for batch in batches),
+                         len(self.reads) + sum(b.upper().count('N') for b, _ in self.reads))
+
+    def test_malformed_input(self):
+        # Test that truncated or unknown files are reported, from the reader thread
+        path = os.path.join(self.directory.name, "bad.fastq")
+        with open(path, "w") as handle:
+            handle.write("@r1\nACGT\n+\nIIII\n@r2\nACGT\n")
+        with self.assertRaises(ValueError):
+            CountReads(path, 3, workers=1)
+        with open(path, "w") as handle:
+            handle.write("ACGT\n")
+        with self.assertRaises(ValueError):
+            CountReads(path, 3, workers=1)
+        with self.assertRaises(ValueError):
+            CountReads(self.fastq, 0)
+        empty = os.path.join(self.directory.name, "empty.fa")
+        open(empty, "w").close()
+        self.assertEqual(dict(CountReads(empty, 3, workers=1)), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
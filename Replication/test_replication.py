@@ -1,6 +1,11 @@
 from replication import FrequencyMap
+import os
+import tempfile
 import unittest
 from replication import PatternCount
+from replication import MinimumSkew, ReverseComplement, Skew
+from GenomeReader import GenomeReader
+from PackedSequence import PackedSequence
 
 class TestPatternCount(unittest.TestCase):
 
@@ -126,5 +131,61 @@ class TestFrequencyMap(unittest.TestCase):
         self.assertEqual(FrequencyMap(text, k), expected_freq_map)
 
 
+class TestReverseComplement(unittest.TestCase):
+
+    def test_reverse_complement_basic(self):
+        # Test the textbook example, lower case and N
+        self.assertEqual(ReverseComplement("AAAACCCGGT"), "ACCGGGTTTT")
+        self.assertEqual(ReverseComplement("acgtn"), "NACGT")
+
+    def test_bytes(self):
+        # Test that bytes are complemented to bytes
+        self.assertEqual(ReverseComplement(b"AAAACCCGGT"), b"ACCGGGTTTT")
+        self.assertEqual(ReverseComplement(bytearray(b"GATC")), b"GATC")
+        self.assertIsInstance(ReverseComplement(bytearray(b"GATC")), bytearray)
+
+    def test_invalid_nucleotides(self):
+        # Test that any invalid character is rejected, including non-Latin ones
+        for pattern in ("ACGX", "AC GT", "ACG\u00e9", "ACG\u4e00", ""):
+            with self.assertRaises(ValueError):
+                ReverseComplement(pattern)
+
+
+class TestSkew(unittest.TestCase):
+
+    def test_skew_textbook_example(self):
+        # Test the skew of the textbook example, including the empty prefix
+        self.assertEqual(Skew("CATGGGCATCGGCCATACGCC").tolist(),
+                         [0, -1, -1, -1, 0, 1, 2, 1, 1, 1, 0, 1, 2, 1, 0, 0, 0, 0, -1, 0, -1, -2])
+        self.assertEqual(Skew("").tolist(), [0])
+
+    def test_minimum_skew_textbook_example(self):
+        # Test the Rosalind BA1F sample, in mixed case and across small chunks
+        genome = "TAAAGACTGCCGAGAGGCCAACACGAGTGCTAGAACGAGGGGCGTAAACGCGGGTCCGAT"
+        self.assertEqual(MinimumSkew(genome), [11, 24])
+        self.assertEqual(MinimumSkew(genome.lower(), chunk_size=7), [11, 24])
+        self.assertEqual(MinimumSkew(PackedSequence(genome), chunk_size=5), [11, 24])
+        self.assertEqual(MinimumSkew("GGG"), [0])
+
+    def test_minimum_skew_trace(self):
+        # Test that the trace samples the full skew at every trace_step-th position
+        genome = "CATGGGCATCGGCCATACGCC" * 5
+        positions, trace = MinimumSkew(genome, trace_step=4, chunk_size=6)
+        self.assertEqual(trace.tolist(), Skew(genome)[::4].tolist())
+        self.assertEqual(positions, [105])
+        with self.assertRaises(ValueError):
+            MinimumSkew(genome, trace_step=0)
+
+    def test_minimum_skew_streaming(self):
+        # Test reading the genome from a FASTA file through a GenomeReader
+        genome = "TAAAGACTGCCGAGAGGCCAACACGAGTGCTAGAACGAGGGGCGTAAACGCGGGTCCGAT"
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "genome.fa")
+            with open(path, "w") as handle:
+                handle.write(">chromosome\n" + genome[:25] + "\n" + genome[25:] + "\n")
+            with GenomeReader(path) as reader:
+                self.assertEqual(MinimumSkew(reader, chunk_size=8), [11, 24])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,282 @@
+# BatchRunner.py
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import FrequentWords
+import PatternCount
+from ReplicationEngine import Genome, PackedSequence, replication
+
+# Every batch task: name -> (function, name of its genome parameter, whether it accepts a cached Genome)
+TASKS = {
+    'PatternCount': (PatternCount.PatternCount, 'Text', False),
+    'FrequentWords': (FrequentWords.FrequentWords, 'Text', False),
+    'BetterFrequentWords': (FrequentWords.BetterFrequentWords, 'Text', False),
+    'FrequencyTable': (FrequentWords.FrequencyTable, 'Text', False),
+    'FrequentWordsWithMismatches': (FrequentWords.FrequentWordsWithMismatches, 'Text', False),
+    'PatternMatching': (replication.PatternMatching, 'Genome', True),
+    'ApproximatePatternMatching': (replication.ApproximatePatternMatching, 'Genome', True),
+    'ClumpFinder': (replication.ClumpFinder, 'Genome', True),
+    'ReverseComplement': (replication.ReverseComplement, 'Pattern', False),
+    'MinimumSkew': (replication.MinimumSkew, 'Genome', True),
+}
+
+# Inputs of the current process: key -> bytes or PackedSequence (or views of the shared-memory copy made by
+# the parent)
+_sources = {}
+
+# Inputs already decoded by the current process: key -> text, Genome or argument list
+_loaded = {}
+
+# Shared-memory segments the current worker is attached to, kept open for its lifetime
+_attached = []
+
+'''
+Batch mode for the FrequentPatterns entry point: runs a JSONL manifest of tasks on one resident process pool.
+
+Each manifest line is a JSON object such as
+
+    {"id": "ba1a", "task": "PatternCount", "dataset": "data/rosalind_ba1a.txt"}
+    {"id": "ori", "task": "ClumpFinder", "genome": "data/Vibrio_cholerae.txt", "params": {"k": 9, "L": 500, "t": 3}}
+    {"id": "rc", "task": "ReverseComplement", "params": {"Pattern": "ATGATCAAG"}}
+
+A "dataset" is a Rosalind-style input file: its lines are the positional arguments of the task, and a line of
+whitespace-separated integers (such as "k L t") gives one argument per integer. A "genome" is a plain-text or
+FASTA file (or inline "text") passed as the task's genome parameter, with the other arguments in "params".
+Relative paths are resolved against the directory of the manifest.
+
+Every referenced file is read once by the parent and copied into shared memory, which the workers attach to
+when they start; a nucleotide genome is packed first, so the shared copy holds 2 bits per base. The engine
+tasks (PatternMatching, ClumpFinder, ...) receive a Genome wrapped around the shared packed bases without
+copying them, so the index of a genome is built once per worker and reused by the following tasks on it;
+other tasks receive the decoded text, made the first time one of them needs it and then kept. Results are
+written as JSON lines as soon as they finish, in completion order, each with the task's own running time.
+
+A task fails its job by raising. Whatever it prints goes to standard error, so that standard output carries
+only the result lines.
+'''
+
+
+def ReadManifest(path):
+    """
+    Reads a JSONL manifest of tasks.
+
+    Args:
+    - path (str): The path to the manifest.
+
+    Returns:
+    - list: The jobs, as dictionaries, with their input paths made absolute and a default id (the line number).
+
+    Raises:
+    - ValueError: If a line is not a JSON object.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path) as handle:
+        for number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError(f"Line {number} of the manifest is not a JSON object")
+            job.setdefault('id', number)
+            for field in ('dataset', 'genome'):
+                if field in job:
+                    job[field] = os.path.join(base, job[field])
+            jobs.append(job)
+    return jobs
+
+
+def RunBatch(jobs, output=None, workers=None):
+    """
+    Runs a batch of jobs and streams their results as JSON lines.
+
+    Args:
+    - jobs (list): The jobs, as returned by ReadManifest.
+    - output (file, optional): Where the result lines are written; defaults to standard output.
+    - workers (int, optional): The number of worker processes; defaults to the number of CPUs. 1 runs every
+      job in this process.
+
+    Returns:
+    - int: The number of jobs that failed.
+    """
+    output = output or sys.stdout
+    failed = 0
+    for result in BatchResults(jobs, workers):
+        failed += not result['ok']
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+    return failed
+
+
+def BatchResults(jobs, workers=None):
+    """
+    Runs a batch of jobs, yielding each result as soon as it is ready.
+
+    Args:
+    - jobs (list): The jobs, as returned by ReadManifest.
+    - workers (int, optional): The number of worker processes, as for RunBatch.
+
+    Yields:
+    - dict: {'id', 'task', 'ok', 'seconds', 'worker'} plus 'result' on success or 'error' on failure.
+    """
+    sources = _ReadSources(jobs)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        _sources.update(sources)
+        try:
+            for job in jobs:
+                yield _RunJob(job)
+        finally:
+            for key in sources:
+                _sources.pop(key, None)
+                _loaded.pop(key, None)
+        return
+
+    # One shared copy of every input; only the segment names (and the shape of packed genomes) travel to the
+    # workers
+    segments, layout = {}, {}
+    try:
+        for key, data in sources.items():
+            packed = isinstance(data, PackedSequence)
+            raw = data.packed if packed else data
+            segment = shared_memory.SharedMemory(create=True, size=max(len(raw), 1))
+            segment.buf[:len(raw)] = raw
+            segments[key] = segment
+            layout[key] = (segment.name, len(raw), (len(data), data.n_runs) if packed else None)
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_Attach,
+                                 initargs=(layout,)) as pool:
+            futures = [pool.submit(_RunJob, job) for job in jobs]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        for segment in segments.values():
+            segment.close()
+            segment.unlink()
+
+
+def _ReadSources(jobs):
+    """Reads every input file the jobs refer to, once each; returns key -> bytes, or PackedSequence for a genome."""
+    sources = {}
+    for job in jobs:
+        key = _Key(job)
+        if key is None or key in sources:
+            continue
+        kind, path = key
+        try:
+            if kind == 'genome':
+                genome = Genome.from_file(path)
+                sources[key] = genome.packed() if genome.nucleotide else genome.text.encode('latin-1')
+            else:
+                with open(path, 'rb') as handle:
+                    sources[key] = handle.read()
+        except (OSError, UnicodeEncodeError):
+            # Reported by the jobs that need the file
+            continue
+    return sources
+
+
+def _Attach(layout):
+    """Pool initializer: attaches the worker to the shared copies of the inputs."""
+    for key, (name, size, shape) in layout.items():
+        segment = shared_memory.SharedMemory(name=name)
+        _attached.append(segment)
+        if shape is None:
+            _sources[key] = segment.buf[:size]
+        else:
+            # The packed bases are read in place from the segment
+            length, n_runs = shape
+            bases = np.frombuffer(segment.buf, dtype=np.uint8, count=size)
+            _sources[key] = PackedSequence.from_packed(bases, length, n_runs)
+
+
+def _Key(job):
+    """Returns the input key of a job, ('dataset' or 'genome', path), or None if it has no input file."""
+    for kind in ('dataset', 'genome'):
+        if kind in job:
+            return kind, job[kind]
+    return None
+
+
+def _Input(key, engine):
+    """Decodes an input once per process: a Genome or text for a genome, the argument list for a dataset."""
+    cache_key = key + (engine,)
+    if cache_key not in _loaded:
+        if key not in _sources:
+            raise FileNotFoundError(f"Cannot read {key[1]}")
+        source = _sources[key]
+        if isinstance(source, PackedSequence):
+            # A Genome wraps the packed bases as they are; only the string tasks need the text decoded
+            _loaded[cache_key] = Genome(source) if engine else str(source)
+        else:
+            text = bytes(source).decode('latin-1')
+            if key[0] == 'genome':
+                _loaded[cache_key] = Genome(text) if engine else text
+            else:
+                _loaded[cache_key] = _ParseDataset(text)
+    return _loaded[cache_key]
+
+
+def _ParseDataset(text):
+    """Turns the lines of a Rosalind-style input into positional arguments."""
+    arguments = []
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if all(field.lstrip('-').isdigit() for field in fields):
+            arguments.extend(int(field) for field in fields)
+        else:
+            arguments.append(line.strip())
+    return arguments
+
+
+def _RunJob(job):
+    """Runs one job; never raises, so that one bad job does not stop the batch."""
+    result = {'id': job.get('id'), 'task': job.get('task'), 'worker': os.getpid()}
+    start = time.perf_counter()
+    try:
+        if job.get('task') not in TASKS:
+            raise ValueError(f"Unknown task: {job.get('task')}")
+        function, genome_parameter, engine = TASKS[job['task']]
+        arguments, keywords = [], dict(job.get('params', {}))
+        key = _Key(job)
+        if key is not None and key[0] == 'dataset':
+            arguments = _Input(key, False)
+        elif key is not None:
+            keywords[genome_parameter] = _Input(key, engine)
+        elif 'text' in job:
+            keywords[genome_parameter] = job['text']
+        # Only the task itself is timed, not the decoding of its input
+        start = time.perf_counter()
+        printed = io.StringIO()
+        try:
+            with redirect_stdout(printed):
+                value = function(*arguments, **keywords)
+        finally:
+            sys.stderr.write(printed.getvalue())
+        result.update(ok=True, result=_Jsonable(value))
+    except Exception as e:
+        result.update(ok=False, error=f"{type(e).__name__}: {e}")
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _Jsonable(value):
+    """Converts a task result (tuples, sets, count tables, NumPy values) to plain JSON types."""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, 'items'):
+        return {str(key): _Jsonable(count) for key, count in value.items()}
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(_Jsonable(item) for item in value)
+    return [_Jsonable(item) for item in value]
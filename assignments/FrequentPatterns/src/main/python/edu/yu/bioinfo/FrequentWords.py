@@ -1,7 +1,10 @@
 # FrequentWords.py
 from PatternCount import PatternCount
+from ReplicationEngine import (CachedCountKmers, CountWithMismatches, Instrumentation, is_acgt, KmerCounts,
+                               MAX_CODE_K, TopKmers)
 
 
+@Instrumentation.timed()
 def FrequentWords(Text, k):
     """
     Finds the most frequent k-mers in a given text.
@@ -11,70 +14,93 @@ def FrequentWords(Text, k):
     - k (int): The length of k-mers.
 
     Returns:
-    - list: List of most frequent k-mers.
+    - list: List of most frequent k-mers; empty if the text is shorter than k.
+
+    Raises:
+    - TypeError: If Text is not a string.
     """
     # Initialize an empty set to store most frequent k-mers
     FrequentPatterns = set()
 
     # Initialize an array to store counts for each k-mer in the text
     count = [0] * (len(Text) - k + 1)
+    # Every window is sliced and counted with a full PatternCount scan of the text
+    if Instrumentation._enabled:
+        Instrumentation.count('FrequentWords.FrequentWords', positions=len(count), pattern_count_calls=len(count),
+                              allocations_made=len(count))
 
-    try:
-        # Iterate through each possible starting position of a k-mer in the text
-        for i in range(len(Text) - k + 1):
-            pattern = Text[i:i+k]
-            # Count the occurrences of the current k-mer using PatternCount function
-            count[i] = PatternCount(Text, pattern)
-
-        # Find the maximum count in the count array
-        maxCount = max(count)
+    # Iterate through each possible starting position of a k-mer in the text
+    for i in range(len(Text) - k + 1):
+        pattern = Text[i:i+k]
+        # Count the occurrences of the current k-mer using PatternCount function
+        count[i] = PatternCount(Text, pattern)
 
-        # Iterate through each k-mer again and add it to the set if its count is equal to maxCount
-        for i in range(len(Text) - k + 1):
-            if count[i] == maxCount:
-                FrequentPatterns.add(Text[i:i+k])
+    # Find the maximum count in the count array
+    maxCount = max(count, default=0)
 
-    except Exception as e:
-        # Handle any exceptions and print an error message
-        print(f"Error in FrequentWords: {e}")
+    # Iterate through each k-mer again and add it to the set if its count is equal to maxCount
+    for i in range(len(Text) - k + 1):
+        if count[i] == maxCount:
+            FrequentPatterns.add(Text[i:i+k])
 
     # Convert the set to a list and return the result
     return list(FrequentPatterns)
 
 
+@Instrumentation.timed()
 def FrequencyTable(Text, k):
     """
     Builds a frequency table for k-mers in a given text.
 
+    Upper-case nucleotide text is counted by the integer k-mer engine (rolling 2-bit codes with a dense or
+    sorted count table), through the on-disk k-mer cache when REPLICATION_KMER_CACHE is set; any other text
+    is counted by slicing out each k-mer.
+
     Args:
     - Text (str): The input text.
     - k (int): The length of k-mers.
 
     Returns:
-    - dict: A frequency table (dictionary) of k-mers.
+    - dict or KmerCounts: A frequency table (dictionary, or dict-compatible KmerCounts view) of k-mers. A
+      KmerCounts lists its k-mers in lexicographic order, a dictionary in the order they first occur.
     """
+    # The table is case-sensitive, so only text that is already upper-case can go through the engine
+    if 0 < k <= MAX_CODE_K and len(Text) >= k:
+        try:
+            # Served from the on-disk k-mer cache when one is enabled
+            freqMap = CachedCountKmers(Text, k, case_sensitive=True)
+            if Instrumentation._enabled:
+                Instrumentation.count('FrequentWords.FrequencyTable', positions=len(Text),
+                                      allocations_avoided=len(Text) - k + 1)
+                Instrumentation.observe('FrequentWords.FrequencyTable', table_size=len(freqMap))
+            return freqMap
+        except (TypeError, ValueError):
+            # Fall back to slicing for text the engine cannot encode
+            pass
+
     # Initialize an empty dictionary to store frequencies of k-mers
     freqMap = {}
     n = len(Text)
 
-    try:
-        # Iterate through each possible starting position of a k-mer in the text
-        for i in range(n - k + 1):
-            # Extract the current k-mer
-            Pattern = Text[i:i+k]
-            # Update the frequency in the dictionary
-            if Pattern not in freqMap:
-                freqMap[Pattern] = 1
-            else:
-                freqMap[Pattern] += 1
-    except Exception as e:
-        # Handle any exceptions and print an error message
-        print(f"Error in FrequencyTable: {e}")
-
+    # Iterate through each possible starting position of a k-mer in the text
+    for i in range(n - k + 1):
+        # Extract the current k-mer
+        Pattern = Text[i:i+k]
+        # Update the frequency in the dictionary
+        if Pattern not in freqMap:
+            freqMap[Pattern] = 1
+        else:
+            freqMap[Pattern] += 1
+
+    # Every window is sliced out as a new string
+    if Instrumentation._enabled:
+        Instrumentation.count('FrequentWords.FrequencyTable', positions=len(Text), allocations_made=max(n - k + 1, 0))
+        Instrumentation.observe('FrequentWords.FrequencyTable', table_size=len(freqMap))
     # Return the final frequency table
     return freqMap
 
 
+@Instrumentation.timed()
 def MaxMap(freqMap):
     """
     Finds the maximum value in a map.
@@ -83,28 +109,42 @@ def MaxMap(freqMap):
     - freqMap (dict): A map (dictionary) with keys as strings and values as integers.
 
     Returns:
-    - int: The maximum value in the map.
+    - int: The maximum value in the map, or 0 if the map is empty.
     """
-    try:
-        # Return the maximum value in the dictionary
-        return max(freqMap.values())
-    except Exception as e:
-        # Handle any exceptions and print an error message
-        print(f"Error in MaxMap: {e}")
-        return 0  # Return 0 if there's an error.
+    # Count tables from the k-mer engine find their maximum with array operations
+    if isinstance(freqMap, KmerCounts):
+        return freqMap.max_count()
+    # Return the maximum value in the dictionary
+    return max(freqMap.values(), default=0)
 
 
-def BetterFrequentWords(Text, k):
+@Instrumentation.timed()
+def BetterFrequentWords(Text, k, top=None):
     """
     Finds all most frequent k-mers in a given text.
 
+    With top, the exact frequency table is never built: the top most frequent k-mers are found with a
+    fixed-size Count-Min sketch and verified by an exact second pass over the candidates only (see TopKmers),
+    which keeps memory bounded for long k-mers on large inputs. The sketch ignores case and skips windows with
+    an N, while the frequency table does neither, so top only accepts text of upper-case A, C, G and T, on which
+    both give the same k-mers.
+
     Args:
     - Text (str): The input text.
     - k (int): The length of k-mers.
+    - top (int, optional): The number of k-mers to return, most frequent first, in bounded memory.
 
     Returns:
-    - list: List of most frequent k-mers.
+    - list: List of most frequent k-mers: in lexicographic order when the table came from the k-mer engine,
+      otherwise in the order they first occur.
+
+    Raises:
+    - ValueError: If top is given and the text has any character other than upper-case A, C, G and T.
     """
+    if top is not None:
+        if not is_acgt(Text):
+            raise ValueError("top requires text of upper-case A, C, G and T only")
+        return TopKmers(Text, k, top, verify=True).kmers
     # Initialize an empty list to store most frequent k-mers
     FrequentPatterns = []
     # Build the frequency table using the FrequencyTable function
@@ -112,15 +152,38 @@ def BetterFrequentWords(Text, k):
     # Find the maximum count in the frequency table using the MaxMap function
     maxCount = MaxMap(freqMap)
 
-    try:
-        # Iterate through each k-mer in the frequency table
-        for pattern in freqMap:
-            # Add the k-mer to the list if its count is equal to maxCount
-            if freqMap[pattern] == maxCount:
-                FrequentPatterns.append(pattern)
-    except Exception as e:
-        # Handle any exceptions and print an error message
-        print(f"Error in BetterFrequentWords: {e}")
+    # Count tables from the k-mer engine select their most frequent k-mers with array operations
+    if isinstance(freqMap, KmerCounts):
+        return freqMap.most_frequent()
+    # Iterate through each k-mer in the frequency table
+    for pattern in freqMap:
+        # Add the k-mer to the list if its count is equal to maxCount
+        if freqMap[pattern] == maxCount:
+            FrequentPatterns.append(pattern)
 
     # Return the final list of most frequent k-mers
     return FrequentPatterns
+
+
+@Instrumentation.timed()
+def FrequentWordsWithMismatches(Text, k, d, reverse_complements=False):
+    """
+    Finds the most frequent k-mers with up to d mismatches in a given text.
+
+    Every k-mer is counted once for each window of the text within Hamming distance d of it (and, optionally,
+    once for each window within distance d of its reverse complement). The d-neighborhoods are built as
+    integer k-mer codes by the engine, so no neighbor is ever spelled out as a string.
+
+    Args:
+    - Text (str): The input text, made of A, C, G, T (and N) in any case.
+    - k (int): The length of k-mers.
+    - d (int): The maximum number of mismatches.
+    - reverse_complements (bool): Whether to add the counts of each k-mer's reverse complement.
+
+    Returns:
+    - list: List of most frequent k-mers, in lexicographic order.
+
+    Raises:
+    - ValueError: If k is out of range, d is negative, or the text has characters other than A, C, G, T and N.
+    """
+    return CountWithMismatches(Text, k, d, reverse_complement=reverse_complements).most_frequent()
@@ -1,4 +1,5 @@
 # PatternCount.py
+from ReplicationEngine import CountOccurrences
 
 def PatternCount(Text, Pattern):
     """
@@ -28,16 +29,9 @@ def PatternCount(Text, Pattern):
     if len(Pattern) > len(Text):
         raise ValueError("Pattern length cannot be greater than Text length")
     
-    # Initialize the count of occurences
-    count = 0
-
     try:
-        # Iterate through each possible starting position of a substring of length Pattern in Text
-        for i in range(len(Text) - len(Pattern) + 1):
-            # Check if the substring from position i to i + len(Pattern) is equal to the given Pattern
-            if Text[i:i+len(Pattern)] == Pattern:
-                # If equal, increment the count
-                count += 1
+        # Count every (overlapping) occurrence with the shared exact-search engine, without listing positions
+        count = CountOccurrences(Text, Pattern)
     except Exception as e:
         # Raise an exception with a descriptive error message
         raise ValueError(f"Error counting pattern occurrences: {e}")
@@ -47,8 +41,8 @@ def PatternCount(Text, Pattern):
 
 '''
 This code defines a function PatternCount that counts the occurrences of a given pattern (Pattern) in a given text (Text). 
-The function uses a sliding window approach to iterate through the text and check for matches with the pattern. 
-If a match is found, the count is incremented. Any exceptions during the process are caught and an error message is printed. 
+The occurrences, overlapping ones included, are counted by the exact-search engine of the Replication directory,
+which picks a vectorized, str.find or KMP scan for the query. Any exceptions during the process are caught and an error message is printed. 
 The final count is returned.
 '''
 
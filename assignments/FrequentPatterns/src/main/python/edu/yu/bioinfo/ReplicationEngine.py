@@ -0,0 +1,26 @@
+# ReplicationEngine.py
+import os
+import sys
+
+# The shared k-mer engine lives in the top-level Replication directory of this repository
+REPLICATION_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), *([os.pardir] * 8), 'Replication'))
+if REPLICATION_DIR not in sys.path:
+    sys.path.append(REPLICATION_DIR)
+
+import Instrumentation  # noqa: E402
+import replication  # noqa: E402
+from ExactSearch import CountOccurrences  # noqa: E402
+from GenomeSession import Genome  # noqa: E402
+from HeavyHitters import TopKmers  # noqa: E402
+from KmerCache import CachedCountKmers  # noqa: E402
+from KmerCounter import CountKmers, KmerCounts  # noqa: E402
+from Neighborhoods import CountWithMismatches  # noqa: E402
+from PackedSequence import is_acgt, MAX_CODE_K, PackedSequence  # noqa: E402
+
+'''
+This module makes the integer-coded engine modules of the Replication directory importable from the assignment
+sources, so that both code bases count k-mers the same way; the batch runner also reaches the replication
+functions and the Genome session through it. Import the engine names from here rather than
+changing sys.path in each assignment file.
+'''
@@ -1,8 +1,24 @@
 # main.py
+import argparse
+import sys
+
+from BatchRunner import ReadManifest, RunBatch
 from FrequentWords import BetterFrequentWords
 from PatternCount import PatternCount
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Finds the most frequent k-mers of a sample text, or runs a batch.")
+    parser.add_argument('--batch', metavar='MANIFEST', help="JSONL manifest of tasks to run on a process pool")
+    parser.add_argument('--workers', type=int, help="worker processes for --batch (default: one per CPU)")
+    parser.add_argument('--output', help="write the JSONL results to this file instead of standard output")
+    args = parser.parse_args(argv)
+    if args.batch:
+        jobs = ReadManifest(args.batch)
+        if args.output:
+            with open(args.output, 'w') as output:
+                return 1 if RunBatch(jobs, output, args.workers) else 0
+        return 1 if RunBatch(jobs, sys.stdout, args.workers) else 0
+
     # Sample Input
     #Text = "ACGTTGCATGTCGCATGATGCATGAGAGCT"
     #k = 4
@@ -27,4 +43,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+# The modules under test live in the main source tree of the assignment
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..',
+                                                 '..', '..', '..', 'main', 'python', 'edu', 'yu', 'bioinfo')))
+
+from BatchRunner import BatchResults, ReadManifest, RunBatch  # noqa: E402
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.directory.name, "ba1a.txt"), "w") as handle:
+            handle.write("GCGCGATCGCGATCGC\nGCG\n")
+        with open(os.path.join(self.directory.name, "genome.fa"), "w") as handle:
+            handle.write(">genome\nCGGACTCGACAGATGTGAAG\nAACGACAATGTGAAGACTCGACACGACAGAGTGAAGAGAAGAGGAAACATTGTAA\n")
+        self.manifest = os.path.join(self.directory.name, "manifest.jsonl")
+        self.write_manifest([
+            {"id": "count", "task": "PatternCount", "dataset": "ba1a.txt"},
+            {"id": "clumps", "task": "ClumpFinder", "genome": "genome.fa", "params": {"k": 5, "L": 50, "t": 4}},
+            {"id": "skew", "task": "MinimumSkew", "genome": "genome.fa"},
+            {"task": "ReverseComplement", "params": {"Pattern": "AAAACCCGGT"}},
+            {"id": "frequent", "task": "BetterFrequentWords", "text": "ACGTTGCATGTCGCATGATGCATGAGAGCT",
+             "params": {"k": 4}},
+            {"id": "match", "task": "PatternMatching", "genome": "genome.fa", "params": {"Pattern": "GTGAAG"}},
+        ])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_manifest(self, jobs):
+        with open(self.manifest, "w") as handle:
+            for job in jobs:
+                handle.write(json.dumps(job) + "\n")
+            handle.write("\n")
+
+    def run_batch(self, workers):
+        output, errors = io.StringIO(), io.StringIO()
+        with redirect_stderr(errors):
+            failed = RunBatch(ReadManifest(self.manifest), output, workers=workers)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        return failed, {line['id']: line for line in lines}, errors.getvalue()
+
+    def test_read_manifest(self):
+        # Test that paths are resolved against the manifest, ids default to line numbers and blank lines are skipped
+        jobs = ReadManifest(self.manifest)
+        self.assertEqual(len(jobs), 6)
+        self.assertEqual(jobs[0]['dataset'], os.path.join(self.directory.name, "ba1a.txt"))
+        self.assertEqual(jobs[3]['id'], 4)
+        with open(self.manifest, "w") as handle:
+            handle.write('["PatternCount"]\n')
+        with self.assertRaises(ValueError):
+            ReadManifest(self.manifest)
+
+    def test_serial_and_pool(self):
+        # Test that the serial path and the process pool give the same results
+        failed, serial, _ = self.run_batch(workers=1)
+        self.assertEqual(failed, 0)
+        self.assertEqual(serial['count']['result'], 3)
+        self.assertEqual(serial['clumps']['result'], ['CGACA', 'GAAGA'])
+        self.assertEqual(serial[4]['result'], 'ACCGGGTTTT')
+        self.assertEqual(serial['frequent']['result'], ['CATG', 'GCAT'])
+        self.assertEqual(serial['match']['result'], [14, 29, 50])
+        failed, pooled, _ = self.run_batch(workers=2)
+        self.assertEqual(failed, 0)
+        self.assertEqual({key: line['result'] for key, line in pooled.items()},
+                         {key: line['result'] for key, line in serial.items()})
+
+    def test_failures(self):
+        # Test that unknown tasks, missing files and errors raised by tasks fail their own job only
+        self.write_manifest([
+            {"id": "unknown", "task": "Nothing"},
+            {"id": "missing", "task": "PatternCount", "dataset": "absent.txt"},
+            {"id": "caught", "task": "FrequentWordsWithMismatches", "params": {"Text": "ACGT#ACGT", "k": 3, "d": 1}},
+            {"id": "raised", "task": "ReverseComplement", "params": {"Pattern": "ACGX"}},
+            {"id": "fine", "task": "PatternCount", "params": {"Text": "ACGTACGT", "Pattern": "CG"}},
+        ])
+        for workers in (1, 2):
+            failed, results, errors = self.run_batch(workers)
+            self.assertEqual(failed, 4)
+            self.assertEqual({key for key, line in results.items() if line['ok']}, {'fine'})
+            self.assertEqual(results['unknown']['error'], "ValueError: Unknown task: Nothing")
+            self.assertTrue(results['missing']['error'].startswith("FileNotFoundError"))
+            self.assertEqual(results['caught']['error'], "ValueError: Invalid nucleotide in the input sequence")
+            self.assertTrue(results['raised']['error'].startswith("ValueError"))
+            self.assertNotIn("Error in", errors)
+
+    def test_results_as_generator(self):
+        # Test that a single job runs in this process and that nothing is printed to stdout
+        printed = io.StringIO()
+        with redirect_stdout(printed), redirect_stderr(io.StringIO()):
+            results = list(BatchResults([{'id': 1, 'task': 'FrequencyTable', 'text': 'ACGTA', 'params': {'k': 2}}]))
+        self.assertEqual(printed.getvalue(), '')
+        self.assertEqual(results[0]['result'], {'AC': 1, 'CG': 1, 'GT': 1, 'TA': 1})
+        self.assertEqual(results[0]['worker'], os.getpid())
+
+
+if __name__ == '__main__':
+    unittest.main()
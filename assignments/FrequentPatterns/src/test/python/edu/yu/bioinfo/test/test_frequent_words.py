@@ -0,0 +1,32 @@
+import os
+import random
+import sys
+import unittest
+
+# The modules under test live in the main source tree of the assignment
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..',
+                                                 '..', '..', '..', 'main', 'python', 'edu', 'yu', 'bioinfo')))
+
+from FrequentWords import BetterFrequentWords  # noqa: E402
+
+
+class TestBetterFrequentWords(unittest.TestCase):
+
+    def test_top_agrees_with_table(self):
+        # Test that the bounded-memory path returns the same most frequent k-mers as the frequency table
+        rng = random.Random(6)
+        text = ''.join(rng.choice('ACGT') for _ in range(2000)) + "GATTACA" * 12
+        for k in (3, 7, 15):
+            expected = BetterFrequentWords(text, k)
+            self.assertEqual(sorted(BetterFrequentWords(text, k, top=len(expected))), expected)
+
+    def test_top_rejects_text_the_table_counts_differently(self):
+        # Test that top refuses lower case and N, which the case-sensitive table would count apart
+        self.assertEqual(sorted(BetterFrequentWords("acgtACGT", 4)), ["ACGT", "acgt", "cgtA", "gtAC", "tACG"])
+        for text in ("acgtACGT", "ACGTNACGT"):
+            with self.assertRaises(ValueError):
+                BetterFrequentWords(text, 4, top=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
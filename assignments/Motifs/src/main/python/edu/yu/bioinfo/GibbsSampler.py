@@ -0,0 +1,25 @@
+from ReplicationEngine import GibbsSearch
+
+
+def GibbsSampler(Dna, k, t, N, restarts=20, seed=None, stall=None, patience=None, time_budget=None, workers=None):
+    """
+    Find motifs with the Gibbs sampler: start from a random k-mer in every string, then N times replace the motif
+    of a random string by a k-mer drawn at random, weighted by the profile (with pseudocounts) of the other
+    motifs. The sampler is restarted several times and the best motifs are kept.
+
+    Parameters:
+    - Dna (list): The DNA strings.
+    - k (int): The length of the motifs.
+    - t (int): The number of strings.
+    - N (int): The number of iterations of each restart.
+    - restarts (int): The number of random starts.
+    - seed (int, optional): The master seed, for reproducible results.
+    - stall (int, optional): End a restart after this many iterations in a row without a better score.
+    - patience (int, optional): Stop after this many restarts in a row without a better score.
+    - time_budget (float, optional): Stop after this many seconds.
+    - workers (int, optional): The number of worker processes the restarts are spread over.
+
+    Returns:
+    - MotifSearch: The best motifs, their score, and the score trace of every restart.
+    """
+    return GibbsSearch(Dna, k, t, N, restarts, seed, stall, patience, time_budget, workers)
@@ -0,0 +1,38 @@
+from ReplicationEngine import GreedySearch
+
+
+def GreedyMotifSearch(Dna, k, t, workers=None, executor=None):
+    """
+    Find a collection of motifs greedily: each k-mer of the first string seeds a collection, and every
+    following string contributes its profile-most-probable k-mer under the profile of the motifs chosen so far.
+
+    Parameters:
+    - Dna (list): The DNA strings.
+    - k (int): The length of the motifs.
+    - t (int): The number of strings.
+    - workers (int, optional): The number of worker processes the seeds are spread over.
+    - executor (Executor, optional): A process pool to reuse across many searches.
+
+    Returns:
+    - list: The collection of motifs with the lowest score, one per string.
+    """
+    # The seeds are run in vectorized batches by the motif engine, with the textbook tie-breaking
+    return GreedySearch(Dna, k, t, pseudocount=0, workers=workers, executor=executor)
+
+
+def GreedyMotifSearchWithPseudocounts(Dna, k, t, workers=None, executor=None):
+    """
+    Find a collection of motifs greedily, like GreedyMotifSearch, with profiles formed with pseudocounts
+    (Laplace's rule), so that no k-mer is ever given probability 0.
+
+    Parameters:
+    - Dna (list): The DNA strings.
+    - k (int): The length of the motifs.
+    - t (int): The number of strings.
+    - workers (int, optional): The number of worker processes the seeds are spread over.
+    - executor (Executor, optional): A process pool to reuse across many searches.
+
+    Returns:
+    - list: The collection of motifs with the lowest score, one per string.
+    """
+    return GreedySearch(Dna, k, t, pseudocount=1, workers=workers, executor=executor)
@@ -0,0 +1,48 @@
+import ReplicationEngine
+
+
+def MotifEnumeration(Dna, k, d):
+    """
+    Find every (k, d)-motif: the k-mers that appear in every DNA string with at most d mismatches.
+
+    Parameters:
+    - Dna (list): The DNA strings.
+    - k (int): The length of the motifs.
+    - d (int): The maximum number of mismatches.
+
+    Returns:
+    - list: The motifs, in lexicographic order.
+    """
+    # Whole subtrees of k-mers are ruled out at once as soon as a prefix is more than d away from some string
+    return ReplicationEngine.MotifEnumeration(Dna, k, d)
+
+
+def DistanceBetweenPatternAndStrings(Pattern, Dna):
+    """
+    Compute the sum, over the DNA strings, of the smallest Hamming distance between the pattern and a k-mer of
+    the string.
+
+    Parameters:
+    - Pattern (str): The pattern.
+    - Dna (list): The DNA strings.
+
+    Returns:
+    - int: The distance.
+    """
+    return ReplicationEngine.DistanceBetweenPatternAndStrings(Pattern, Dna)
+
+
+def MedianString(Dna, k):
+    """
+    Find a median string: a k-mer with the smallest distance to the DNA strings. Ties go to the k-mer that comes
+    first in lexicographic order.
+
+    Parameters:
+    - Dna (list): The DNA strings.
+    - k (int): The length of the pattern.
+
+    Returns:
+    - str: The median string.
+    """
+    # The search prunes every prefix that is already further from the strings than a known k-mer
+    return ReplicationEngine.MedianString(Dna, k)
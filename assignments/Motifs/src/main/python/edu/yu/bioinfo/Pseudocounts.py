@@ -1,14 +1,19 @@
+from ReplicationEngine import CountMatrix, ProfileMatrix
+
+
 def CountWithPseudocounts(Motifs):
-    t = len(Motifs)
-    k = len(Motifs[0])
-    count = {}  # output variable
-    for symbol in "ACGT":
-        count[symbol] = [1] * k  # Initialize counts with pseudocounts
-    for i in range(t):
-        for j in range(k):
-            symbol = Motifs[i][j]
-            count[symbol][j] += 1
-    return count
+    """
+    Count each nucleotide in each column of a collection of motifs, starting every count at 1.
+
+    Parameters:
+    - motifs (list): Collection of motifs.
+
+    Returns:
+    - dict: Maps each of 'A', 'C', 'G' and 'T' to its list of column counts.
+    """
+    # The whole (t x k) motif array is counted at once by the motif engine
+    count = CountMatrix(Motifs, pseudocount=1)
+    return {symbol: row for symbol, row in zip("ACGT", count.tolist())}
 
 
 def ProfileWithPseudocounts(Motifs):
@@ -21,11 +26,6 @@ def ProfileWithPseudocounts(Motifs):
     Returns:
     - list: Profile matrix with pseudocounts.
     """
-    t = len(Motifs)
-    k = len(Motifs[0])
-    profile = {}
-    count_matrix = CountWithPseudocounts(Motifs)
-    for symbol in "ACGT":
-        # Pseudocounts added
-        profile[symbol] = [count / (t + 4) for count in count_matrix[symbol]]
-    return profile
+    # Pseudocounts added: every count starts at 1, so each column is divided by t + 4
+    profile = ProfileMatrix(Motifs, pseudocount=1)
+    return {symbol: row for symbol, row in zip("ACGT", profile.tolist())}
@@ -0,0 +1,24 @@
+from ReplicationEngine import RandomizedSearch
+
+
+def RandomizedMotifSearch(Dna, k, t, restarts=1000, seed=None, patience=None, time_budget=None, workers=None):
+    """
+    Find motifs by RandomizedMotifSearch: start from a random k-mer in every string, then repeatedly replace the
+    motifs by the profile-most-probable k-mers of the profile (with pseudocounts) of the current motifs, for as
+    long as the score improves. The search is restarted several times and the best motifs are kept.
+
+    Parameters:
+    - Dna (list): The DNA strings.
+    - k (int): The length of the motifs.
+    - t (int): The number of strings.
+    - restarts (int): The number of random starts.
+    - seed (int, optional): The master seed, for reproducible results.
+    - patience (int, optional): Stop after this many restarts in a row without a better score.
+    - time_budget (float, optional): Stop after this many seconds.
+    - workers (int, optional): The number of worker processes the restarts are spread over.
+
+    Returns:
+    - MotifSearch: The best motifs, their score, and the score trace of every restart.
+    """
+    # The restarts run on the motif engine, each with its own random generator derived from the seed
+    return RandomizedSearch(Dna, k, t, restarts, seed, patience, time_budget, workers)
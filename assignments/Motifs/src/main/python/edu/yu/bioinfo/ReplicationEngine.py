@@ -0,0 +1,19 @@
+# ReplicationEngine.py
+import os
+import sys
+
+# The shared motif engine lives in the top-level Replication directory of this repository
+REPLICATION_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), *([os.pardir] * 8), 'Replication'))
+if REPLICATION_DIR not in sys.path:
+    sys.path.append(REPLICATION_DIR)
+
+from MotifEngine import (Consensus, CountMatrix, Entropy, GreedySearch, ProfileMatrix,  # noqa: E402
+                         ProfileMostProbable, ProfileMostProbableKmer, Score, encode_motifs)
+from MotifSampling import GibbsSearch, MotifSearch, RandomizedSearch  # noqa: E402
+from MotifTree import DistanceBetweenPatternAndStrings, MedianString, MotifEnumeration  # noqa: E402
+
+'''
+This module makes the NumPy motif core of the Replication directory importable from the assignment sources.
+Import the engine names from here rather than changing sys.path in each assignment file.
+'''